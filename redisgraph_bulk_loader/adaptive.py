@@ -0,0 +1,86 @@
+MIN_BUFFER_SIZE = 1_000_000  # Batches are never shrunk below 1 megabyte
+MAX_BUFFER_SIZE = 1024 * 1_000_000  # Hard limits enforced by Config
+MAX_TOKEN_SIZE = 512 * 1_000_000
+MAX_TOKEN_COUNT = 1024 * 1023
+MIN_TOKEN_COUNT = 16
+
+GROWTH = 1.5  # Factor applied when batches are comfortably under the target latency
+SHRINK_LIMIT = 0.5  # Batches shrink by at most half after a single slow call
+
+
+class BatchSizer:
+    """Adjusts the flush thresholds in Config based on the observed cost of each GRAPH.BULK call.
+
+    Batches grow while the server processes them well within the target latency and
+    throughput keeps improving, and shrink when a call exceeds the target, so that a single
+    call never monopolizes the server's command thread for long."""
+
+    def __init__(self, config):
+        self.config = config
+        self.target_latency = config.target_latency
+        self.max_buffer_size = MAX_BUFFER_SIZE
+        if config.memory_budget:
+            self.max_buffer_size = max(MIN_BUFFER_SIZE, config.memory_budget // 3)
+        # Token counts below MIN_TOKEN_COUNT are kept if the user asked for them.
+        self.min_token_count = min(MIN_TOKEN_COUNT, config.max_token_count)
+        self.best_throughput = 0.0
+        self.last_factor = 1.0
+        self.ceiling = None  # Buffer size beyond which throughput stopped improving
+
+    def record(self, rows, encode_time, transfer_time, server_time):
+        """Update the thresholds with the measurements of one acknowledged batch."""
+        # Encoding overlaps with sending, so the slower of the two bounds throughput.
+        elapsed = max(encode_time, transfer_time + server_time, 1e-6)
+        throughput = rows / elapsed
+        buffer_size = self.config.max_buffer_size
+
+        if server_time > self.target_latency:
+            factor = max(SHRINK_LIMIT, self.target_latency / server_time)
+        elif self.last_factor > 1.0 and throughput < self.best_throughput * 0.95:
+            # Growing the last batch made things slower; step back and stop growing.
+            factor = 1.0 / self.last_factor
+            self.ceiling = buffer_size * factor
+        elif server_time < self.target_latency / 2 and (
+            self.ceiling is None or buffer_size * GROWTH <= self.ceiling
+        ):
+            factor = GROWTH
+        else:
+            factor = 1.0
+
+        self.best_throughput = max(self.best_throughput, throughput)
+        self.last_factor = factor
+        if factor != 1.0:
+            self.scale(factor)
+
+    def scale(self, factor):
+        config = self.config
+        config.max_buffer_size = int(
+            min(
+                max(config.max_buffer_size * factor, MIN_BUFFER_SIZE),
+                self.max_buffer_size,
+            )
+        )
+        config.max_token_size = int(
+            min(
+                max(config.max_token_size * factor, MIN_BUFFER_SIZE),
+                MAX_TOKEN_SIZE,
+                config.max_buffer_size,
+            )
+        )
+        config.max_token_count = int(
+            min(
+                max(config.max_token_count * factor, self.min_token_count),
+                MAX_TOKEN_COUNT,
+            )
+        )
+
+    def report(self):
+        config = self.config
+        print(
+            "Adaptive batching settled on: --max-buffer-size %d --max-token-size %d --max-token-count %d"
+            % (
+                max(1, round(config.max_buffer_size / 1_000_000)),
+                max(1, round(config.max_token_size / 1_000_000)),
+                config.max_token_count,
+            )
+        )
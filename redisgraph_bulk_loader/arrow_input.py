@@ -0,0 +1,151 @@
+import os
+
+from .entity_file import (
+    ENCODED_TYPES,
+    NULL,
+    Type,
+    array_encoder,
+    declared_encoder,
+    encode_bool,
+    encode_double,
+    encode_long,
+    encode_string,
+)
+from .exceptions import SchemaError
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+    import pyarrow.types
+except ImportError:
+    pyarrow = None
+
+BATCH_ROWS = 65536  # Rows decoded from the file at a time
+
+
+def encode_null(_):
+    return NULL
+
+
+def column_type(arrow_type):
+    """Return the property type and value encoder of an Arrow column type"""
+    types = pyarrow.types
+    if types.is_dictionary(arrow_type):
+        # Dictionary-encoded columns are decoded to their values.
+        return column_type(arrow_type.value_type)
+    if types.is_integer(arrow_type):
+        return Type.LONG, encode_long
+    if types.is_floating(arrow_type) or types.is_decimal(arrow_type):
+        return Type.DOUBLE, encode_double
+    if types.is_boolean(arrow_type):
+        return Type.BOOL, encode_bool
+    if types.is_string(arrow_type) or types.is_large_string(arrow_type):
+        return Type.STRING, encode_string
+    if (
+        types.is_list(arrow_type)
+        or types.is_large_list(arrow_type)
+        or types.is_fixed_size_list(arrow_type)
+    ):
+        _, encode_element = column_type(arrow_type.value_type)
+        return Type.ARRAY, array_encoder(encode_element)
+    if types.is_null(arrow_type):
+        return Type.STRING, encode_null
+    raise SchemaError(f"Unsupported Arrow column type '{arrow_type}'")
+
+
+class ArrowReader:
+    """Iterates over the header and rows of an Arrow file like a csv.reader.
+
+    The first row is the list of column names, and every following row is a tuple of
+    the Python values of one entity. Rows are decoded a record batch at a time."""
+
+    def __init__(self, arrow_file, header):
+        self.batches = arrow_file.batches()
+        self.header = header
+        self.rows = iter(())
+        self.line_num = 0  # As in csv.reader, the header row is line 1
+        self.header_rows = 0  # Column names are stored in the schema
+        self.column_types = arrow_file.column_types
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.header is not None:
+            header, self.header = self.header, None
+            self.line_num += 1
+            return header
+        row = next(self.rows, None)
+        while row is None:
+            # Raises StopIteration once all batches have been read.
+            batch = next(self.batches)
+            columns = [column.to_pylist() for column in batch.columns]
+            self.rows = zip(*columns)
+            row = next(self.rows, None)
+        self.line_num += 1
+        return row
+
+    def encoders(self, types=None):
+        """Return the value encoder of every column. Columns whose declared type in types
+        differs from the type of their Arrow column are encoded as declared."""
+        encoders = []
+        for idx, (column_type, encode) in enumerate(self.column_types):
+            if types is not None:
+                declared = ENCODED_TYPES.get(types[idx], types[idx])
+                if declared != column_type:
+                    encode = declared_encoder(types[idx])
+            encoders.append(encode)
+        return encoders
+
+
+class ArrowFile:
+    """A Parquet file or Arrow IPC file holding node or relation entities.
+    Column types and the row count are read from the file's schema and metadata."""
+
+    def __init__(self, filename):
+        if pyarrow is None:
+            raise ImportError(
+                f"Reading '{filename}' requires pyarrow, which can be installed with 'pip install pyarrow'."
+            )
+        self.filename = filename
+        self.parquet = os.path.splitext(filename)[1].lower() == ".parquet"
+        if self.parquet:
+            self.file = pyarrow.parquet.ParquetFile(filename)
+            self.schema = self.file.schema_arrow
+            self.num_rows = self.file.metadata.num_rows
+        else:
+            self.source = pyarrow.memory_map(filename)
+            self.file = pyarrow.ipc.open_file(self.source)
+            self.schema = self.file.schema
+            self.num_rows = sum(
+                self.file.get_batch(i).num_rows
+                for i in range(self.file.num_record_batches)
+            )
+        self.column_types = [column_type(field.type) for field in self.schema]
+
+    def batches(self):
+        if self.parquet:
+            yield from self.file.iter_batches(batch_size=BATCH_ROWS)
+        else:
+            for i in range(self.file.num_record_batches):
+                yield self.file.get_batch(i)
+
+    def header(self, enforce_schema):
+        """Return the column names as a CSV header row. When the schema is enforced,
+        columns that don't declare a type in their name take the type of their Arrow column."""
+        header = []
+        for name, (prop_type, _) in zip(self.schema.names, self.column_types):
+            if enforce_schema and ":" not in name:
+                name += ":" + prop_type.name
+            header.append(name)
+        return header
+
+    def reader(self, enforce_schema):
+        return ArrowReader(self, self.header(enforce_schema))
+
+    def close(self):
+        if self.parquet:
+            self.file.close()
+        else:
+            self.source.close()
@@ -0,0 +1,356 @@
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import string
+import sys
+import tempfile
+from timeit import default_timer as timer
+
+import click
+
+from .config import Config
+from .entity_file import (
+    Type,
+    array_prop_to_binary,
+    inferred_prop_to_binary,
+    typed_prop_to_binary,
+)
+from .label import Label
+from .query_buffer import QueryBuffer
+from .relation_type import RelationType
+
+BENCHMARK_VERSION = 1
+SEPARATOR = "|"  # Separates the columns of benchmark files, which may hold arrays
+
+# Synthetic property columns: (name, type, string length or array width)
+PROP_COLUMNS = [
+    ("BOOL", Type.BOOL, 0),
+    ("LONG", Type.LONG, 0),
+    ("DOUBLE", Type.DOUBLE, 0),
+    ("STRING8", Type.STRING, 8),
+    ("STRING64", Type.STRING, 64),
+    ("STRING512", Type.STRING, 512),
+    ("ARRAY4", Type.ARRAY, 4),
+    ("ARRAY32", Type.ARRAY, 32),
+]
+# Types cycled through by the columns of wider rows
+ROW_COLUMNS = [
+    (Type.LONG, 0),
+    (Type.DOUBLE, 0),
+    (Type.STRING, 16),
+    (Type.BOOL, 0),
+    (Type.ARRAY, 4),
+]
+ROW_WIDTHS = (1, 4, 16)
+
+
+def synthetic_value(rng, prop_type, size):
+    """Return a random CSV field of the given type"""
+    if prop_type == Type.BOOL:
+        return rng.choice(("true", "false"))
+    if prop_type == Type.LONG:
+        return str(rng.randrange(-(1 << 40), 1 << 40))
+    if prop_type == Type.DOUBLE:
+        return f"{rng.uniform(-1e6, 1e6):.6f}"
+    if prop_type == Type.STRING:
+        return "".join(rng.choices(string.ascii_letters, k=size))
+    if prop_type == Type.ARRAY:
+        elements = [str(rng.randrange(1000)) for _ in range(size)]
+        return "[" + ", ".join(elements) + "]"
+    raise ValueError(f"No synthetic values of type {prop_type}")
+
+
+def row_columns(width):
+    return [ROW_COLUMNS[idx % len(ROW_COLUMNS)] for idx in range(width)]
+
+
+def synthetic_rows(rng, columns, count):
+    return [
+        [synthetic_value(rng, prop_type, size) for prop_type, size in columns]
+        for _ in range(count)
+    ]
+
+
+class DiscardingSpool:
+    """Stands in for a SpoolWriter, so that queries are built but not sent anywhere"""
+
+    def write_batch(self, args):
+        if args[0] == "BEGIN":
+            args = args[1:]
+        stats = [
+            b"%d nodes created" % args[0],
+            b"%d relations created" % args[1],
+        ]
+        return stats, 0.0, 0.0
+
+
+def time_loop(func, repeat):
+    """Run func repeat times, returning the elapsed seconds of every run.
+    func may return a number of seconds spent on setup, which is not counted.
+    As in timeit, garbage collection is disabled while func runs."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = timer()
+            setup_time = func()
+            elapsed = timer() - start
+        finally:
+            gc.enable()
+        if isinstance(setup_time, float):
+            elapsed -= setup_time
+        times.append(elapsed)
+    return times
+
+
+class Benchmark:
+    """Times the encoding hot paths on synthetic columns of each property type.
+
+    Every case is run repeat times over the same synthetic values, and is reported by the
+    fastest run's time per operation, which is the least affected by other activity
+    on the machine."""
+
+    def __init__(self, rows, repeat, seed, pattern=None):
+        self.rows = rows
+        self.repeat = repeat
+        self.seed = seed
+        self.pattern = pattern
+        self.results = {}
+        self.workdir = None
+
+    def selected(self, name):
+        return self.pattern is None or self.pattern in name
+
+    def record(self, name, ops, func):
+        times = time_loop(func, self.repeat)
+        self.results[name] = {
+            "ops": ops,
+            "ns_per_op": min(times) / ops * 1e9,
+            "runs": times,
+        }
+        print(
+            "%-48s %12.1f ns/op %14.0f ops/s"
+            % (name, self.results[name]["ns_per_op"], ops / min(times))
+        )
+
+    def write_csv(self, filename, header, rows):
+        path = os.path.join(self.workdir, filename)
+        with open(path, "w") as f:
+            f.write(SEPARATOR.join(header) + "\n")
+            for row in rows:
+                f.write(SEPARATOR.join(row) + "\n")
+        return path
+
+    def run(self):
+        self.workdir = tempfile.mkdtemp(prefix="redisgraph-bulk-benchmark-")
+        try:
+            self.run_prop_cases()
+            self.run_pack_props_cases()
+            self.run_process_cases()
+        finally:
+            shutil.rmtree(self.workdir)
+        return self.results
+
+    def run_prop_cases(self):
+        rng = random.Random(self.seed)
+        for name, prop_type, size in PROP_COLUMNS:
+            values = [synthetic_value(rng, prop_type, size) for _ in range(self.rows)]
+
+            case = f"typed_prop_to_binary/{name}"
+            if self.selected(case):
+                self.record(
+                    case,
+                    len(values),
+                    lambda: [typed_prop_to_binary(v, prop_type) for v in values],
+                )
+            case = f"inferred_prop_to_binary/{name}"
+            if self.selected(case):
+                self.record(
+                    case,
+                    len(values),
+                    lambda: [inferred_prop_to_binary(v) for v in values],
+                )
+            case = f"array_prop_to_binary/{name}"
+            if prop_type == Type.ARRAY and self.selected(case):
+                self.record(
+                    case,
+                    len(values),
+                    lambda: [array_prop_to_binary("=B", v) for v in values],
+                )
+
+    def header(self, columns, enforce_schema):
+        if enforce_schema:
+            return [f"c{idx}:{t.name}" for idx, (t, _) in enumerate(columns)]
+        return [f"c{idx}" for idx in range(len(columns))]
+
+    def run_pack_props_cases(self):
+        rng = random.Random(self.seed)
+        for width in ROW_WIDTHS:
+            columns = row_columns(width)
+            rows = synthetic_rows(rng, columns, self.rows)
+            for enforce_schema in (False, True):
+                schema = "typed" if enforce_schema else "inferred"
+                case = f"pack_props/{schema}/{width}"
+                if not self.selected(case):
+                    continue
+                # The header is only read to build the entity's schema.
+                path = self.write_csv(
+                    f"pack_props_{schema}_{width}.csv",
+                    self.header(columns, enforce_schema),
+                    [],
+                )
+                config = Config(enforce_schema=enforce_schema, separator=SEPARATOR)
+                label = Label(None, path, "Bench", config)
+                self.record(
+                    case, len(rows), lambda: [label.pack_props(r) for r in rows]
+                )
+
+    def run_process_cases(self):
+        rng = random.Random(self.seed)
+        columns = row_columns(4)
+        rows = synthetic_rows(rng, columns, self.rows)
+        for enforce_schema in (False, True):
+            schema = "typed" if enforce_schema else "inferred"
+            case = f"process_entities/Label/{schema}/4"
+            if not self.selected(case):
+                continue
+            path = self.write_csv(
+                f"Label_{schema}.csv", self.header(columns, enforce_schema), rows
+            )
+            config = Config(enforce_schema=enforce_schema, separator=SEPARATOR)
+            self.record(case, len(rows), lambda: self.process_labels(path, config))
+
+        case = "process_entities/RelationType/inferred/2"
+        if not self.selected(case):
+            return
+        nodes = self.write_csv(
+            "Node.csv", ["id"], [[str(idx)] for idx in range(self.rows)]
+        )
+        edges = [
+            [str(rng.randrange(self.rows)), str(rng.randrange(self.rows))]
+            + [synthetic_value(rng, prop_type, size) for prop_type, size in columns[:2]]
+            for _ in range(self.rows)
+        ]
+        path = self.write_csv("Relation.csv", ["src", "dst", "c0", "c1"], edges)
+        config = Config(separator=SEPARATOR, store_node_identifiers=True)
+        self.record(
+            case, len(edges), lambda: self.process_relations(nodes, path, config)
+        )
+
+    def process_labels(self, path, config):
+        query_buffer = QueryBuffer("bench", None, config, DiscardingSpool())
+        label = Label(query_buffer, path, "Bench", config)
+        query_buffer.start_entity(label)
+        with contextlib.redirect_stdout(io.StringIO()):
+            label.process_entities()
+        query_buffer.wait_pool()
+
+    def process_relations(self, nodes, path, config):
+        """Process a relation file, returning the time spent building the node
+        identifiers it refers to, which is not counted"""
+        start = timer()
+        query_buffer = QueryBuffer("bench", None, config, DiscardingSpool())
+        with contextlib.redirect_stdout(io.StringIO()):
+            label = Label(query_buffer, nodes, "Node", config)
+            query_buffer.start_entity(label)
+            label.process_entities()
+            setup_time = timer() - start
+            reltype = RelationType(query_buffer, path, "EDGE", config)
+            query_buffer.start_entity(reltype)
+            reltype.process_entities()
+        query_buffer.wait_pool()
+        return setup_time
+
+
+def compare(results, baseline, tolerance):
+    """Compare results to a baseline, printing every case's change in time per operation.
+    Returns the names of the cases that are slower than the baseline by more than the
+    tolerance, a fraction."""
+    regressions = []
+    print("%-48s %12s %12s %8s" % ("case", "baseline", "current", "change"))
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["ns_per_op"]
+        after = result["ns_per_op"]
+        change = after / before - 1
+        flag = ""
+        if change > tolerance:
+            regressions.append(name)
+            flag = " REGRESSION"
+        print(f"{name:<48} {before:12.1f} {after:12.1f} {change * 100:+7.1f}%{flag}")
+    return regressions
+
+
+################################################################################
+# Encoding benchmarks
+################################################################################
+# Command-line arguments
+@click.command()
+@click.option(
+    "--output", "-o", default=None, help="write the results to this JSON file"
+)
+@click.option(
+    "--baseline",
+    "-b",
+    default=None,
+    help="JSON results of an earlier run to compare against",
+)
+@click.option(
+    "--tolerance",
+    "-t",
+    default=10.0,
+    help="percentage by which a case may be slower than the baseline (default 10)",
+)
+@click.option(
+    "--rows", "-n", default=20000, help="values or rows per case (default 20000)"
+)
+@click.option(
+    "--repeat",
+    "-r",
+    default=5,
+    help="runs of each case, of which the fastest is kept (default 5)",
+)
+@click.option(
+    "--filter",
+    "-k",
+    "pattern",
+    default=None,
+    help="only run the cases whose name contains this text",
+)
+@click.option("--seed", default=0, help="seed of the synthetic values (default 0)")
+def bulk_benchmark(output, baseline, tolerance, rows, repeat, pattern, seed):
+    benchmark = Benchmark(rows, repeat, seed, pattern)
+    results = benchmark.run()
+    report = {
+        "version": BENCHMARK_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rows": rows,
+        "seed": seed,
+        "results": results,
+    }
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if baseline:
+        with open(baseline) as f:
+            baseline_report = json.load(f)
+        if baseline_report.get("rows") != rows:
+            print("Warning: the baseline was run with a different number of rows.")
+        regressions = compare(results, baseline_report["results"], tolerance / 100)
+        if regressions:
+            print(f"{len(regressions)} cases regressed by more than {tolerance}%.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    bulk_benchmark()
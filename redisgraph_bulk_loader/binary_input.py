@@ -0,0 +1,138 @@
+import os
+
+from .exceptions import CSVError
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+BLOCK_EDGES = 1 << 18  # Edges resolved at a time
+ENDPOINTS_DTYPE = "<u8"  # Source and destination IDs prefixing each relation
+ENDPOINTS_SIZE = 16
+
+
+def build_index(nodes, namespace):
+    """Return the integer node identifiers of a namespace in sorted order, along with their
+    internal IDs, for resolving the endpoints of binary edge lists in blocks."""
+    prefix = "" if namespace is None else namespace + "."
+    prefix_len = len(prefix)
+    keys = []
+    ids = []
+    for identifier, node_id in nodes.items():
+        if not identifier.startswith(prefix):
+            continue
+        try:
+            keys.append(int(identifier[prefix_len:]))
+        except ValueError:
+            # Only integer identifiers can be referred to by binary edge lists.
+            continue
+        ids.append(node_id)
+    keys = numpy.array(keys, dtype="<i8")
+    order = numpy.argsort(keys, kind="stable")
+    return keys[order], numpy.array(ids, dtype=ENDPOINTS_DTYPE)[order]
+
+
+def resolve(index, identifiers):
+    """Return the internal IDs of an array of node identifiers, and a mask of the
+    identifiers that were found in the index."""
+    keys, ids = index
+    if len(keys) == 0:
+        return (
+            numpy.zeros(len(identifiers), ENDPOINTS_DTYPE),
+            numpy.zeros(len(identifiers), bool),
+        )
+    positions = numpy.searchsorted(keys, identifiers)
+    numpy.minimum(positions, len(keys) - 1, out=positions)
+    return ids[positions], keys[positions] == identifiers
+
+
+def resolve_edges(edges, sources, destinations):
+    """Resolve a block of edges against the source and destination indices. Returns the
+    encoded endpoints of the valid edges, and the positions of the invalid ones."""
+    src, src_found = resolve(sources, edges[:, 0])
+    dest, dest_found = resolve(destinations, edges[:, 1])
+    valid = src_found & dest_found
+    endpoints = numpy.stack([src, dest], axis=1)
+    if valid.all():
+        return endpoints.tobytes(), []
+    return endpoints[valid].tobytes(), numpy.flatnonzero(~valid).tolist()
+
+
+def edge_offset(blocks, sources, destinations, count):
+    """Return the position of the edge following the first count valid edges"""
+    seen = 0
+    for first, edges in blocks:
+        _, invalid = resolve_edges(edges, sources, destinations)
+        valid = len(edges) - len(invalid)
+        if seen + valid >= count:
+            mask = numpy.ones(len(edges), bool)
+            mask[invalid] = False
+            return first + int(numpy.flatnonzero(mask)[count - seen - 1]) + 1
+        seen += valid
+    raise CSVError(f"Expected at least {count} valid edges, found {seen}")
+
+
+class EdgeFile:
+    """A binary edge list: an .npy array of shape (E, 2) or a raw stream of little-endian
+    int64 pairs, holding the source and destination identifiers of each relation.
+    The file is memory-mapped and read a block of edges at a time."""
+
+    def __init__(self, filename):
+        if numpy is None:
+            raise ImportError(
+                f"Reading '{filename}' requires numpy, which can be installed with 'pip install numpy'."
+            )
+        if filename.lower().endswith(".npy"):
+            edges = numpy.load(filename, mmap_mode="r")
+            if edges.ndim != 2 or edges.shape[1] != 2:
+                raise CSVError(
+                    f"{filename}: Expected an array of shape (E, 2), found {edges.shape}"
+                )
+            if edges.dtype.kind not in "iu":
+                raise CSVError(
+                    f"{filename}: Expected an array of integers, found {edges.dtype}"
+                )
+        else:
+            if os.path.getsize(filename) % 16:
+                raise CSVError(f"{filename}: Expected pairs of 8-byte integers")
+            edges = numpy.memmap(filename, dtype="<i8", mode="r").reshape(-1, 2)
+        self.edges = edges
+        self.num_rows = len(edges)
+
+    def reader(self):
+        return EdgeReader(self)
+
+    def close(self):
+        self.edges = None
+
+
+class EdgeReader:
+    """Stands in for the csv.reader of a binary edge list, which has no header row.
+    The header declares the first column as the source and the second as the
+    destination. Edges are read in blocks rather than rows."""
+
+    def __init__(self, edge_file):
+        self.edge_file = edge_file
+        self.header = [":START_ID", ":END_ID"]
+        self.header_rows = 0
+        self.line_num = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.header is not None:
+            header, self.header = self.header, None
+            return header
+        raise StopIteration
+
+    def encoders(self, types=None):
+        return [None, None]
+
+    def blocks(self, start=0):
+        """Yield the position of the first edge and the (E, 2) int64 array of each block"""
+        edges = self.edge_file.edges
+        for first in range(start, len(edges), BLOCK_EDGES):
+            end = first + BLOCK_EDGES
+            yield first, numpy.asarray(edges[first:end], dtype="<i8")
@@ -1,16 +1,33 @@
 import sys
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor, wait
 from timeit import default_timer as timer
 
 import click
 import redis
 
+from .cache import EncodingCache
+from .checkpoint import Checkpoint, describe_inputs
 from .config import Config
+from .entity_file import STDIN
+from .estimate import SAMPLE_ROWS, LoadEstimate, measurement_client
+from .events import load_observer
 from .label import Label
+from .memory import print_allocations
+from .planner import plan_batches
+from .profiler import LoadProfiler, profile_columns
 from .query_buffer import QueryBuffer
 from .relation_type import RelationType
+from .schema_file import load_schema
+from .sketches import LoadSketches
+from .spool import SpoolWriter
+from .zero_copy import from_url as zero_copy_from_url
 
+# Number of input files opened and counted ahead of the one being processed
+PREFETCH_DEPTH = 4
 
-def parse_schemas(cls, query_buf, path_to_csv, csv_tuples, config):
+
+def parse_schemas(cls, query_buf, path_to_csv, csv_tuples, config, schema_entries=()):
     schemas = [None] * (len(path_to_csv) + len(csv_tuples))
     for idx, in_csv in enumerate(path_to_csv):
         # Build entity descriptor from input CSV
@@ -20,27 +37,186 @@ def parse_schemas(cls, query_buf, path_to_csv, csv_tuples, config):
     for idx, csv_tuple in enumerate(csv_tuples):
         # Build entity descriptor from input CSV
         schemas[idx + offset] = cls(query_buf, csv_tuple[1], csv_tuple[0], config)
+
+    for entry in schema_entries:
+        # The header declared in the schema file is parsed and packed once,
+        # then shared by every data file of the label or relation type.
+        template = cls(query_buf, entry.files[0], entry.name, config, entry.columns)
+        schemas.append(template)
+        for path in entry.files[1:]:
+            schemas.append(cls(query_buf, path, entry.name, config, template=template))
     return schemas
 
 
 # For each input file, validate contents and convert to binary format.
 # If any buffer limits have been reached, flush all enqueued inserts to Redis.
 def process_entities(entities):
-    for entity in entities:
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        # Open upcoming files in the background while the current one is encoded.
+        prefetches = [
+            prefetcher.submit(entity.prefetch) for entity in entities[:PREFETCH_DEPTH]
+        ]
+        try:
+            for idx, entity in enumerate(entities):
+                if idx + PREFETCH_DEPTH < len(entities):
+                    upcoming = entities[idx + PREFETCH_DEPTH]
+                    prefetches.append(prefetcher.submit(upcoming.prefetch))
+                prefetches[idx].result()
+                process_entity(entity)
+        finally:
+            # Close the files left open, such as those opened ahead of a file that
+            # failed, or those whose entities were read from the cache.
+            for prefetch in prefetches:
+                prefetch.cancel()
+            wait(prefetches)
+            for entity in entities:
+                if entity.infile is not None:
+                    entity.close()
+
+
+def verify_restored(query_buffer, checkpoint):
+    """Verify that the node IDs rebuilt up to the resumed batch are those it was sent with"""
+    if query_buffer.entity_index != checkpoint.entity:
+        return
+    if query_buffer.top_node_id != checkpoint.top_node_id:
+        raise Exception(
+            "Rebuilt node identifiers end at ID %d, but the checkpoint's last batch ended at ID %d; the load can't be resumed."
+            % (query_buffer.top_node_id, checkpoint.top_node_id)
+        )
+
+
+def process_entity(entity):
+    query_buffer = entity.query_buffer
+    query_buffer.start_entity(entity)
+    checkpoint = query_buffer.checkpoint
+    if checkpoint and checkpoint.resuming:
+        # Skip the entities an interrupted load has already sent.
+        start = timer()
+        if checkpoint.completed(query_buffer.entity_index):
+            entity.restore()
+            query_buffer.report.add_times(read=timer() - start)
+            verify_restored(query_buffer, checkpoint)
+            query_buffer.memory.end_file(entity)
+            query_buffer.events.emit("file_finished", query_buffer.report.current)
+            return
+        sent_rows = checkpoint.sent_rows(query_buffer.entity_index)
+        if sent_rows:
+            entity.restore(sent_rows)
+        query_buffer.report.add_times(read=timer() - start)
+        verify_restored(query_buffer, checkpoint)
+
+    columns = profile_columns(entity) if query_buffer.profiler else None
+    if query_buffer.sketches:
+        query_buffer.sketches.attach(entity)
+    if query_buffer.profiler:
+        with query_buffer.profiler.profile(entity.filename, columns):
+            entity.process_entities()
+    else:
         entity.process_entities()
-        added_size = entity.binary_size
-        # Check to see if the addition of this data will exceed the buffer's capacity
-        if (
-            entity.query_buffer.buffer_size + added_size
-            >= entity.config.max_buffer_size
-            or entity.query_buffer.redis_token_count + len(entity.binary_entities)
-            >= entity.config.max_token_count
-        ):
-            # Send and flush the buffer if appropriate
-            entity.query_buffer.send_buffer()
-        # Add binary data to list and update all counts
-        entity.query_buffer.redis_token_count += len(entity.binary_entities)
+    # Any batch sent from here on includes the whole file.
+    query_buffer.position = (query_buffer.entity_index, None)
+    added_size = entity.binary_size
+    # Check to see if the addition of this data will exceed the buffer's capacity
+    if (
+        entity.query_buffer.buffer_size + added_size >= entity.config.max_buffer_size
+        or entity.query_buffer.redis_token_count >= entity.config.max_token_count
+    ):
+        # Send and flush the buffer, including this entity, if appropriate
+        entity.query_buffer.send_buffer()
+    else:
+        # Account for the entity's token, which remains in the buffer
         entity.query_buffer.buffer_size += added_size
+    # The encoded rows are now held by the query buffer's token; release this copy.
+    entity.reset_partial_binary()
+    query_buffer.memory.end_file(entity)
+    query_buffer.events.emit("file_finished", query_buffer.report.current)
+
+
+def connect(redis_url, graph, resume=False):
+    """Connect to the Redis server and verify that the graph can be created,
+    or that it exists if an interrupted load is being resumed"""
+    client = redis.from_url(redis_url)
+
+    # Attempt to connect to Redis server
+    try:
+        client.ping()
+    except redis.exceptions.ConnectionError as e:
+        print("Could not connect to Redis server.")
+        raise e
+
+    # Attempt to verify that RedisGraph module is loaded
+    try:
+        module_list = [m[b"name"] for m in client.module_list()]
+        if b"graph" not in module_list:
+            print("RedisGraph module not loaded on connected server.")
+            sys.exit(1)
+    except redis.exceptions.ResponseError:
+        # Ignore check if the connected server does not support the "MODULE LIST" command
+        pass
+
+    # Verify that the graph name is not already used in the Redis database
+    key_exists = client.execute_command("EXISTS", graph)
+    if resume:
+        if not key_exists:
+            print(
+                f"Graph with name '{graph}' could not be resumed, as Redis key '{graph}' does not exist."
+            )
+            sys.exit(1)
+    elif key_exists:
+        print(
+            f"Graph with name '{graph}', could not be created, as Redis key '{graph}' already exists."
+        )
+        sys.exit(1)
+
+    return client
+
+
+def graph_counts(client, graph):
+    """Return the number of nodes and relations the graph holds"""
+    counts = []
+    for query in ("MATCH (n) RETURN count(n)", "MATCH ()-[r]->() RETURN count(r)"):
+        result = client.execute_command("GRAPH.QUERY", graph, query)
+        # The reply holds the header, the rows of results and the query statistics.
+        counts.append(int(result[1][0][0]))
+    return counts
+
+
+def create_indices(client, graph, index, full_text_index):
+    """Create the requested indices on a newly-built graph"""
+    # Add in Graph Indices after graph creation
+    for i in index:
+        l, p = i.split(":")
+        print(f"Creating Index on Label: {l}, Property: {p}")
+        try:
+            index_create = client.execute_command(
+                "GRAPH.QUERY", graph, f"CREATE INDEX ON :{l}({p})"
+            )
+            for z in index_create:
+                print(z[0].decode("utf-8"))
+        except redis.exceptions.ResponseError as e:
+            print(f"Unable to create Index on Label: {l}, Property {p}")
+            print(e)
+
+    # Add in Full Text Search Indices after graph creation
+    for i in full_text_index:
+        l, p = i.split(":")
+        print(f"Creating Full Text Search Index on Label: {l}, Property: {p}")
+        try:
+            index_create = client.execute_command(
+                "GRAPH.QUERY",
+                graph,
+                f"CALL db.idx.fulltext.createNodeIndex('{l}', '{p}')",
+            )
+            print(index_create[-1][0].decode("utf-8"))
+        except redis.exceptions.ResponseError as e:
+            print(
+                f"Unable to create Full Text Search Index on Label: {l}, Property {p}"
+            )
+            print(e)
+        except Exception:
+            print(
+                f"Unknown Error: Unable to create Full Text Search Index on Label: {l}, Property {p}"
+            )
 
 
 ################################################################################
@@ -69,6 +245,12 @@ def process_entities(entities):
     multiple=True,
     help="Relation type string followed by path to relation csv file",
 )
+@click.option(
+    "--schema",
+    "-S",
+    default=None,
+    help="JSON or YAML file declaring the columns and headerless data files of labels and relation types",
+)
 @click.option(
     "--separator", "-o", default=",", help="Field token separator in csv file"
 )
@@ -131,6 +313,114 @@ def process_entities(entities):
     default=64,
     help="max size of each token in megabytes (default 64, max 512)",
 )
+@click.option(
+    "--memory-budget",
+    "-m",
+    default=0,
+    help="max memory in megabytes for encoded data, including unacknowledged queries (default 0, unlimited)",
+)
+@click.option(
+    "--target-latency",
+    "-l",
+    default=0,
+    help="adapt buffer sizes so that Redis processes each query in about this many milliseconds (default 0, fixed sizes)",
+)
+@click.option(
+    "--plan-batches",
+    "-P",
+    "plan",
+    default=False,
+    is_flag=True,
+    help="pack input files into queries by estimated size instead of processing them in order",
+)
+@click.option(
+    "--zero-copy",
+    "-z",
+    default=False,
+    is_flag=True,
+    help="send GRAPH.BULK queries with scatter/gather socket writes instead of redis-py's encoder",
+)
+@click.option(
+    "--spool-dir",
+    "-w",
+    default=None,
+    help="write all queries to this directory for a later replay instead of connecting to Redis",
+)
+@click.option(
+    "--cache-dir",
+    "-C",
+    default=None,
+    help="directory in which to keep the encoded entities of each input file for reuse by later loads",
+)
+@click.option(
+    "--cache-hash",
+    "-H",
+    default=False,
+    is_flag=True,
+    help="identify cached input files by a hash of their contents rather than their path",
+)
+@click.option(
+    "--checkpoint",
+    "-k",
+    "checkpoint_path",
+    default=None,
+    help="journal acknowledged queries to this file, so that an interrupted load can be resumed",
+)
+@click.option(
+    "--resume",
+    default=False,
+    is_flag=True,
+    help="resume the interrupted load recorded in the --checkpoint file",
+)
+@click.option(
+    "--report-json",
+    default=None,
+    help="write the time spent on each stage of the load, by input file and by query, to this JSON file",
+)
+@click.option(
+    "--timeline",
+    default=None,
+    help="write the submission time, size and latency of every query to this CSV file",
+)
+@click.option(
+    "--memory-report",
+    default=False,
+    is_flag=True,
+    help="print the estimated memory held by the ID map and pending queries after each input file",
+)
+@click.option(
+    "--tracemalloc",
+    "trace_allocations",
+    default=0,
+    help="print this many of the largest allocation sites once loaded (slows the load)",
+)
+@click.option(
+    "--profile",
+    default=None,
+    help="profile each input file with cProfile, writing its stats and the encoding time of each column to this directory",
+)
+@click.option(
+    "--observer",
+    multiple=True,
+    help="module:name of a LoadObserver class or factory to notify of the load's progress",
+)
+@click.option(
+    "--sketches",
+    default=False,
+    is_flag=True,
+    help="add distinct counts and ranges of properties and relationship degree distributions to the --report-json report",
+)
+@click.option(
+    "--estimate",
+    default=False,
+    is_flag=True,
+    help="project the size, memory and duration of the load from a sample of each input file, without loading it",
+)
+@click.option(
+    "--estimate-rows",
+    default=SAMPLE_ROWS,
+    help=f"rows sampled from each input file by --estimate (default {SAMPLE_ROWS})",
+)
 @click.option(
     "--index", "-i", multiple=True, help="Label:Propery on which to create an index"
 )
@@ -147,6 +437,7 @@ def bulk_insert(
     nodes_with_label,
     relations,
     relations_with_type,
+    schema,
     separator,
     enforce_schema,
     id_type,
@@ -157,19 +448,79 @@ def bulk_insert(
     max_token_count,
     max_buffer_size,
     max_token_size,
+    memory_budget,
+    target_latency,
+    plan,
+    zero_copy,
+    spool_dir,
+    cache_dir,
+    cache_hash,
+    checkpoint_path,
+    resume,
+    report_json,
+    timeline,
+    memory_report,
+    trace_allocations,
+    profile,
+    observer,
+    sketches,
+    estimate,
+    estimate_rows,
     index,
     full_text_index,
 ):
     if sys.version_info.major < 3 or sys.version_info.minor < 6:
         raise Exception("Python >= 3.6 is required for the RedisGraph bulk loader.")
 
-    if not (any(nodes) or any(nodes_with_label)):
+    # Headerless data files may be described by a schema file.
+    schema_nodes, schema_relations = load_schema(schema) if schema else ([], [])
+    if not enforce_schema and any(
+        ":" in column
+        for entry in schema_nodes + schema_relations
+        for column in entry.columns
+    ):
+        # Without it, typed columns would become properties named after the whole field.
+        raise Exception(
+            f"The columns of schema file '{schema}' declare types, which requires --enforce-schema."
+        )
+
+    if not (any(nodes) or any(nodes_with_label) or schema_nodes):
         raise Exception("At least one node file must be specified.")
 
+    if resume and not checkpoint_path:
+        raise Exception(
+            "--resume requires the --checkpoint file of the interrupted load."
+        )
+
+    if checkpoint_path and spool_dir:
+        raise Exception("--checkpoint cannot be used with --spool-dir.")
+
+    if sketches and not report_json:
+        raise Exception("--sketches requires a --report-json file to write them to.")
+
+    if sketches and cache_dir:
+        raise Exception(
+            "--sketches cannot be used with --cache-dir, as cached files are not read."
+        )
+
+    input_files = (
+        list(nodes)
+        + [path for _, path in nodes_with_label]
+        + list(relations)
+        + [path for _, path in relations_with_type]
+    )
+    if input_files.count(STDIN) > 1:
+        raise Exception("Standard input can only be read by one input file.")
+
+    if trace_allocations:
+        tracemalloc.start()
+
     start_time = timer()
 
     # If relations are being built, we must store unique node identifiers to later resolve endpoints.
-    store_node_identifiers = any(relations) or any(relations_with_type)
+    store_node_identifiers = (
+        any(relations) or any(relations_with_type) or any(schema_relations)
+    )
 
     # Initialize configurations with command-line arguments
     config = Config(
@@ -184,45 +535,83 @@ def bulk_insert(
         int(quote),
         store_node_identifiers,
         escapechar,
+        memory_budget,
+        target_latency,
     )
 
-    client = redis.from_url(redis_url)
+    # Unchanged input files may reuse their encoding from a previous load.
+    cache = EncodingCache(cache_dir, config, cache_hash) if cache_dir else None
 
-    # Attempt to connect to Redis server
-    try:
-        client.ping()
-    except redis.exceptions.ConnectionError as e:
-        print("Could not connect to Redis server.")
-        raise e
-
-    # Attempt to verify that RedisGraph module is loaded
-    try:
-        module_list = [m[b"name"] for m in client.module_list()]
-        if b"graph" not in module_list:
-            print("RedisGraph module not loaded on connected server.")
-            sys.exit(1)
-    except redis.exceptions.ResponseError:
-        # Ignore check if the connected server does not support the "MODULE LIST" command
-        pass
-
-    # Verify that the graph name is not already used in the Redis database
-    key_exists = client.execute_command("EXISTS", graph)
-    if key_exists:
-        print(
-            f"Graph with name '{graph}', could not be created, as Redis key '{graph}' already exists."
-        )
-        sys.exit(1)
-
-    query_buf = QueryBuffer(graph, client, config)
+    if estimate:
+        # Input files are only sampled, and the server is measured with a scratch graph.
+        client = None
+        query_buf = QueryBuffer(graph, None, config)
+    elif spool_dir:
+        # Queries are written to disk for a later replay rather than sent to Redis.
+        client = None
+        spool = SpoolWriter(spool_dir, graph)
+        query_buf = QueryBuffer(graph, None, config, spool, cache)
+    else:
+        client = connect(redis_url, graph, resume)
+        # GRAPH.BULK queries may be sent over a dedicated zero-copy connection.
+        bulk_client = zero_copy_from_url(redis_url) if zero_copy else client
+        query_buf = QueryBuffer(graph, bulk_client, config, cache=cache)
 
     # Read the header rows of each input CSV and save its schema.
-    labels = parse_schemas(Label, query_buf, nodes, nodes_with_label, config)
+    # Files are only opened again when their entities are processed.
+    labels = parse_schemas(
+        Label, query_buf, nodes, nodes_with_label, config, schema_nodes
+    )
     reltypes = parse_schemas(
-        RelationType, query_buf, relations, relations_with_type, config
+        RelationType,
+        query_buf,
+        relations,
+        relations_with_type,
+        config,
+        schema_relations,
     )
 
-    process_entities(labels)
-    process_entities(reltypes)
+    if estimate:
+        load = LoadEstimate(labels, reltypes, config, estimate_rows)
+        client = measurement_client(redis_url)
+        if client:
+            load.measure(client, graph)
+        load.print_report()
+        return
+
+    query_buf.memory.verbose = memory_report
+    if profile:
+        query_buf.profiler = LoadProfiler(profile)
+    query_buf.events.observers.extend(load_observer(spec) for spec in observer)
+    # Stage times are reported to observers as well as in the report.
+    query_buf.report.time_rows = bool(report_json or observer)
+    if sketches:
+        query_buf.sketches = LoadSketches()
+    query_buf.memory.expect_nodes(labels)
+
+    if checkpoint_path and any(entity.streaming for entity in labels + reltypes):
+        raise Exception(
+            "--checkpoint cannot be used with standard input or named pipes, which can't be read again."
+        )
+
+    if checkpoint_path:
+        # Files are processed in a different order when batches are planned.
+        inputs = describe_inputs(labels + reltypes) + [plan]
+        checkpoint = Checkpoint(checkpoint_path, graph, inputs, resume)
+        query_buf.checkpoint = checkpoint
+        if resume:
+            # Queries in flight when the load was interrupted may have been applied.
+            checkpoint.reconcile(*graph_counts(client, graph))
+            query_buf.resume(checkpoint)
+
+    if plan:
+        for batch in plan_batches(labels, reltypes, config):
+            process_entities(batch)
+            # Each planned batch is sent as its own query.
+            query_buf.send_buffer()
+    else:
+        process_entities(labels)
+        process_entities(reltypes)
 
     # Send all remaining tokens to Redis
     query_buf.send_buffer()
@@ -230,41 +619,47 @@ def bulk_insert(
 
     end_time = timer()
     query_buf.report_completion(end_time - start_time)
-
-    # Add in Graph Indices after graph creation
-    for i in index:
-        l, p = i.split(":")
-        print(f"Creating Index on Label: {l}, Property: {p}")
-        try:
-            index_create = client.execute_command(
-                "GRAPH.QUERY", graph, f"CREATE INDEX ON :{l}({p})"
+    query_buf.events.emit(
+        "load_finished",
+        {
+            "graph": graph,
+            "runtime": end_time - start_time,
+            "nodes_created": query_buf.nodes_created,
+            "relations_created": query_buf.relations_created,
+            "stages": query_buf.report.totals(),
+        },
+    )
+    if memory_report:
+        query_buf.memory.report_completion()
+    if trace_allocations:
+        print_allocations(trace_allocations)
+    if profile:
+        print(f"Column profiles written to '{query_buf.profiler.write_columns()}'")
+    if report_json:
+        if sketches:
+            query_buf.report.sketches = query_buf.sketches.to_dict(
+                query_buf.top_node_id, query_buf.nodes
             )
-            for z in index_create:
-                print(z[0].decode("utf-8"))
-        except redis.exceptions.ResponseError as e:
-            print(f"Unable to create Index on Label: {l}, Property {p}")
-            print(e)
+        query_buf.report.write(
+            report_json,
+            end_time - start_time,
+            query_buf.nodes_created,
+            query_buf.relations_created,
+        )
+    if timeline:
+        query_buf.report.write_timeline(timeline)
 
-    # Add in Full Text Search Indices after graph creation
-    for i in full_text_index:
-        l, p = i.split(":")
-        print(f"Creating Full Text Search Index on Label: {l}, Property: {p}")
-        try:
-            index_create = client.execute_command(
-                "GRAPH.QUERY",
-                graph,
-                f"CALL db.idx.fulltext.createNodeIndex('{l}', '{p}')",
-            )
-            print(index_create[-1][0].decode("utf-8"))
-        except redis.exceptions.ResponseError as e:
-            print(
-                f"Unable to create Full Text Search Index on Label: {l}, Property {p}"
-            )
-            print(e)
-        except Exception:
-            print(
-                f"Unknown Error: Unable to create Full Text Search Index on Label: {l}, Property {p}"
-            )
+    if spool_dir:
+        # Indices are recorded for the replaying loader to create.
+        query_buf.spool.close(index, full_text_index)
+        print(
+            f"Wrote {len(query_buf.spool.batches)} queries to spool directory '{spool_dir}'"
+        )
+    else:
+        create_indices(client, graph, index, full_text_index)
+
+    if checkpoint_path:
+        checkpoint.close()
 
 
 if __name__ == "__main__":
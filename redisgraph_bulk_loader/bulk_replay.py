@@ -0,0 +1,89 @@
+import mmap
+import os
+import sys
+from timeit import default_timer as timer
+
+import click
+
+from .bulk_insert import connect, create_indices
+from .config import Config
+from .query_buffer import QueryBuffer
+from .spool import iter_batches, load_manifest
+from .zero_copy import from_url as zero_copy_from_url
+
+
+def replay_batches(query_buf, manifest, data):
+    """Send every spooled batch through the query buffer, which prepends BEGIN to the
+    first query and keeps several queries in flight."""
+    with click.progressbar(
+        iter_batches(manifest, data),
+        length=len(manifest["batches"]),
+        label=query_buf.graphname,
+    ) as batches:
+        for batch, labels, reltypes in batches:
+            query_buf.node_count = batch["nodes"]
+            query_buf.relation_count = batch["relations"]
+            query_buf.labels.extend(labels)
+            query_buf.reltypes.extend(reltypes)
+            query_buf.send_buffer()
+    query_buf.wait_pool()
+
+
+################################################################################
+# Spool replay
+################################################################################
+# Command-line arguments
+@click.command()
+@click.argument("spool_dir")
+# Redis server connection settings
+@click.option(
+    "--redis-url", "-u", default="redis://127.0.0.1:6379", help="Redis connection url"
+)
+@click.option(
+    "--graph",
+    "-g",
+    default=None,
+    help="Name of the graph to create (default: the name the spool was written for)",
+)
+@click.option(
+    "--zero-copy",
+    "-z",
+    default=False,
+    is_flag=True,
+    help="send GRAPH.BULK queries with scatter/gather socket writes instead of redis-py's encoder",
+)
+@click.option(
+    "--timeline",
+    default=None,
+    help="write the submission time, size and latency of every query to this CSV file",
+)
+def bulk_replay(spool_dir, redis_url, graph, zero_copy, timeline):
+    if sys.version_info.major < 3 or sys.version_info.minor < 6:
+        raise Exception("Python >= 3.6 is required for the RedisGraph bulk loader.")
+
+    start_time = timer()
+
+    manifest = load_manifest(spool_dir)
+    graph = graph or manifest["graph"]
+
+    client = connect(redis_url, graph)
+    bulk_client = zero_copy_from_url(redis_url) if zero_copy else client
+    query_buf = QueryBuffer(graph, bulk_client, Config())
+
+    if manifest["batches"]:
+        with open(os.path.join(spool_dir, manifest["data"]), "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(data, "madvise"):
+            data.madvise(mmap.MADV_SEQUENTIAL)
+        replay_batches(query_buf, manifest, memoryview(data))
+
+    end_time = timer()
+    query_buf.report_completion(end_time - start_time)
+    if timeline:
+        query_buf.report.write_timeline(timeline)
+
+    create_indices(client, graph, manifest["index"], manifest["full_text_index"])
+
+
+if __name__ == "__main__":
+    bulk_replay()
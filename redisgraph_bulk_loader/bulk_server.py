@@ -0,0 +1,442 @@
+import asyncio
+import random
+import struct
+import sys
+import threading
+
+import click
+
+from .entity_file import Type
+
+COUNT = struct.Struct("=I")  # Property count of a label or relation type header
+LONG = struct.Struct("=q")
+DOUBLE = struct.Struct("=d")
+ENDPOINTS = struct.Struct("=QQ")  # Source and destination IDs prefixing each relation
+
+# RedisGraph module version reported by MODULE LIST
+MODULE_VERSION = 21000
+
+# Property type tags
+BOOL = Type.BOOL.value
+DOUBLE_TYPE = Type.DOUBLE.value
+STRING = Type.STRING.value
+LONG_TYPE = Type.LONG.value
+ARRAY = Type.ARRAY.value
+
+
+class BulkProtocolError(Exception):
+    """A GRAPH.BULK query that RedisGraph would reject, replied to as an error"""
+
+    pass
+
+
+def decode_string(token, offset):
+    """Decode a null-terminated string, returning it and the offset that follows it"""
+    end = token.find(b"\0", offset)
+    if end < 0:
+        raise BulkProtocolError(f"Unterminated string at offset {offset}")
+    return token[offset:end].decode(), end + 1
+
+
+def decode_value(token, offset):
+    """Decode a property value as encoded by EntityFile.pack_props, returning it and
+    the offset that follows it"""
+    try:
+        prop_type = token[offset]
+        offset += 1
+        if prop_type == 0:
+            return None, offset
+        if prop_type == BOOL:
+            return token[offset] != 0, offset + 1
+        if prop_type == DOUBLE_TYPE:
+            return DOUBLE.unpack_from(token, offset)[0], offset + DOUBLE.size
+        if prop_type == LONG_TYPE:
+            return LONG.unpack_from(token, offset)[0], offset + LONG.size
+        if prop_type == STRING:
+            return decode_string(token, offset)
+        if prop_type == ARRAY:
+            length = LONG.unpack_from(token, offset)[0]
+            offset += LONG.size
+            array = []
+            for _ in range(length):
+                elem, offset = decode_value(token, offset)
+                array.append(elem)
+            return array, offset
+    except (IndexError, struct.error):
+        raise BulkProtocolError(f"Truncated property value at offset {offset}")
+    raise BulkProtocolError(f"Invalid property type {prop_type} at offset {offset - 1}")
+
+
+class DecodedToken:
+    """The entities of a label or relation type token of a GRAPH.BULK query"""
+
+    def __init__(self, token, relations, keep_entities=False):
+        self.name, offset = decode_string(token, 0)
+        try:
+            prop_count = COUNT.unpack_from(token, offset)[0]
+        except struct.error:
+            raise BulkProtocolError(f"Token '{self.name}' has a truncated header")
+        offset += COUNT.size
+        self.keys = []
+        for _ in range(prop_count):
+            key, offset = decode_string(token, offset)
+            self.keys.append(key)
+
+        self.count = 0
+        # Decoded entities: property dicts for nodes, (src, dest, properties) for relations
+        self.entities = [] if keep_entities else None
+        self.max_endpoint = -1
+        if not relations and not self.keys:
+            # Nodes without properties are encoded as nothing, so their count is unknown.
+            if offset != len(token):
+                raise BulkProtocolError(
+                    f"Token '{self.name}' has data but no properties"
+                )
+            self.count = None
+            return
+        while offset < len(token):
+            if relations:
+                try:
+                    src, dest = ENDPOINTS.unpack_from(token, offset)
+                except struct.error:
+                    raise BulkProtocolError(
+                        f"Relation {self.count} of '{self.name}' has truncated endpoints"
+                    )
+                offset += ENDPOINTS.size
+                self.max_endpoint = max(self.max_endpoint, src, dest)
+            props = {}
+            for key in self.keys:
+                value, offset = decode_value(token, offset)
+                if value is not None:
+                    props[key] = value
+            if keep_entities:
+                self.entities.append((src, dest, props) if relations else props)
+            self.count += 1
+
+
+class GraphState:
+    """Counts of the entities created in a graph"""
+
+    def __init__(self):
+        self.node_count = 0
+        self.relation_count = 0
+        self.labels = {}  # Node count by label
+        self.reltypes = {}  # Relation count by type
+        # Decoded nodes as (label, properties) and relations as
+        # (type, src, dest, properties), if kept
+        self.nodes = []
+        self.relations = []
+
+
+def simple_string(value):
+    return b"+%s\r\n" % value
+
+
+def error(message):
+    return b"-ERR %s\r\n" % message.encode()
+
+
+# Queries answered by GRAPH.QUERY, and the GraphState count each returns
+COUNT_QUERIES = {
+    b"MATCH (n) RETURN count(n)": "node_count",
+    b"MATCH ()-[r]->() RETURN count(r)": "relation_count",
+}
+
+
+def integer(value):
+    return b":%d\r\n" % value
+
+
+def bulk_string(value):
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class BulkServer:
+    """A stand-in for a Redis server with the RedisGraph module, which implements the commands
+    the bulk loader sends: PING, EXISTS, MODULE LIST and GRAPH.BULK, the GRAPH.QUERY counts of a
+    graph's nodes and relations, as well as DEL and FLUSHALL.
+
+    GRAPH.BULK queries are decoded and validated as RedisGraph would, and the counts of the
+    entities they create are kept. Queries are processed one at a time, after an optional
+    latency, and selected or randomly chosen queries can be failed, so that the client side
+    of a load can be measured and tested without RedisGraph."""
+
+    def __init__(
+        self,
+        latency=0.0,
+        fail_at=(),
+        error_rate=0.0,
+        seed=None,
+        validate=True,
+        keep_entities=False,
+    ):
+        self.latency = latency  # Seconds spent on each GRAPH.BULK query
+        self.fail_at = set(fail_at)  # Numbers of the GRAPH.BULK queries to fail, from 1
+        self.error_rate = error_rate  # Fraction of GRAPH.BULK queries to fail
+        self.random = random.Random(seed)
+        # Without validation, tokens are not decoded and only the query's counts are used.
+        self.validate = validate
+        self.keep_entities = keep_entities
+        self.graphs = {}
+        self.calls = 0  # GRAPH.BULK queries received
+        self.failures = 0  # GRAPH.BULK queries failed by injection
+
+    def execute(self, args):
+        """Execute a command given as a list of bytes arguments, returning its RESP reply"""
+        command = args[0].upper()
+        if command == b"PING":
+            return simple_string(b"PONG")
+        if command == b"EXISTS":
+            return integer(sum(key in self.graphs for key in args[1:]))
+        if command == b"MODULE" and len(args) == 2 and args[1].upper() == b"LIST":
+            module = b"*4\r\n%s%s%s%s" % (
+                bulk_string(b"name"),
+                bulk_string(b"graph"),
+                bulk_string(b"ver"),
+                integer(MODULE_VERSION),
+            )
+            return b"*1\r\n" + module
+        if command == b"DEL":
+            return integer(
+                sum(self.graphs.pop(key, None) is not None for key in args[1:])
+            )
+        if command == b"FLUSHALL":
+            self.graphs.clear()
+            return simple_string(b"OK")
+        if command == b"GRAPH.QUERY":
+            if len(args) != 3 or args[2] not in COUNT_QUERIES:
+                return error(
+                    "only the node and relation counts of a graph are supported"
+                )
+            graph = self.graphs.get(args[1]) or GraphState()
+            count = getattr(graph, COUNT_QUERIES[args[2]])
+            column = args[2].split(b"RETURN ")[1]
+            # The header, the single row of results and the query statistics
+            return b"*3\r\n*1\r\n%s*1\r\n*1\r\n%s*1\r\n%s" % (
+                bulk_string(column),
+                integer(count),
+                bulk_string(b"Cached execution: 0"),
+            )
+        if command == b"GRAPH.BULK":
+            if len(args) < 2:
+                return error("wrong number of arguments for 'GRAPH.BULK' command")
+            self.calls += 1
+            if self.calls in self.fail_at or (
+                self.error_rate and self.random.random() < self.error_rate
+            ):
+                self.failures += 1
+                return error(f"Injected failure of query {self.calls}")
+            try:
+                nodes, relations = self.bulk(args[1], args[2:])
+            except BulkProtocolError as e:
+                return error(str(e))
+            return bulk_string(
+                b"%d nodes created, %d relations created" % (nodes, relations)
+            )
+        return error(f"unknown command '{args[0].decode(errors='replace')}'")
+
+    def bulk(self, graphname, args):
+        """Validate and apply a GRAPH.BULK query, returning the counts of created entities"""
+        begin = len(args) > 0 and args[0] == b"BEGIN"
+        if begin:
+            args = args[1:]
+            if graphname in self.graphs:
+                raise BulkProtocolError("Graph name already in use as a Redis key.")
+        elif graphname not in self.graphs:
+            raise BulkProtocolError(
+                "Bulk query without BEGIN for a graph that does not exist."
+            )
+        try:
+            node_count, relation_count, label_count, reltype_count = map(int, args[:4])
+        except ValueError:
+            raise BulkProtocolError("Bulk query counts should be 4 integers.")
+        tokens = args[4:]
+        if len(tokens) != label_count + reltype_count:
+            raise BulkProtocolError(
+                f"Bulk query declared {label_count + reltype_count} tokens, found {len(tokens)}."
+            )
+        graph = self.graphs.get(graphname) or GraphState()
+
+        if self.validate:
+            labels = [
+                DecodedToken(token, False, self.keep_entities)
+                for token in tokens[:label_count]
+            ]
+            reltypes = [
+                DecodedToken(token, True, self.keep_entities)
+                for token in tokens[label_count:]
+            ]
+            decoded_nodes = sum(label.count or 0 for label in labels)
+            # The nodes of labels without properties are those the other labels don't account for.
+            # As RedisGraph can't tell them apart either, they are attributed to the first such label.
+            unknown = [label for label in labels if label.count is None]
+            if decoded_nodes > node_count or (
+                not unknown and decoded_nodes != node_count
+            ):
+                raise BulkProtocolError(
+                    f"Bulk query declared {node_count} nodes, found {decoded_nodes}."
+                )
+            for idx, label in enumerate(unknown):
+                label.count = node_count - decoded_nodes if idx == 0 else 0
+                if self.keep_entities:
+                    label.entities = [{} for _ in range(label.count)]
+            decoded_relations = sum(reltype.count for reltype in reltypes)
+            if decoded_relations != relation_count:
+                raise BulkProtocolError(
+                    f"Bulk query declared {relation_count} relations, found {decoded_relations}."
+                )
+            # Nodes are created before the relations of the same query.
+            top_node_id = graph.node_count + node_count
+            for reltype in reltypes:
+                if reltype.max_endpoint >= top_node_id:
+                    raise BulkProtocolError(
+                        f"Relation of type '{reltype.name}' refers to node {reltype.max_endpoint}, which does not exist."
+                    )
+            for label in labels:
+                graph.labels[label.name] = graph.labels.get(label.name, 0) + label.count
+                if self.keep_entities:
+                    graph.nodes.extend((label.name, props) for props in label.entities)
+            for reltype in reltypes:
+                graph.reltypes[reltype.name] = (
+                    graph.reltypes.get(reltype.name, 0) + reltype.count
+                )
+                if self.keep_entities:
+                    graph.relations.extend(
+                        (reltype.name,) + relation for relation in reltype.entities
+                    )
+
+        graph.node_count += node_count
+        graph.relation_count += relation_count
+        self.graphs[graphname] = graph
+        return node_count, relation_count
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                args = await read_command(reader)
+                if args is None:
+                    break
+                if not args:
+                    continue
+                if self.latency and args[0].upper() == b"GRAPH.BULK":
+                    # Like Redis, process one query at a time.
+                    async with self.lock:
+                        await asyncio.sleep(self.latency)
+                        reply = self.execute(args)
+                else:
+                    reply = self.execute(args)
+                writer.write(reply)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=6379):
+        """Start listening, returning the asyncio server"""
+        self.lock = asyncio.Lock()
+        return await asyncio.start_server(self.handle, host, port)
+
+    def start_thread(self, host="127.0.0.1", port=0):
+        """Serve from an event loop on a daemon thread, returning the server's URL.
+        A port of 0 listens on any free port."""
+        loop = asyncio.new_event_loop()
+        server = loop.run_until_complete(self.start(host, port))
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        port = server.sockets[0].getsockname()[1]
+        return f"redis://{host}:{port}"
+
+
+async def read_command(reader):
+    """Read a RESP array of bulk strings, or an inline command, from the stream.
+    Returns None once the client disconnects."""
+    line = await reader.readline()
+    if not line:
+        return None
+    if line[:1] != b"*":
+        return line.split()
+    args = []
+    for _ in range(int(line[1:])):
+        header = await reader.readline()
+        if header[:1] != b"$":
+            raise ConnectionError("Expected a bulk string")
+        length = int(header[1:])
+        data = await reader.readexactly(length + 2)
+        args.append(data[:length])
+    return args
+
+
+async def serve(server, host, port):
+    listener = await server.start(host, port)
+    async with listener:
+        await listener.serve_forever()
+
+
+def report_graphs(server):
+    for name, graph in server.graphs.items():
+        print(
+            "Graph '%s': %d nodes created, %d relations created"
+            % (name.decode(), graph.node_count, graph.relation_count)
+        )
+        for label, count in graph.labels.items():
+            print("  %d nodes with label '%s'" % (count, label))
+        for reltype, count in graph.reltypes.items():
+            print("  %d relations of type '%s'" % (count, reltype))
+    print(
+        "%d GRAPH.BULK queries received, %d failed by injection"
+        % (server.calls, server.failures)
+    )
+
+
+################################################################################
+# Stand-in server
+################################################################################
+# Command-line arguments
+@click.command()
+@click.option("--host", "-h", default="127.0.0.1", help="Address to listen on")
+@click.option("--port", "-p", default=6379, help="Port to listen on (default 6379)")
+@click.option(
+    "--latency",
+    "-l",
+    default=0,
+    help="milliseconds to spend on each GRAPH.BULK query, which are processed one at a time (default 0)",
+)
+@click.option(
+    "--fail-at",
+    "-F",
+    multiple=True,
+    type=int,
+    help="number of a GRAPH.BULK query to reply to with an error, counting from 1",
+)
+@click.option(
+    "--error-rate",
+    "-E",
+    default=0.0,
+    help="fraction of GRAPH.BULK queries to reply to with an error (default 0)",
+)
+@click.option(
+    "--seed", default=None, type=int, help="seed of the random error injection"
+)
+@click.option(
+    "--no-validate",
+    default=False,
+    is_flag=True,
+    help="trust the counts of GRAPH.BULK queries instead of decoding their tokens",
+)
+def bulk_server(host, port, latency, fail_at, error_rate, seed, no_validate):
+    if sys.version_info.major < 3 or sys.version_info.minor < 7:
+        raise Exception("Python >= 3.7 is required for the stand-in server.")
+
+    server = BulkServer(
+        latency / 1000, fail_at, error_rate, seed, validate=not no_validate
+    )
+    print(f"Serving GRAPH.BULK queries on {host}:{port}")
+    try:
+        asyncio.run(serve(server, host, port))
+    except KeyboardInterrupt:
+        pass
+    report_graphs(server)
+
+
+if __name__ == "__main__":
+    bulk_server()
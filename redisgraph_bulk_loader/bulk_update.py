@@ -5,6 +5,8 @@ from timeit import default_timer as timer
 import click
 import redis
 
+from .profiler import ColumnProfile, LoadProfiler
+
 
 def utf8len(s):
     return len(s.encode("utf-8"))
@@ -41,6 +43,10 @@ class BulkUpdate:
         self.graph_name = graph_name
         self.graph = client.graph(graph_name)
         self.statistics = {}
+        # Optional LoadProfiler, which also times the formatting of each column
+        self.profiler = None
+        self.columns = None
+        self.column_encoders = None
 
     def update_statistics(self, result):
         for key, new_val in result.statistics.items():
@@ -73,6 +79,37 @@ class BulkUpdate:
                 cell = "".join(['"', cell, '"'])
         return cell
 
+    def format_row(self, row):
+        """Return the Cypher list literal of a row"""
+        row = ",".join([self.quote_string(cell) for cell in row])
+        return "".join(["[", row.strip(), "]"])
+
+    def format_profiled_row(self, row):
+        """Return the Cypher list literal of a row, timing the formatting of each column"""
+        if len(row) != len(self.column_encoders):
+            # Rows of an unexpected width are not attributed to columns.
+            return self.format_row(row)
+        # Cypher literals are sent as UTF-8, so their sizes are counted in encoded bytes.
+        row = ",".join(self.columns.encode(row, self.column_encoders, utf8len))
+        return "".join(["[", row.strip(), "]"])
+
+    def column_names(self):
+        """Return the names of the columns, or their positions if the file has no header"""
+        with open(self.filename, "rt") as f:
+            first = next(self.csv_reader(f), [])
+        if self.no_header:
+            return [f"column {idx}" for idx in range(len(first))]
+        return [name.strip() for name in first]
+
+    def csv_reader(self, f):
+        return csv.reader(
+            f,
+            delimiter=self.separator,
+            skipinitialspace=True,
+            quoting=csv.QUOTE_NONE,
+            escapechar="\\",
+        )
+
     # Raise an exception if the query triggers a compile-time error
     def validate_query(self):
         command = " ".join(["CYPHER rows=[]", self.query])
@@ -80,19 +117,24 @@ class BulkUpdate:
         self.graph.execution_plan(command)
 
     def process_update_csv(self):
+        if self.profiler is None:
+            self.process_rows(self.format_row)
+            return
+        self.columns = ColumnProfile(self.column_names())
+        self.column_encoders = [
+            (idx, self.quote_string) for idx in range(len(self.columns.names))
+        ]
+        with self.profiler.profile(self.filename, self.columns):
+            self.process_rows(self.format_profiled_row)
+
+    def process_rows(self, format_row):
         entity_count = count_entities(self.filename)
 
         with open(self.filename, "rt") as f:
             if self.no_header is False:
                 next(f)  # skip header
 
-            reader = csv.reader(
-                f,
-                delimiter=self.separator,
-                skipinitialspace=True,
-                quoting=csv.QUOTE_NONE,
-                escapechar="\\",
-            )
+            reader = self.csv_reader(f)
 
             rows_strs = []
             with click.progressbar(
@@ -100,8 +142,7 @@ class BulkUpdate:
             ) as reader:
                 for row in reader:
                     # Prepare the string representation of the current row.
-                    row = ",".join([self.quote_string(cell) for cell in row])
-                    next_line = "".join(["[", row.strip(), "]"])
+                    next_line = format_row(row)
 
                     # Emit buffer now if the max token size would be exceeded by this addition.
                     added_size = (
@@ -159,6 +200,11 @@ class BulkUpdate:
     default=500,
     help="Max size of each token in megabytes (default 500, max 512)",
 )
+@click.option(
+    "--profile",
+    default=None,
+    help="profile the update with cProfile, writing its stats and the formatting time of each column to this directory",
+)
 def bulk_update(
     graph,
     redis_url,
@@ -168,6 +214,7 @@ def bulk_update(
     separator,
     no_header,
     max_token_size,
+    profile,
 ):
     if sys.version_info[0] < 3:
         raise Exception("Python 3 is required for the RedisGraph bulk updater.")
@@ -203,7 +250,11 @@ def bulk_update(
         updater.validate_query()
         client.execute_command("GRAPH.DELETE", graph)
 
+    if profile:
+        updater.profiler = LoadProfiler(profile)
     updater.process_update_csv()
+    if profile:
+        print(f"Column profiles written to '{updater.profiler.write_columns()}'")
 
     end_time = timer()
 
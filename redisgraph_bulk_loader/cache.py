@@ -0,0 +1,180 @@
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+from array import array
+
+CACHE_VERSION = 2
+ENDPOINTS = struct.Struct("=QQ")  # Source and destination IDs prefixing each relation
+
+
+def file_digest(filename):
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CacheEntry:
+    """The encoded entities of an input file, as stored by a previous load"""
+
+    def __init__(self, rows, offsets, identifiers, segments):
+        self.rows = rows  # Concatenated binary encoding of every entity, memory-mapped
+        self.offsets = offsets  # End offset of each entity in rows
+        self.identifiers = identifiers  # Label files only: the identifier of each node
+        # Relation files only: (key, first ID, node count) of every label file
+        # processed before this file was encoded.
+        self.segments = segments
+
+    def entities(self):
+        start = 0
+        for end in self.offsets:
+            yield self.rows[start:end]
+            start = end
+
+    def rebase(self, segments):
+        """Return an iterator over the entity rows of a relation file with their endpoint IDs
+        translated to the IDs assigned in this load, or None if an endpoint's label file
+        changed."""
+        current = {}
+        for key, base, _ in segments:
+            # A file loaded twice cannot be told apart, so it can't be rebased onto,
+            # and neither can a file that was not cached.
+            current[key] = None if key in current or key is None else base
+        bases = [base for _, base, _ in self.segments]
+        deltas = [
+            None if current.get(key) is None else current[key] - base
+            for key, base, _ in self.segments
+        ]
+        if all(delta == 0 for delta in deltas):
+            return self.entities()
+
+        # Every endpoint is checked before any entity is used, so that a changed label
+        # file is detected before the entry is partially loaded.
+        start = 0
+        for end in self.offsets:
+            src, dest = ENDPOINTS.unpack_from(self.rows, start)
+            src_delta = deltas[bisect.bisect_right(bases, src) - 1]
+            dest_delta = deltas[bisect.bisect_right(bases, dest) - 1]
+            if src_delta is None or dest_delta is None:
+                return None
+            start = end
+        return self.rebased_entities(bases, deltas)
+
+    def rebased_entities(self, bases, deltas):
+        start = 0
+        for end in self.offsets:
+            src, dest = ENDPOINTS.unpack_from(self.rows, start)
+            src += deltas[bisect.bisect_right(bases, src) - 1]
+            dest += deltas[bisect.bisect_right(bases, dest) - 1]
+            props = start + ENDPOINTS.size
+            yield ENDPOINTS.pack(src, dest) + self.rows[props:end]
+            start = end
+
+
+class CacheWriter:
+    """Records the encoded entities of an input file as they are produced"""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = open(path + ".rows.tmp", "wb")
+        self.size = 0
+        self.offsets = array("Q")
+        self.identifiers = []
+
+    def add(self, row_binary):
+        self.rows.write(row_binary)
+        self.size += len(row_binary)
+        self.offsets.append(self.size)
+
+    def commit(self, segments=None):
+        self.rows.close()
+        try:
+            with open(self.path + ".offsets.tmp", "wb") as f:
+                f.write(self.offsets.tobytes())
+            # Metadata is stored as JSON, as entries may be shared by other users.
+            with open(self.path + ".meta.tmp", "w") as f:
+                json.dump({"identifiers": self.identifiers, "segments": segments}, f)
+            # The metadata file is moved into place last, so that it marks a complete entry.
+            os.replace(self.path + ".rows.tmp", self.path + ".rows")
+            os.replace(self.path + ".offsets.tmp", self.path + ".offsets")
+            os.replace(self.path + ".meta.tmp", self.path + ".meta")
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self):
+        """Discard the entry, such as when its input file couldn't be processed"""
+        self.rows.close()
+        for suffix in (".rows.tmp", ".offsets.tmp", ".meta.tmp"):
+            try:
+                os.unlink(self.path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+class EncodingCache:
+    """Stores the encoded entities of each input file, keyed by a fingerprint of the
+    file, its header and the options that affect encoding, so that unchanged files
+    don't need to be encoded again by later loads."""
+
+    def __init__(self, directory, config, content_hash=False):
+        self.directory = directory
+        self.config = config
+        # If set, files are identified by a hash of their contents rather than their path.
+        self.content_hash = content_hash
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, entity):
+        stat = os.stat(entity.filename)
+        fingerprint = [stat.st_size, stat.st_mtime_ns]
+        if self.content_hash:
+            fingerprint.append(file_digest(entity.filename))
+        else:
+            fingerprint.append(os.path.abspath(entity.filename))
+        config = self.config
+        options = [
+            config.enforce_schema,
+            config.id_type,
+            config.separator,
+            config.quoting,
+            config.escapechar,
+            config.store_node_identifiers,
+            config.skip_invalid_nodes,
+            config.skip_invalid_edges,
+        ]
+        description = [
+            CACHE_VERSION,
+            type(entity).__name__,
+            entity.entity_str,
+            entity.header,
+            fingerprint,
+            options,
+        ]
+        return hashlib.sha256(json.dumps(description).encode()).hexdigest()
+
+    def load(self, key):
+        path = os.path.join(self.directory, key)
+        offsets = array("Q")
+        try:
+            with open(path + ".meta") as f:
+                meta = json.load(f)
+            with open(path + ".offsets", "rb") as f:
+                offsets.frombytes(f.read())
+            with open(path + ".rows", "rb") as f:
+                # Entities are paged in from the file as they are added to queries rather
+                # than read into memory at once, which would ignore the memory budget.
+                # Empty files can't be mapped.
+                size = os.fstat(f.fileno()).st_size
+                rows = (
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+                )
+        except FileNotFoundError:
+            return None
+        return CacheEntry(rows, offsets, meta["identifiers"], meta["segments"])
+
+    def writer(self, key):
+        return CacheWriter(os.path.join(self.directory, key))
@@ -0,0 +1,173 @@
+import json
+import os
+
+CHECKPOINT_VERSION = 2
+
+
+def describe_inputs(entities):
+    """Identify input files, so that a load is only resumed with the same inputs"""
+    description = []
+    for entity in entities:
+        stat = os.stat(entity.filename)
+        description.append(
+            [
+                type(entity).__name__,
+                entity.entity_str,
+                os.path.abspath(entity.filename),
+                stat.st_size,
+                stat.st_mtime_ns,
+            ]
+        )
+    return description
+
+
+class Checkpoint:
+    """Journal of the batches sent to Redis, from which an interrupted load can resume.
+
+    The journal is a JSON Lines file. Its first line describes the load, and every following
+    line records a batch, once when it is sent and again once Redis has acknowledged it: the
+    position of its last entity (the index of the input file in processing order, and the
+    number of entities of that file sent, or null if the whole file was sent), the next node
+    ID and the cumulative counts of nodes and relations the graph holds once it is applied.
+
+    Batches that were sent but never acknowledged may or may not have been applied, so a load
+    is resumed from the batch whose counts match those of the graph."""
+
+    def __init__(self, path, graphname, inputs, resume=False):
+        self.path = path
+        description = {
+            "version": CHECKPOINT_VERSION,
+            "graph": graphname,
+            "inputs": inputs,
+        }
+        # Position and totals of the batch the load resumes from
+        self.batch = 0
+        self.entity = -1
+        self.rows = None
+        self.top_node_id = 0
+        self.nodes_created = 0
+        self.relations_created = 0
+        self.resuming = resume
+        # Cumulative counts of the batches sent, including the one being sent
+        self.nodes_sent = 0
+        self.relations_sent = 0
+        self.records = []  # Records of the interrupted load
+
+        if resume:
+            self.load(description)
+            self.journal = open(path, "a")
+        else:
+            self.journal = open(path, "w")
+            self.write(description)
+
+    def load(self, description):
+        with open(self.path) as f:
+            lines = f.read().splitlines()
+        if not lines or json.loads(lines[0]) != description:
+            raise Exception(
+                f"Checkpoint '{self.path}' was not written by a load of the same graph and input files."
+            )
+        # A partially-written last line belongs to a batch that was never recorded.
+        for line in lines[1:]:
+            try:
+                self.records.append(json.loads(line))
+            except ValueError:
+                break
+        acknowledged = [record for record in self.records if record["acknowledged"]]
+        if acknowledged:
+            self.restore(acknowledged[-1])
+
+    def restore(self, record):
+        self.batch = record["batch"]
+        self.entity = record["entity"]
+        self.rows = record["rows"]
+        self.top_node_id = record["top_node_id"]
+        self.nodes_created = self.nodes_sent = record["nodes_created"]
+        self.relations_created = self.relations_sent = record["relations_created"]
+
+    def reconcile(self, node_count, relation_count):
+        """Resume from the batch after which the graph holds node_count nodes and
+        relation_count relations. Batches sent after the last acknowledged one may have
+        been applied even though their replies were lost."""
+        if (node_count, relation_count) == (self.nodes_created, self.relations_created):
+            return
+        for record in self.records[::-1]:
+            if record["batch"] < self.batch:
+                break
+            if (record["nodes_created"], record["relations_created"]) == (
+                node_count,
+                relation_count,
+            ):
+                print(
+                    f"Batch {record['batch']} was applied but not acknowledged; resuming after it."
+                )
+                self.restore(record)
+                return
+        raise Exception(
+            "Graph holds %d nodes and %d relations, which matches no batch of checkpoint '%s' "
+            "(%d nodes and %d relations were acknowledged); the load can't be resumed."
+            % (
+                node_count,
+                relation_count,
+                self.path,
+                self.nodes_created,
+                self.relations_created,
+            )
+        )
+
+    def write(self, record):
+        self.journal.write(json.dumps(record) + "\n")
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+
+    def sent(self, query_buffer):
+        """Journal the batch in the query buffer before it is sent"""
+        self.nodes_sent += query_buffer.node_count
+        self.relations_sent += query_buffer.relation_count
+        entity, rows = query_buffer.position
+        self.write(
+            {
+                "batch": self.batch + len(query_buffer.tasks) + 1,
+                "acknowledged": False,
+                "entity": entity,
+                "file": query_buffer.filename,
+                "rows": rows,
+                "top_node_id": query_buffer.top_node_id,
+                "nodes_created": self.nodes_sent,
+                "relations_created": self.relations_sent,
+            }
+        )
+
+    def record(self, batch, query_buffer):
+        """Journal a batch once Redis has acknowledged it"""
+        self.batch += 1
+        entity, rows = batch.position
+        self.write(
+            {
+                "batch": self.batch,
+                "acknowledged": True,
+                "entity": entity,
+                "file": batch.filename,
+                "rows": rows,
+                "top_node_id": batch.top_node_id,
+                "nodes_created": query_buffer.nodes_created,
+                "relations_created": query_buffer.relations_created,
+            }
+        )
+
+    def completed(self, index):
+        """Return True if the input file at this processing index was entirely sent by
+        the interrupted load."""
+        return self.resuming and (
+            index < self.entity or (index == self.entity and self.rows is None)
+        )
+
+    def sent_rows(self, index):
+        """Return the number of entities of the input file at this processing index that
+        were sent by the interrupted load."""
+        if self.resuming and index == self.entity:
+            return self.rows
+        return 0
+
+    def close(self):
+        self.journal.close()
@@ -0,0 +1,94 @@
+import bz2
+import gzip
+import io
+import lzma
+import queue
+import threading
+
+# Openers of the compressed input formats, by file extension
+COMPRESSION_EXTENSIONS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+    ".lzma": lzma.open,
+}
+CHUNK_SIZE = 1 << 20  # Decompressed bytes produced at a time
+QUEUE_DEPTH = 8  # Decompressed chunks held ahead of the reader
+
+
+class DecompressingStream(io.RawIOBase):
+    """A readable binary stream of a compressed file's contents.
+
+    The file is decompressed on a separate thread, ahead of the reader, so that
+    decompression overlaps with encoding. The codecs release the GIL while they run."""
+
+    def __init__(self, filename, opener):
+        super().__init__()
+        self.raw = open(filename, "rb")
+        self.opener = opener
+        self.position = 0  # Number of compressed bytes consumed
+        # Decompressed bytes produced along with the compressed bytes they came from,
+        # and decompressed bytes returned to the reader
+        self.progress = (0, 0)
+        self.consumed = 0
+        self.chunks = queue.Queue(QUEUE_DEPTH)
+        self.pending = memoryview(b"")
+        self.eof = False
+        self.stopping = False
+        self.thread = threading.Thread(target=self.decompress, daemon=True)
+        self.thread.start()
+
+    def decompress(self):
+        try:
+            with self.opener(self.raw, "rb") as stream:
+                decompressed = 0
+                while not self.stopping:
+                    chunk = stream.read(CHUNK_SIZE)
+                    self.position = self.raw.tell()
+                    decompressed += len(chunk)
+                    self.progress = (decompressed, self.position)
+                    self.chunks.put(chunk)
+                    if not chunk:
+                        return
+        except Exception as e:
+            # Errors are raised to the reader.
+            self.chunks.put(e)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if not self.pending:
+            if self.eof:
+                return 0
+            chunk = self.chunks.get()
+            if isinstance(chunk, Exception):
+                raise chunk
+            if not chunk:
+                self.eof = True
+                return 0
+            self.pending = memoryview(chunk)
+        size = min(len(b), len(self.pending))
+        b[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        self.consumed += size
+        return size
+
+    def close(self):
+        if self.closed:
+            return
+        # Unblock the decompression thread if it is waiting for the reader.
+        self.stopping = True
+        while self.thread.is_alive():
+            try:
+                self.chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        self.raw.close()
+        super().close()
+
+
+def open_compressed(filename, extension):
+    """Open a compressed file for reading as text"""
+    stream = DecompressingStream(filename, COMPRESSION_EXTENSIONS[extension])
+    return io.TextIOWrapper(io.BufferedReader(stream, CHUNK_SIZE))
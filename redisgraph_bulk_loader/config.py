@@ -15,6 +15,8 @@ class Config:
         quoting=3,
         store_node_identifiers=False,
         escapechar="\\",
+        memory_budget=0,
+        target_latency=0,
     ):
         """Settings for this run of the bulk loader"""
         # Maximum number of tokens per query
@@ -45,3 +47,12 @@ class Config:
 
         # True if we are building relations as well as nodes
         self.store_node_identifiers = store_node_identifiers
+
+        # Maximum size in bytes of all encoded data held by the loader at once,
+        # including batches that have been sent but not yet acknowledged.
+        # 0 disables the limit.
+        self.memory_budget = memory_budget * 1_000_000
+
+        # Target server time in seconds for each query when adapting buffer sizes.
+        # 0 keeps the buffer sizes fixed.
+        self.target_latency = target_latency / 1000
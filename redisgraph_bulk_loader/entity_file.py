@@ -1,16 +1,38 @@
 import ast
+import contextlib
 import csv
+import functools
 import io
 import math
 import os
+import stat
 import struct
 import sys
 from enum import Enum
+from timeit import default_timer as timer
 
+import click
+
+from .compressed_input import COMPRESSION_EXTENSIONS, open_compressed
 from .exceptions import CSVError, SchemaError
 
 csv.field_size_limit(sys.maxsize)  # Don't limit the size of user input fields.
 
+STDIN = "-"  # Input file name of the standard input stream
+STREAM_PROGRESS_INTERVAL = 1  # Seconds between progress updates of streams
+
+# Input formats other than CSV, by file extension
+INPUT_FORMATS = {
+    ".parquet": "arrow",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+    ".jsonl": "json",
+    ".ndjson": "json",
+    ".npy": "edges",
+    ".bin": "edges",
+}
+
 
 class Type(Enum):
     UNKNOWN = 0
@@ -176,46 +198,313 @@ def inferred_prop_to_binary(prop_val):
     return struct.pack(format_str, Type.STRING.value, encoded_str)
 
 
+# Encoders of the values of typed inputs, which are decoded to Python values of a known type
+# rather than parsed from strings. None indicates a NULL property.
+NULL = struct.pack("=B", 0)
+LONG = struct.Struct("=Bq")
+DOUBLE = struct.Struct("=Bd")
+BOOL = struct.Struct("=B?")
+
+
+def encode_long(value):
+    if value is None:
+        return NULL
+    try:
+        return LONG.pack(Type.LONG.value, value)
+    except struct.error:
+        raise SchemaError(f"Could not encode '{value}' as a long")
+
+
+def encode_double(value):
+    if value is None:
+        return NULL
+    if math.isnan(value) or math.isinf(value):
+        # Non-finite values are rejected, as they are in CSV files.
+        raise SchemaError(f"Could not encode '{value}' as a double")
+    return DOUBLE.pack(Type.DOUBLE.value, value)
+
+
+def encode_bool(value):
+    if value is None:
+        return NULL
+    return BOOL.pack(Type.BOOL.value, value)
+
+
+def encode_string(value):
+    if value is None:
+        return NULL
+    encoded_str = value.encode()
+    # Encoding len+1 adds a null terminator to the string
+    return struct.pack("=B%ds" % (len(encoded_str) + 1), Type.STRING.value, encoded_str)
+
+
+def array_encoder(encode_element):
+    """Return an encoder of arrays whose elements are encoded by encode_element"""
+
+    def encode_array(value):
+        if value is None:
+            return NULL
+        return LONG.pack(Type.ARRAY.value, len(value)) + b"".join(
+            [encode_element(elem) for elem in value]
+        )
+
+    return encode_array
+
+
+# Property types that typed_prop_to_binary encodes as values of another type
+ENCODED_TYPES = {Type.ID_STRING: Type.STRING, Type.ID_INTEGER: Type.LONG}
+
+
+def declared_encoder(prop_type):
+    """Return an encoder of typed input values whose header declares prop_type,
+    which encodes them as the same values of a CSV file would be"""
+
+    def encode_declared(value):
+        if value is None:
+            return NULL
+        return typed_prop_to_binary(str(value), prop_type)
+
+    return encode_declared
+
+
+# Attributes derived from the header of a label or relation type, which are shared by
+# every partition of it described in a schema file
+SCHEMA_ATTRIBUTES = (
+    "header",
+    "column_count",
+    "column_names",
+    "types",
+    "prop_count",
+    "packed_header",
+    "id",
+    "id_namespace",
+    "start_id",
+    "end_id",
+    "start_namespace",
+    "end_namespace",
+)
+
+
 class EntityFile(object):
     """Superclass for Label and RelationType classes"""
 
-    def __init__(self, filename, label, config):
+    def __init__(self, filename, label, config, header=None, template=None):
         # The configurations for this run.
         self.config = config
 
+        # Compressed files are decompressed as they are read, based on their extension.
+        base, extension = os.path.splitext(filename)
+        self.compression = extension.lower()
+        if self.compression in COMPRESSION_EXTENSIONS:
+            extension = os.path.splitext(base)[1]
+        else:
+            self.compression = None
+            base = filename
+
+        # Standard input ("-") and named pipes can only be read once, as they are produced.
+        self.streaming = filename == STDIN or stat.S_ISFIFO(os.stat(filename).st_mode)
+
         # The label or relation type string is the basename of the file
         if label:
             self.entity_str = label
+        elif filename == STDIN:
+            raise CSVError(
+                "Reading from standard input requires an explicit label or relation type."
+            )
         else:
-            self.entity_str = os.path.splitext(os.path.basename(filename))[0]
+            self.entity_str = os.path.splitext(os.path.basename(base))[0]
         # Input file handling
-        self.infile = io.open(filename, "rt")
+        # The file is only held open while its header is parsed and, later, while its
+        # entities are processed, so that large numbers of input files don't exhaust
+        # file descriptors.
+        self.filename = filename
+        self.file_size = 0 if self.streaming else os.path.getsize(filename)
+        self.infile = None
+        self.reader = None
+        self._entities_count = None
+        # Parquet, Arrow IPC and binary edge list files are memory-mapped, and can't be compressed.
+        self.input_format = INPUT_FORMATS.get(extension.lower(), "csv")
+        if self.input_format in ("arrow", "edges") and self.compression:
+            self.input_format = "csv"
+        if self.input_format in ("arrow", "edges") and self.streaming:
+            raise CSVError(
+                f"{filename}: Parquet, Arrow and binary edge list files can't be streamed."
+            )
+        # Typed inputs only: (column index, value encoder) of every property column
+        self.encoders = None
+        self.header_rows = 1  # Number of lines holding the header
+
+        self.packed_header = b""
+        self.binary_entities = []
+        self.binary_size = 0  # size of binary token
+        self.binary_count = 0  # Number of entities in binary_entities
+        self.entities_sent = 0  # Number of entities flushed to the query buffer
+
+        # Files described by a schema file have no header row. Their header is given
+        # instead, or the schema is shared with a template file of the same label.
+        self.headerless = header is not None or template is not None
+        if self.headerless:
+            if self.input_format != "csv":
+                raise CSVError(
+                    f"{filename}: Only CSV files can be described by a schema file."
+                )
+            self.header_rows = 0
+            if template is not None:
+                self.copy_schema(template)
+            else:
+                self.convert_header(header)
+            if self.streaming:
+                self.infile, self.reader = self.open_input()
+            return
+
+        infile, self.reader = self.open_input()
+        try:
+            self.convert_header()  # Extract data from header row.
+            if self.input_format != "csv":
+                # Values of typed inputs are encoded according to their own type.
+                # Types declared in the header are honoured when the schema is enforced.
+                encoders = self.reader.encoders(
+                    self.types if self.config.enforce_schema else None
+                )
+                self.encoders = [
+                    (idx, encoders[idx])
+                    for idx in range(self.column_count)
+                    if self.column_names[idx]
+                ]
+                self.header_rows = self.reader.header_rows
+            if self.input_format in ("arrow", "edges"):
+                # The row count is read from the file's metadata.
+                self._entities_count = infile.num_rows
+        except BaseException:
+            infile.close()
+            raise
+        if self.streaming:
+            # Streams stay open, positioned after the header row.
+            self.infile = infile
+        else:
+            infile.close()
+            self.reader = None
 
+    def csv_reader(self, infile):
         # Initialize CSV reader that ignores leading whitespace in each field
         # and does not modify input quote characters
-        self.reader = csv.reader(
-            self.infile,
-            delimiter=config.separator,
+        return csv.reader(
+            infile,
+            delimiter=self.config.separator,
             skipinitialspace=True,
-            quoting=config.quoting,
-            escapechar=config.escapechar,
+            quoting=self.config.quoting,
+            escapechar=self.config.escapechar,
         )
 
-        self.packed_header = b""
-        self.binary_entities = []
-        self.binary_size = 0  # size of binary token
+    def open_input(self):
+        """Open the input file, returning it along with a reader that yields the header
+        row followed by the fields of each entity"""
+        # Typed input modules are imported here, as they depend on this module.
+        if self.input_format == "arrow":
+            from .arrow_input import ArrowFile
+
+            infile = ArrowFile(self.filename)
+            return infile, infile.reader(self.config.enforce_schema)
+        if self.input_format == "edges":
+            from .binary_input import EdgeFile
+
+            infile = EdgeFile(self.filename)
+            return infile, infile.reader()
+        if self.filename == STDIN:
+            infile = io.open(sys.stdin.fileno(), "rt", closefd=False)
+        elif self.compression:
+            infile = open_compressed(self.filename, self.compression)
+        else:
+            infile = io.open(self.filename, "rt")
+        if self.input_format == "json":
+            from .json_input import JsonLinesReader
 
-        self.convert_header()  # Extract data from header row.
-        self.count_entities()  # Count number of entities/row in file.
-        next(self.reader)  # Skip the header row.
+            return infile, JsonLinesReader(
+                infile, self.filename, self.config.enforce_schema
+            )
+        return infile, self.csv_reader(infile)
+
+    def open(self):
+        """Open the input file and position the reader after the header row"""
+        if self.infile is not None:
+            return
+        self.infile, self.reader = self.open_input()
+        if not self.headerless:
+            next(self.reader)  # Skip the header row.
+
+    def close(self):
+        self.infile.close()
+        self.infile = None
+
+    def prefetch(self):
+        """Count the file's rows and open it ahead of processing"""
+        self.count_entities()
+        self.open()
+
+    @property
+    def entities_count(self):
+        # Rows are only counted once the count is needed.
+        if self._entities_count is None:
+            self.count_entities()
+        return self._entities_count
 
     # Count number of rows in file.
+    # Compressed files are not counted, as that would require decompressing them twice,
+    # and neither are streams, which can only be read once.
     def count_entities(self):
-        self.entities_count = 0
-        self.entities_count = sum(1 for line in self.infile)
-        # seek back
-        self.infile.seek(0)
-        return self.entities_count
+        if self._entities_count is None and not (self.compression or self.streaming):
+            with io.open(self.filename, "rt") as infile:
+                self._entities_count = sum(1 for line in infile) - self.header_rows
+        return self._entities_count
+
+    @contextlib.contextmanager
+    def progressbar(self):
+        """Iterate over the remaining rows of the input file while displaying progress.
+        The progress of compressed files is measured in compressed bytes read, and that
+        of streams in rows read per second."""
+        if self.streaming:
+            yield self.streaming_progress()
+            return
+        if not self.compression:
+            with click.progressbar(
+                self.reader,
+                length=self.entities_count - self.entities_sent,
+                label=self.entity_str,
+                update_min_steps=100,
+            ) as reader:
+                yield reader
+            return
+        with click.progressbar(length=self.file_size, label=self.entity_str) as bar:
+            yield self.compressed_progress(bar)
+
+    def compressed_progress(self, bar):
+        stream = self.infile.buffer.raw
+        position = 0
+        for line, row in enumerate(self.reader):
+            yield row
+            if line % 1000 == 0:
+                bar.update(stream.position - position)
+                position = stream.position
+        bar.update(stream.position - position)
+
+    def streaming_progress(self):
+        show = sys.stdout.isatty()
+        start = last = timer()
+        rows = 0
+        for rows, row in enumerate(self.reader, 1):
+            yield row
+            if show and rows % 1000 == 0 and timer() - last >= STREAM_PROGRESS_INTERVAL:
+                last = timer()
+                click.echo(
+                    "\r%s: %d rows, %d rows/s"
+                    % (self.entity_str, rows, rows / (last - start)),
+                    nl=False,
+                )
+        if show:
+            click.echo(
+                "\r%s: %d rows, %d rows/s"
+                % (self.entity_str, rows, rows / max(timer() - start, 1e-6))
+            )
 
     # Simple input validations for each row of a CSV file
     def validate_row(self, row):
@@ -224,7 +513,7 @@ class EntityFile(object):
             raise CSVError(
                 "%s:%d Expected %d columns, encountered %d ('%s')"
                 % (
-                    self.infile.name,
+                    self.filename,
                     self.reader.line_num,
                     self.column_count,
                     len(row),
@@ -235,8 +524,43 @@ class EntityFile(object):
     # If part of a CSV file was sent to Redis, delete the processed entities and update the binary size
     def reset_partial_binary(self):
         self.binary_entities = []
+        self.binary_count = 0
         self.binary_size = len(self.packed_header)
 
+    # Add an encoded entity to this file's binary token.
+    # If the addition of this entity will make the token or the query buffer grow too large,
+    # send the buffer now. tokens is the query buffer's list of label or relation tokens.
+    def append_entity(self, row_binary, tokens):
+        row_binary_len = len(row_binary)
+        added_size = self.binary_size + row_binary_len
+        if (
+            added_size >= self.config.max_token_size
+            or self.query_buffer.buffer_size + added_size >= self.config.max_buffer_size
+            or (
+                # A flush without pending entities would only queue another header.
+                self.binary_count > 0
+                and self.query_buffer.memory_exhausted(added_size, self.binary_count)
+            )
+        ):
+            self.flush_binary(tokens)
+
+        self.binary_size += row_binary_len
+        self.binary_entities.append(row_binary)
+        self.binary_count += 1
+
+    # Send the query buffer along with this file's pending entities.
+    def flush_binary(self, tokens):
+        tokens.append(self.to_binary())
+        self.entities_sent += self.binary_count
+        self.query_buffer.position = (
+            self.query_buffer.entity_index,
+            self.entities_sent,
+        )
+        self.query_buffer.send_buffer()
+        self.reset_partial_binary()
+        # Push the entity onto the query buffer again, as there are more entities to process.
+        tokens.append(self.to_binary())
+
     # Convert property keys from a CSV file header into a binary string
     def pack_header(self):
         # String format
@@ -262,7 +586,7 @@ class EntityFile(object):
             # TODO might need to check for backtick escapes
             if len(pair) > 2:
                 raise CSVError(
-                    f"{self.infile.name}: Field '{field}' had {len(field)} colons"
+                    f"{self.filename}: Field '{field}' had {len(field)} colons"
                 )
 
             # Convert the column type.
@@ -277,7 +601,7 @@ class EntityFile(object):
                 Type.IGNORE,
             ):
                 raise SchemaError(
-                    f"{self.infile.name}: Each property in the header should be a colon-separated pair"
+                    f"{self.filename}: Each property in the header should be a colon-separated pair"
                 )
             else:
                 # We have a column name and a type.
@@ -297,8 +621,10 @@ class EntityFile(object):
             # Store the column type.
             self.types[idx] = col_type
 
-    def convert_header(self):
-        header = next(self.reader)
+    def convert_header(self, header=None):
+        if header is None:
+            header = next(self.reader)
+        self.header = header
         self.column_count = len(header)
         self.column_names = [
             None
@@ -318,8 +644,17 @@ class EntityFile(object):
         self.packed_header = self.pack_header()
         self.binary_size += len(self.packed_header)
 
+    def copy_schema(self, template):
+        """Share the parsed and packed header of another file of the same label or type"""
+        for attribute in SCHEMA_ATTRIBUTES:
+            if hasattr(template, attribute):
+                setattr(self, attribute, getattr(template, attribute))
+        self.binary_size += len(self.packed_header)
+
     # Convert a list of properties into a binary string
     def pack_props(self, line):
+        if self.encoders is not None:
+            return b"".join([encode(line[idx]) for idx, encode in self.encoders])
         props = []
         for idx, field in enumerate(line):
             if not self.column_names[idx]:
@@ -330,5 +665,21 @@ class EntityFile(object):
                 props.append(inferred_prop_to_binary(field))
         return b"".join(p for p in props)
 
+    def column_encoders(self):
+        """Return the (column index, value encoder) of every property column,
+        encoding values as pack_props does"""
+        if self.encoders is not None:
+            return self.encoders
+        columns = [idx for idx in range(self.column_count) if self.column_names[idx]]
+        if self.config.enforce_schema:
+            return [
+                (
+                    idx,
+                    functools.partial(typed_prop_to_binary, prop_type=self.types[idx]),
+                )
+                for idx in columns
+            ]
+        return [(idx, inferred_prop_to_binary) for idx in columns]
+
     def to_binary(self):
         return self.packed_header + b"".join(self.binary_entities)
@@ -0,0 +1,323 @@
+import itertools
+import math
+import struct
+import sys
+from timeit import default_timer as timer
+
+import redis
+
+from .binary_input import ENDPOINTS_SIZE
+from .memory import ID_VALUE_SIZE, megabytes
+from .query_buffer import run
+from .relation_type import RelationType
+
+SAMPLE_ROWS = 10000  # Default number of rows sampled from each input file
+# Memory taken by each entry of a large dictionary, besides its key and value
+DICT_ENTRY_SIZE = sys.getsizeof(dict.fromkeys(range(1 << 16))) / (1 << 16)
+MAX_PENDING_QUERIES = 5  # Queries built or in flight at once, as in the query buffer
+
+
+class FileSample:
+    """Encoded size and encoding rate of an input file, measured on a sample of its rows,
+    and the number of rows projected from the sample's share of the file"""
+
+    def __init__(self, entity):
+        self.entity = entity
+        self.is_relation = isinstance(entity, RelationType)
+        self.rows = 0
+        self.encoded_size = 0  # Bytes of the sampled rows' encoded properties
+        self.identifier_size = 0  # Bytes of the sampled rows' node identifiers
+        self.encode_time = 0.0
+        self.total_rows = None
+        self.binaries = []  # Encoded properties of the sampled rows
+
+    @property
+    def row_size(self):
+        """Average size of an encoded entity"""
+        size = ENDPOINTS_SIZE if self.is_relation else 0
+        if self.rows:
+            size += self.encoded_size / self.rows
+        return size
+
+    @property
+    def payload(self):
+        return (self.total_rows or 0) * self.row_size
+
+    @property
+    def rows_per_second(self):
+        if not self.encode_time:
+            return None
+        return self.rows / self.encode_time
+
+
+def input_position(entity):
+    """Return the number of bytes of input read so far, decompressed for compressed files"""
+    if entity.compression:
+        # The decompression thread runs ahead of the reader, so its position can't be used.
+        return entity.infile.buffer.raw.consumed
+    return entity.infile.buffer.tell()
+
+
+def sample_file(entity, count, store_node_identifiers):
+    """Read and encode the first count rows of an input file"""
+    sample = FileSample(entity)
+    if entity.streaming:
+        # Streams can only be read once, by the load itself.
+        return sample
+    if entity.input_format == "edges":
+        # Binary edge lists hold the encoded endpoints of relations without properties.
+        sample.total_rows = entity.entities_count
+        return sample
+
+    entity.open()
+    text_input = entity.input_format != "arrow"
+    identifiers = store_node_identifiers and not sample.is_relation
+    start = timer()
+    for row in itertools.islice(entity.reader, count):
+        entity.validate_row(row)
+        row_binary = entity.pack_props(row)
+        if identifiers:
+            sample.identifier_size += sys.getsizeof(entity.node_identifier(row))
+        sample.binaries.append(row_binary)
+        sample.encoded_size += len(row_binary)
+        sample.rows += 1
+    sample.encode_time = timer() - start
+
+    # Text is read a chunk at a time, so the input position is only exact at the end
+    # of a chunk: the remaining rows of the current chunk are counted to reach it.
+    rows = sample.rows
+    end = input_position(entity) if text_input else 0
+    exhausted = True
+    for _ in entity.reader:
+        if not text_input or input_position(entity) != end:
+            exhausted = False
+            break
+        rows += 1
+
+    if exhausted:
+        sample.total_rows = rows
+    elif not text_input:
+        # The row count of Parquet and Arrow files is read from their metadata.
+        sample.total_rows = entity.entities_count
+    elif rows:
+        input_size = entity.file_size
+        if entity.compression:
+            # Rows are projected over the decompressed size of the file, estimated from
+            # the compression ratio of the part decompressed so far.
+            decompressed, position = entity.infile.buffer.raw.progress
+            input_size = input_size * decompressed / position
+        sample.total_rows = round(input_size * rows / end)
+    entity.close()
+    return sample
+
+
+class RoundTrip:
+    """Throughput, latency and memory usage measured by loading sampled entities into a
+    scratch graph, which is deleted afterwards"""
+
+    def __init__(self):
+        self.latency = None  # Seconds for a PING round trip
+        self.bytes_sent = 0
+        self.elapsed = 0.0  # Transfer and server time of the sampled queries
+        # Server memory per node and relation, if the server reports the graph's usage
+        self.node_memory = None
+        self.relation_memory = None
+
+    @property
+    def throughput(self):
+        """Bytes of queries loaded per second"""
+        return self.bytes_sent / self.elapsed if self.elapsed else None
+
+    def send(self, client, graph, args, token):
+        _, transfer_time, server_time = run(client, graph, args)
+        self.bytes_sent += len(token)
+        self.elapsed += transfer_time + server_time
+
+    def measure(self, client, graph, nodes, relations):
+        """Load the sampled nodes of a label and relations of a relationship type"""
+        pings = []
+        for _ in range(3):
+            start = timer()
+            client.ping()
+            pings.append(timer() - start)
+        self.latency = min(pings)
+        if nodes is None or not nodes.rows:
+            return
+        try:
+            token = nodes.entity.packed_header + b"".join(nodes.binaries)
+            self.send(client, graph, ["BEGIN", nodes.rows, 0, 1, 0, token], token)
+            usage = memory_usage(client, graph)
+            if usage is not None:
+                self.node_memory = usage / nodes.rows
+            if relations is None or not relations.rows:
+                return
+            # Relations connect the sampled nodes in sequence.
+            token = relations.entity.packed_header + b"".join(
+                struct.pack("=QQ", idx % nodes.rows, (idx + 1) % nodes.rows) + props
+                for idx, props in enumerate(relations.binaries)
+            )
+            self.send(client, graph, [0, relations.rows, 0, 1, token], token)
+            total = memory_usage(client, graph)
+            if usage is not None and total is not None:
+                self.relation_memory = max(total - usage, 0) / relations.rows
+        finally:
+            client.delete(graph)
+
+
+def memory_usage(client, key):
+    """Return the memory used by a key, or None if the server doesn't report it"""
+    try:
+        return client.memory_usage(key)
+    except redis.exceptions.ResponseError:
+        return None
+
+
+def measurement_client(redis_url):
+    """Return a client of the server to measure, or None if it can't be reached"""
+    client = redis.from_url(redis_url)
+    try:
+        client.ping()
+    except redis.exceptions.ConnectionError:
+        print(
+            "Could not connect to Redis server; only the encoding of the load is estimated."
+        )
+        return None
+    return client
+
+
+class LoadEstimate:
+    """Projects the payload, memory, GRAPH.BULK calls and duration of a load from a sample
+    of the rows of each input file, encoded with the loader's own encoders.
+
+    Row counts are projected from the share of each file read by its sample, so files
+    whose first rows differ markedly from the rest, such as files sorted by row size,
+    are projected less accurately."""
+
+    def __init__(self, labels, reltypes, config, sample_rows=SAMPLE_ROWS):
+        self.config = config
+        self.samples = [
+            sample_file(entity, sample_rows, config.store_node_identifiers)
+            for entity in labels + reltypes
+        ]
+        self.round_trip = None
+
+    def measure(self, client, graph):
+        """Time the loading of sampled entities into a scratch graph on the server"""
+        scratch = f"{graph}_estimate"
+        if client.exists(scratch):
+            print(f"Skipping the round trip, as Redis key '{scratch}' already exists.")
+            return
+        nodes = next((s for s in self.samples if not s.is_relation and s.rows), None)
+        relations = next((s for s in self.samples if s.is_relation and s.rows), None)
+        round_trip = RoundTrip()
+        try:
+            round_trip.measure(client, scratch, nodes, relations)
+        except redis.exceptions.ResponseError as e:
+            # Such as when the server doesn't have the RedisGraph module loaded
+            print(
+                f"Could not load sampled entities ({e}); only the encoding of the load is estimated."
+            )
+            return
+        self.round_trip = round_trip
+
+    def totals(self):
+        """Return the projected totals of the load"""
+        config = self.config
+        known = [s for s in self.samples if s.total_rows is not None]
+        payload = sum(s.payload for s in known)
+        tokens = sum(math.ceil(s.payload / config.max_token_size) for s in known)
+        calls = max(
+            math.ceil(payload / config.max_buffer_size),
+            math.ceil(tokens / config.max_token_count),
+            1 if known else 0,
+        )
+        nodes = sum(s.total_rows for s in known if not s.is_relation)
+        relations = sum(s.total_rows for s in known if s.is_relation)
+
+        id_map = 0
+        if config.store_node_identifiers:
+            sampled = [s for s in known if not s.is_relation and s.rows]
+            identifier_size = sum(s.identifier_size for s in sampled) / max(
+                sum(s.rows for s in sampled), 1
+            )
+            id_map = nodes * (identifier_size + ID_VALUE_SIZE + DICT_ENTRY_SIZE)
+        # Queries are built and kept in flight up to the buffer size each.
+        buffers = min(payload, MAX_PENDING_QUERIES * config.max_buffer_size)
+        if config.memory_budget:
+            buffers = min(buffers, config.memory_budget)
+
+        encode_time = sum(
+            s.total_rows / s.rows_per_second for s in known if s.rows_per_second
+        )
+        totals = {
+            "nodes": nodes,
+            "relations": relations,
+            "payload": payload,
+            "calls": calls,
+            "id_map": id_map,
+            "buffers": buffers,
+            "encode_time": encode_time,
+            "send_time": None,
+            "server_memory": None,
+            "unknown_files": len(self.samples) - len(known),
+        }
+        trip = self.round_trip
+        if trip is not None and trip.throughput:
+            totals["send_time"] = payload / trip.throughput + calls * trip.latency
+        if trip is not None and trip.node_memory is not None:
+            totals["server_memory"] = nodes * trip.node_memory + relations * (
+                trip.relation_memory or 0
+            )
+        return totals
+
+    def print_report(self):
+        print(
+            "%-40s %14s %10s %12s %12s"
+            % ("file", "rows", "bytes/row", "payload MB", "rows/s")
+        )
+        for sample in self.samples:
+            rows = "unknown" if sample.total_rows is None else str(sample.total_rows)
+            rate = sample.rows_per_second
+            print(
+                "%-40s %14s %10.1f %12.1f %12s"
+                % (
+                    sample.entity.filename,
+                    rows,
+                    sample.row_size,
+                    megabytes(sample.payload),
+                    "-" if rate is None else "%.0f" % rate,
+                )
+            )
+
+        totals = self.totals()
+        if totals["unknown_files"]:
+            print(
+                f"{totals['unknown_files']} input files can't be sampled and are not included."
+            )
+        print(
+            "Projected load: %d nodes, %d relations, %.1f MB in %d GRAPH.BULK queries"
+            % (
+                totals["nodes"],
+                totals["relations"],
+                megabytes(totals["payload"]),
+                totals["calls"],
+            )
+        )
+        print(
+            "Projected loader memory: %.1f MB for node identifiers, %.1f MB for queries"
+            % (megabytes(totals["id_map"]), megabytes(totals["buffers"]))
+        )
+        if totals["server_memory"] is not None:
+            print(
+                f"Projected server memory: {megabytes(totals['server_memory']):.1f} MB"
+            )
+        encode_time = totals["encode_time"]
+        send_time = totals["send_time"]
+        if send_time is None:
+            print(f"Projected encoding time: {encode_time:.1f} seconds")
+            return
+        # Queries are sent while the next ones are encoded.
+        print(
+            "Projected time: %.1f seconds (%.1f seconds encoding, %.1f seconds sending)"
+            % (max(encode_time, send_time), encode_time, send_time)
+        )
@@ -0,0 +1,70 @@
+import importlib
+import sys
+
+import click
+
+
+class LoadObserver:
+    """Receives the events of a load, for exporting its progress and metrics.
+
+    Subclasses override the methods of the events they handle. Events are emitted by the
+    loading thread when an input file starts or finishes and when a query is sent or
+    acknowledged, never from within the loops over rows, so observers only add to the cost
+    of a load in proportion to the number of files and queries. An observer that raises an
+    exception is detached, so that exporting metrics can't interrupt a load."""
+
+    def file_started(self, file_report):
+        """An input file is about to be processed. file_report is the report.FileReport
+        of the file, whose stage times are accumulated as it is processed."""
+
+    def file_finished(self, file_report):
+        """Every entity of an input file was added to the query buffer. The file's
+        entities, skipped rows and stage times are final, except for the transfer and
+        server times of its queries that are still in flight."""
+
+    def batch_sent(self, batch):
+        """A GRAPH.BULK query was queued for sending. batch is a dictionary holding its
+        position, input file index, rows, bytes and tokens."""
+
+    def batch_acknowledged(self, query):
+        """Redis replied to a query. query is the dictionary recorded by the load report,
+        holding its size, latencies and the entity counts the server reported."""
+
+    def load_finished(self, report):
+        """Every query was acknowledged. report is a dictionary holding the graph name,
+        runtime, created entity counts and the total time spent on each stage of the load."""
+
+
+class EventDispatcher:
+    """Passes the events of a load to its observers"""
+
+    def __init__(self, observers=()):
+        self.observers = list(observers)
+
+    def emit(self, event, *args):
+        for observer in list(self.observers):
+            handler = getattr(observer, event, None)
+            if handler is None:
+                continue
+            try:
+                handler(*args)
+            except Exception as e:
+                sys.stderr.write(
+                    f"Observer {observer!r} failed on {event} and was detached: {e}\n"
+                )
+                self.observers.remove(observer)
+
+
+def load_observer(spec):
+    """Instantiate an observer from a 'module:name' specification, where name is a class
+    or factory function that takes no arguments"""
+    module_name, _, name = spec.partition(":")
+    if not module_name or not name:
+        raise click.BadParameter(
+            f"Observer '{spec}' should be specified as 'module:name'."
+        )
+    try:
+        factory = getattr(importlib.import_module(module_name), name)
+    except (ImportError, AttributeError) as e:
+        raise click.BadParameter(f"Could not load observer '{spec}': {e}")
+    return factory()
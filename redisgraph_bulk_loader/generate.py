@@ -0,0 +1,359 @@
+import csv
+import math
+import os
+import random
+import string
+
+import click
+
+from .entity_file import Type
+
+CHUNK_ROWS = 10000  # Rows generated and written at a time
+SCATTER_STRIDE = 2654435761  # Scatters power-law ranks over node IDs
+
+# Suffixes accepted by entity counts, such as 10M or 2B
+COUNT_SUFFIXES = {"K": 10**3, "M": 10**6, "B": 10**9, "G": 10**9}
+
+# Default properties of nodes and relations
+NODE_PROPERTIES = "name:STRING,age:LONG,score:DOUBLE,active:BOOL,tags:ARRAY"
+RELATION_PROPERTIES = "weight:DOUBLE,since:LONG"
+
+
+def parse_count(value):
+    """Parse an entity count, which may have a K, M or B suffix"""
+    value = str(value).strip().upper()
+    if value and value[-1] in COUNT_SUFFIXES:
+        return int(float(value[:-1]) * COUNT_SUFFIXES[value[-1]])
+    return int(value)
+
+
+def parse_properties(spec):
+    """Parse a property schema such as 'name:STRING,age:LONG' into (name, Type) pairs"""
+    properties = []
+    if not spec:
+        return properties
+    for field in spec.split(","):
+        name, _, type_name = field.strip().partition(":")
+        try:
+            prop_type = Type[type_name.strip().upper() or "STRING"]
+        except KeyError:
+            raise click.BadParameter(f"Unknown property type '{type_name}'")
+        if prop_type not in (
+            Type.BOOL,
+            Type.DOUBLE,
+            Type.STRING,
+            Type.LONG,
+            Type.ARRAY,
+            Type.IGNORE,
+        ):
+            raise click.BadParameter(
+                f"Property '{name}' can't be of type {prop_type.name}; ID columns are generated."
+            )
+        properties.append((name, prop_type))
+    return properties
+
+
+def value_generator(rng, prop_type, string_length, array_length):
+    """Return a function generating random CSV fields of the given type"""
+    letters = string.ascii_letters
+    if prop_type == Type.BOOL:
+        return lambda: "true" if rng.random() < 0.5 else "false"
+    if prop_type == Type.LONG:
+        return lambda: str(rng.randrange(-(1 << 31), 1 << 31))
+    if prop_type == Type.DOUBLE:
+        return lambda: repr(rng.uniform(-1e6, 1e6))
+    if prop_type == Type.ARRAY:
+        return lambda: "[%s]" % ", ".join(
+            [str(rng.randrange(1000)) for _ in range(array_length)]
+        )
+    # Strings, and the contents of ignored columns
+    return lambda: "".join(rng.choices(letters, k=string_length))
+
+
+class Uniform:
+    """Chooses every node with the same probability"""
+
+    def __init__(self, rng, count):
+        self.rng = rng
+        self.count = count
+
+    def sample(self):
+        return self.rng.randrange(self.count)
+
+
+class PowerLaw:
+    """Chooses the node of rank k with a probability proportional to k ** -exponent, so that
+    degrees follow a power law with an exponent of 1 + 1 / exponent. Ranks are sampled by
+    inverting the distribution's continuous CDF, which needs no table of the nodes, and
+    are scattered over node IDs so that the most connected nodes are not the first ones."""
+
+    def __init__(self, rng, count, exponent, salt):
+        self.rng = rng
+        self.count = count
+        self.exponent = exponent
+        if exponent != 1.0:
+            self.span = count ** (1.0 - exponent) - 1.0
+            self.power = 1.0 / (1.0 - exponent)
+        self.stride = SCATTER_STRIDE
+        while math.gcd(self.stride, count) != 1:
+            self.stride += 2
+        self.offset = salt % count
+
+    def sample(self):
+        u = self.rng.random()
+        if self.exponent == 1.0:
+            rank = self.count**u
+        else:
+            rank = (1.0 + u * self.span) ** self.power
+        rank = min(int(rank) - 1, self.count - 1)
+        return (rank * self.stride + self.offset) % self.count
+
+
+class LabelSpec:
+    """A generated node file, whose IDs are first_id to first_id + count - 1"""
+
+    def __init__(self, name, count, first_id):
+        self.name = name
+        self.count = count
+        self.first_id = first_id
+
+
+class Generator:
+    """Writes node and relation CSV files in the loader's formats, a chunk of rows at a time.
+    Every file is generated from a random state seeded by the seed and the file name,
+    so that output is deterministic and files can be generated independently."""
+
+    def __init__(
+        self,
+        output_dir,
+        label_count,
+        node_count,
+        type_count,
+        edge_count,
+        node_properties,
+        relation_properties,
+        distribution="uniform",
+        exponent=2.5,
+        string_length=16,
+        array_length=4,
+        enforce_schema=False,
+        seed=0,
+    ):
+        self.output_dir = output_dir
+        self.node_properties = node_properties
+        self.relation_properties = relation_properties
+        self.distribution = distribution
+        # Exponent of the rank distribution producing this exponent of the degree distribution
+        self.rank_exponent = 1.0 / (exponent - 1.0)
+        self.string_length = string_length
+        self.array_length = array_length
+        self.enforce_schema = enforce_schema
+        self.seed = seed
+        # Node IDs are unique across labels, so that files can be loaded without namespaces.
+        self.labels = [
+            LabelSpec(f"Label{idx}", node_count, idx * node_count)
+            for idx in range(label_count)
+        ]
+        self.edge_count = edge_count
+        self.type_names = [f"TYPE{idx}" for idx in range(type_count)]
+
+    def rng(self, name):
+        return random.Random(f"{self.seed}:{name}")
+
+    def endpoints(self, type_idx):
+        """Return the labels of the source and destination of a relation type"""
+        source = self.labels[type_idx % len(self.labels)]
+        dest = self.labels[(type_idx + 1) % len(self.labels)]
+        return source, dest
+
+    def header(self, properties):
+        if self.enforce_schema:
+            return [f"{name}:{prop_type.name}" for name, prop_type in properties]
+        return [name for name, _ in properties]
+
+    def write_rows(self, path, header, row_count, make_row, bar):
+        with open(path, "w", newline="") as f:
+            # The commas of arrays are escaped rather than quoted, as the loader doesn't
+            # interpret quotes by default.
+            writer = csv.writer(
+                f, lineterminator="\n", quoting=csv.QUOTE_NONE, escapechar="\\"
+            )
+            writer.writerow(header)
+            for start in range(0, row_count, CHUNK_ROWS):
+                rows = min(CHUNK_ROWS, row_count - start)
+                writer.writerows([make_row() for _ in range(rows)])
+                bar.update(rows)
+
+    def write_label(self, label, bar):
+        rng = self.rng(label.name)
+        values = [
+            value_generator(rng, t, self.string_length, self.array_length)
+            for _, t in self.node_properties
+        ]
+        id_field = f"id:ID({label.name})" if self.enforce_schema else "id"
+        header = [id_field] + self.header(self.node_properties)
+        next_id = iter(range(label.first_id, label.first_id + label.count))
+
+        def make_row():
+            return [next(next_id)] + [value() for value in values]
+
+        path = os.path.join(self.output_dir, label.name + ".csv")
+        self.write_rows(path, header, label.count, make_row, bar)
+        return path
+
+    def sampler(self, rng, label, salt):
+        if self.distribution == "powerlaw":
+            return PowerLaw(rng, label.count, self.rank_exponent, salt)
+        return Uniform(rng, label.count)
+
+    def write_relation(self, type_idx, bar):
+        name = self.type_names[type_idx]
+        rng = self.rng(name)
+        source, dest = self.endpoints(type_idx)
+        sources = self.sampler(rng, source, 2 * type_idx)
+        dests = self.sampler(rng, dest, 2 * type_idx + 1)
+        values = [
+            value_generator(rng, t, self.string_length, self.array_length)
+            for _, t in self.relation_properties
+        ]
+        if self.enforce_schema:
+            id_fields = [f":START_ID({source.name})", f":END_ID({dest.name})"]
+        else:
+            id_fields = ["src", "dest"]
+        header = id_fields + self.header(self.relation_properties)
+        first_source = source.first_id
+        first_dest = dest.first_id
+
+        def make_row():
+            return [
+                first_source + sources.sample(),
+                first_dest + dests.sample(),
+            ] + [value() for value in values]
+
+        path = os.path.join(self.output_dir, name + ".csv")
+        self.write_rows(path, header, self.edge_count, make_row, bar)
+        return path
+
+    def run(self):
+        """Write every file, returning the paths of the node and relation files"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        total = sum(label.count for label in self.labels)
+        total += self.edge_count * len(self.type_names)
+        with click.progressbar(length=total, label="Generating") as bar:
+            node_files = [self.write_label(label, bar) for label in self.labels]
+            relation_files = [
+                self.write_relation(idx, bar) for idx in range(len(self.type_names))
+            ]
+        return node_files, relation_files
+
+
+################################################################################
+# Dataset generator
+################################################################################
+# Command-line arguments
+@click.command()
+@click.argument("output_dir")
+@click.option("--labels", "-L", default=1, help="number of node labels (default 1)")
+@click.option(
+    "--nodes",
+    "-n",
+    default="10K",
+    help="nodes per label, optionally with a K, M or B suffix (default 10K)",
+)
+@click.option("--types", "-T", default=1, help="number of relation types (default 1)")
+@click.option(
+    "--edges",
+    "-e",
+    default="100K",
+    help="relations per type, optionally with a K, M or B suffix (default 100K)",
+)
+@click.option(
+    "--node-properties",
+    "-p",
+    default=NODE_PROPERTIES,
+    help=f"comma-separated name:TYPE node properties (default {NODE_PROPERTIES})",
+)
+@click.option(
+    "--relation-properties",
+    "-P",
+    default=RELATION_PROPERTIES,
+    help=f"comma-separated name:TYPE relation properties (default {RELATION_PROPERTIES})",
+)
+@click.option(
+    "--distribution",
+    "-D",
+    type=click.Choice(["uniform", "powerlaw"]),
+    default="uniform",
+    help="distribution of the relations' endpoints (default uniform)",
+)
+@click.option(
+    "--exponent",
+    "-a",
+    default=2.5,
+    help="exponent of the power-law degree distribution, greater than 1 (default 2.5)",
+)
+@click.option(
+    "--string-length", "-s", default=16, help="length of string values (default 16)"
+)
+@click.option(
+    "--array-length", "-A", default=4, help="length of array values (default 4)"
+)
+@click.option(
+    "--enforce-schema",
+    "-d",
+    default=False,
+    is_flag=True,
+    help="write typed headers with ID namespaces, for loading with --enforce-schema",
+)
+@click.option("--seed", default=0, help="seed of the generated values (default 0)")
+def bulk_generate(
+    output_dir,
+    labels,
+    nodes,
+    types,
+    edges,
+    node_properties,
+    relation_properties,
+    distribution,
+    exponent,
+    string_length,
+    array_length,
+    enforce_schema,
+    seed,
+):
+    if labels < 1:
+        raise click.BadParameter("At least one label must be generated.")
+    if exponent <= 1:
+        raise click.BadParameter("The power-law exponent must be greater than 1.")
+    node_count = parse_count(nodes)
+    if node_count < 1 and types:
+        raise click.BadParameter("Relations require at least one node per label.")
+
+    generator = Generator(
+        output_dir,
+        labels,
+        node_count,
+        types,
+        parse_count(edges),
+        parse_properties(node_properties),
+        parse_properties(relation_properties),
+        distribution,
+        exponent,
+        string_length,
+        array_length,
+        enforce_schema,
+        seed,
+    )
+    node_files, relation_files = generator.run()
+
+    args = [f"-n {path}" for path in node_files] + [
+        f"-r {path}" for path in relation_files
+    ]
+    if enforce_schema:
+        args.insert(0, "--enforce-schema")
+    print("Load the generated graph with:")
+    print("redisgraph-bulk-insert GRAPH " + " ".join(args))
+
+
+if __name__ == "__main__":
+    bulk_generate()
@@ -0,0 +1,130 @@
+import json
+
+from .entity_file import (
+    LONG,
+    NULL,
+    Type,
+    declared_encoder,
+    encode_bool,
+    encode_double,
+    encode_long,
+    encode_string,
+)
+from .exceptions import CSVError, SchemaError
+
+# orjson decodes several times faster than the standard library, if it is installed.
+try:
+    from orjson import JSONDecodeError
+    from orjson import loads as json_loads
+except ImportError:
+    from json import JSONDecodeError
+    from json import loads as json_loads
+
+
+def encode_json_value(value):
+    """Encode a decoded JSON value according to its JSON type"""
+    if value is None:
+        return NULL
+    # bool is a subclass of int, so it is checked first.
+    if isinstance(value, bool):
+        return encode_bool(value)
+    if isinstance(value, int):
+        return encode_long(value)
+    if isinstance(value, float):
+        return encode_double(value)
+    if isinstance(value, str):
+        return encode_string(value)
+    if isinstance(value, list):
+        return LONG.pack(Type.ARRAY.value, len(value)) + b"".join(
+            [encode_json_value(elem) for elem in value]
+        )
+    raise SchemaError(f"Could not encode JSON value '{json.dumps(value)}'")
+
+
+def declared_json_encoder(prop_type):
+    """Return an encoder of the values of a property whose header declares prop_type.
+    Values other than strings are converted from their JSON text, as in a CSV file."""
+    encode = declared_encoder(prop_type)
+
+    def encode_declared(value):
+        if value is None or isinstance(value, str):
+            return encode(value)
+        return encode(json.dumps(value))
+
+    return encode_declared
+
+
+class JsonLinesReader:
+    """Iterates over the header and rows of a JSON Lines file like a csv.reader.
+
+    Each line holds a JSON object describing one entity. If the first line is a JSON
+    array of strings, it is the file's header, in the same format as a CSV header.
+    Otherwise the header is the list of keys of the first object. Every row is the
+    tuple of the values of the header's keys in an object, where missing keys are null."""
+
+    def __init__(self, infile, filename, enforce_schema):
+        self.lines = iter(infile)
+        self.filename = filename
+        self.line_num = 0
+        self.pending = None  # Object read along with the header
+        first = self.next_value()
+        if isinstance(first, list):
+            header = first
+            self.header_rows = 1
+        elif isinstance(first, dict):
+            header = list(first)
+            self.header_rows = 0
+            self.pending = first
+        else:
+            raise CSVError(
+                f"{filename}: The first line should be a header array or an object."
+            )
+        # Keys are the header fields stripped of their type.
+        self.keys = [str(field).split(":")[0].strip() for field in header]
+        if enforce_schema:
+            # Properties without a declared type take the type of each of their values.
+            header = [
+                field if ":" in field else field + ":" + Type.UNKNOWN.name
+                for field in header
+            ]
+        self.header = header
+
+    def next_value(self):
+        line = ""
+        while not line.strip():
+            # Blank lines are skipped; StopIteration ends the reader.
+            line = next(self.lines)
+            self.line_num += 1
+        try:
+            return json_loads(line)
+        except JSONDecodeError as e:
+            raise CSVError(
+                f"{self.filename}:{self.line_num} Could not decode JSON ({e})"
+            )
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.header is not None:
+            header, self.header = self.header, None
+            return header
+        if self.pending is not None:
+            value, self.pending = self.pending, None
+        else:
+            value = self.next_value()
+        if not isinstance(value, dict):
+            raise CSVError(f"{self.filename}:{self.line_num} Expected a JSON object")
+        return tuple([value.get(key) for key in self.keys])
+
+    def encoders(self, types=None):
+        """Return the value encoder of every key. Values are encoded according to their
+        JSON type, unless types declares the type of their property."""
+        if types is None:
+            return [encode_json_value] * len(self.keys)
+        return [
+            encode_json_value
+            if prop_type == Type.UNKNOWN
+            else declared_json_encoder(prop_type)
+            for prop_type in types
+        ]
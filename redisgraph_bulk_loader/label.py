@@ -1,19 +1,27 @@
+import itertools
 import re
 import sys
+from timeit import default_timer as timer
 
 import click
 
 from .entity_file import EntityFile, Type
-from .exceptions import SchemaError
+from .exceptions import CSVError, SchemaError
 
 
 class Label(EntityFile):
     """Handler class for processing Label CSV files."""
 
-    def __init__(self, query_buffer, infile, label_str, config):
+    def __init__(
+        self, query_buffer, infile, label_str, config, header=None, template=None
+    ):
         self.id_namespace = None
         self.query_buffer = query_buffer
-        super(Label, self).__init__(infile, label_str, config)
+        super(Label, self).__init__(infile, label_str, config, header, template)
+        if self.input_format == "edges":
+            raise CSVError(
+                f"Node file '{self.filename}' is a binary edge list, which can only hold relations."
+            )
 
     def process_schemaless_header(self, header):
         # The first column is the ID.
@@ -35,7 +43,7 @@ class Label(EntityFile):
         # Verify that exactly one field is labeled ID.
         if (self.types.count(Type.ID_STRING) + self.types.count(Type.ID_INTEGER)) != 1:
             raise SchemaError(
-                f"Node file '{self.infile.name}' should have exactly one ID column."
+                f"Node file '{self.filename}' should have exactly one ID column."
             )
         # Track the offset containing the node ID.
         try:
@@ -48,64 +56,151 @@ class Label(EntityFile):
         if match:
             self.id_namespace = match.group(1)
 
-    def update_node_dictionary(self, identifier):
+    def update_node_dictionary(self, identifier, line_num=None):
         """Add identifier->ID pair to dictionary if we are building relations"""
         if identifier in self.query_buffer.nodes:
             sys.stderr.write(
                 "Node identifier '%s' was used multiple times - second occurrence at %s:%d\n"
-                % (identifier, self.infile.name, self.reader.line_num)
+                % (
+                    identifier,
+                    self.filename,
+                    self.reader.line_num if line_num is None else line_num,
+                )
             )
             if self.config.skip_invalid_nodes is False:
                 sys.exit(1)
         self.query_buffer.nodes[identifier] = self.query_buffer.top_node_id
         self.query_buffer.top_node_id += 1
 
+    def node_identifier(self, row):
+        # IDs read from typed inputs are converted to match the same IDs in CSV files.
+        id_field = str(row[self.id])
+        if self.id_namespace is not None:
+            id_field = self.id_namespace + "." + id_field
+        return id_field
+
+    def restore(self, count=None):
+        """Rebuild the node identifiers of the first count entities of this file, or all of
+        them if count is None, after they were sent by an interrupted load."""
+        first_id = self.query_buffer.top_node_id
+        self.open()
+        for row in itertools.islice(self.reader, count):
+            if self.config.store_node_identifiers:
+                self.update_node_dictionary(self.node_identifier(row))
+        if count is not None:
+            # The remaining entities will be processed from the current position.
+            self.entities_sent = count
+            return
+        self.close()
+        if self.query_buffer.cache:
+            self.record_segment(self.query_buffer.cache.key(self), first_id)
+
+    def record_segment(self, cache_key, first_id):
+        # Record the range of IDs assigned to this file's nodes, so that cached
+        # relations referring to them can be rebased in later loads.
+        self.query_buffer.segments.append(
+            (cache_key, first_id, self.query_buffer.top_node_id - first_id)
+        )
+
     def process_entities(self):
+        # Files partially sent by an interrupted load and streams don't use the cache.
+        cache = self.query_buffer.cache
+        if self.entities_sent or self.streaming:
+            cache = None
+        cached = None
+        # IDs of restored entities were assigned before processing resumed.
+        first_id = self.query_buffer.top_node_id - self.entities_sent
+        if cache:
+            cache_key = cache.key(self)
+            cached = cache.load(cache_key)
+        if cached:
+            entities_created = self.process_cached_entities(cached)
+        else:
+            writer = cache.writer(cache_key) if cache else None
+            try:
+                entities_created = self.process_input_entities(writer)
+            except BaseException:
+                if writer:
+                    writer.abort()
+                raise
+            if writer:
+                writer.commit()
+        self.query_buffer.labels.append(self.to_binary())
+        self.query_buffer.report.current.entities += entities_created
+
+        if self.query_buffer.cache:
+            # Uncached files have no key, so cached relations referring to them are never rebased.
+            self.record_segment(cache_key if cache else None, first_id)
+        print("%d nodes created with label '%s'" % (entities_created, self.entity_str))
+
+    def process_input_entities(self, writer):
         entities_created = 0
-        with click.progressbar(
-            self.reader,
-            length=self.entities_count,
-            label=self.entity_str,
-            update_min_steps=100,
-        ) as reader:
+        report = self.query_buffer.report
+        timed = report.time_rows
+        # Encoding includes adding entities to the buffer, but not the send queue waits that may cause.
+        queue_wait = report.queue_wait()
+        read_time = encode_time = id_map_time = 0.0
+        start = timer()
+        self.open()
+        with self.progressbar() as reader:
             for row in reader:
+                if timed:
+                    read = timer()
                 self.validate_row(row)
 
-                # Update the node identifier dictionary if necessary
-                if self.config.store_node_identifiers:
-                    id_field = row[self.id]
-                    if self.id_namespace is not None:
-                        id_field = self.id_namespace + "." + str(id_field)
-                    self.update_node_dictionary(id_field)
-
                 try:
                     row_binary = self.pack_props(row)
                 except SchemaError as e:
                     # TODO why is line_num off by one?
                     raise SchemaError(
-                        "%s:%d %s"
-                        % (self.infile.name, self.reader.line_num - 1, str(e))
+                        "%s:%d %s" % (self.filename, self.reader.line_num - 1, str(e))
                     )
-                row_binary_len = len(row_binary)
-                # If the addition of this entity will make the binary token grow too large,
-                # send the buffer now.
-                # TODO how much of this can be made uniform w/ relations and moved to Querybuffer?
-                added_size = self.binary_size + row_binary_len
-                if (
-                    added_size >= self.config.max_token_size
-                    or self.query_buffer.buffer_size + added_size
-                    >= self.config.max_buffer_size
-                ):
-                    self.query_buffer.labels.append(self.to_binary())
-                    self.query_buffer.send_buffer()
-                    self.reset_partial_binary()
-                    # Push the label onto the query buffer again, as there are more entities to process.
-                    self.query_buffer.labels.append(self.to_binary())
-
+                if writer:
+                    writer.add(row_binary)
+                # The node is added before its ID is assigned, so that a flush in between
+                # leaves top_node_id equal to the number of nodes sent.
+                self.append_entity(row_binary, self.query_buffer.labels)
                 self.query_buffer.node_count += 1
                 entities_created += 1
-                self.binary_size += row_binary_len
-                self.binary_entities.append(row_binary)
-            self.query_buffer.labels.append(self.to_binary())
-        self.infile.close()
-        print("%d nodes created with label '%s'" % (entities_created, self.entity_str))
+                if timed:
+                    encoded = timer()
+
+                # Update the node identifier dictionary if necessary
+                if self.config.store_node_identifiers:
+                    id_field = self.node_identifier(row)
+                    self.update_node_dictionary(id_field)
+                    if writer:
+                        writer.identifiers.append(id_field)
+                if timed:
+                    end = timer()
+                    read_time += read - start
+                    encode_time += encoded - read
+                    id_map_time += end - encoded
+                    start = end
+        self.close()
+        if timed:
+            read_time += timer() - start
+            encode_time -= report.queue_wait() - queue_wait
+            report.add_times(read_time, encode_time, id_map_time)
+        return entities_created
+
+    def process_cached_entities(self, cached):
+        """Add the entities of a previous encoding of this file, skipping the input file"""
+        report = self.query_buffer.report
+        queue_wait = report.queue_wait()
+        began = timer()
+        with click.progressbar(
+            cached.entities(),
+            length=len(cached.offsets),
+            label=self.entity_str + " (cached)",
+            update_min_steps=100,
+        ) as entities:
+            for idx, row_binary in enumerate(entities):
+                self.append_entity(row_binary, self.query_buffer.labels)
+                self.query_buffer.node_count += 1
+                if self.config.store_node_identifiers:
+                    # Line numbers account for the header row.
+                    self.update_node_dictionary(cached.identifiers[idx], idx + 2)
+        # Reading the cache stands in for reading and encoding the input file.
+        report.add_times(read=timer() - began - (report.queue_wait() - queue_wait))
+        return len(cached.offsets)
@@ -0,0 +1,199 @@
+import itertools
+import os
+import sys
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # The resource module is not available on Windows.
+    resource = None
+
+# Components of the loader's memory that are estimated
+COMPONENTS = ("id_map", "pending", "in_flight")
+# Identifiers sampled to estimate the average size of an ID map key
+KEY_SAMPLE = 1000
+# Size of an internal node ID held as an ID map value; IDs below 257 are shared
+ID_VALUE_SIZE = sys.getsizeof(1 << 29)
+# Approximate cost of holding one encoded entity in a pending list:
+# the bytes object header plus the list slot that references it.
+ROW_OVERHEAD = sys.getsizeof(b"") + 8
+
+
+def megabytes(size):
+    return size / 1_000_000
+
+
+def peak_rss():
+    """Return the process's resident set size high-water mark in bytes, or None if unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def available_memory():
+    """Return the memory available to new allocations in bytes, or None if unknown"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def print_allocations(count):
+    """Print the source lines holding the most memory allocated since tracemalloc started"""
+    snapshot = tracemalloc.take_snapshot()
+    print(f"Top {count} allocation sites:")
+    for stat in snapshot.statistics("lineno")[:count]:
+        frame = stat.traceback[0]
+        print(
+            "%10.1f MB %10d blocks  %s:%d"
+            % (megabytes(stat.size), stat.count, frame.filename, frame.lineno)
+        )
+
+
+class MemoryMonitor:
+    """Estimates the memory held by the query buffer: the node identifier map, the encoded
+    entities waiting to be sent, and the queries awaiting acknowledgement.
+
+    Estimates are sampled whenever a query is submitted and whenever an input file is
+    finished, which keeps their cost out of the row loops. The size of identifiers is
+    sampled from the most recent entries of the ID map, and its final size is projected
+    from the share of the node files read so far, to warn early of loads whose ID map
+    will not fit in the available memory."""
+
+    def __init__(self, query_buffer):
+        self.query_buffer = query_buffer
+        self.verbose = False  # Print estimates after each input file
+        self.entity = None  # Input file being processed
+        self.sizes = dict.fromkeys(COMPONENTS, 0)
+        self.peaks = dict.fromkeys(COMPONENTS, 0)
+        self.projected_id_map = None
+        # Size of the node files whose identifiers are stored, and of those finished
+        self.node_files = []
+        self.node_input_size = 0
+        self.node_input_done = 0
+        self.available = available_memory()
+        self.warned = False
+
+    def expect_nodes(self, labels):
+        """Register the node files whose identifiers will be added to the ID map"""
+        if self.query_buffer.nodes is None:
+            return
+        for label in labels:
+            self.node_files.append(label)
+            self.node_input_size += label.file_size
+
+    def id_map_size(self):
+        nodes = self.query_buffer.nodes
+        size = 0
+        for keys, ids in self.query_buffer.node_indices.values():
+            size += keys.nbytes + ids.nbytes
+        if not nodes:
+            return size
+        try:
+            recent = reversed(nodes.keys())
+        except TypeError:
+            # Dictionaries are only reversible from Python 3.8.
+            recent = iter(nodes)
+        sample = list(itertools.islice(recent, KEY_SAMPLE))
+        key_size = sum(sys.getsizeof(key) for key in sample) / len(sample)
+        return size + sys.getsizeof(nodes) + len(nodes) * (key_size + ID_VALUE_SIZE)
+
+    def pending_size(self):
+        size = self.query_buffer.buffer_size
+        entity = self.entity
+        if entity is not None:
+            size += entity.binary_size + entity.binary_count * ROW_OVERHEAD
+        return size
+
+    def node_input_read(self):
+        """Return the bytes of node files read so far, estimating the share of the
+        current file from its rows, or None if that can't be estimated"""
+        entity = self.entity
+        if entity is None or entity not in self.node_files:
+            return self.node_input_done
+        rows = entity.entities_count
+        if not rows:
+            return None
+        done = (entity.entities_sent + entity.binary_count) / rows
+        return self.node_input_done + entity.file_size * min(done, 1.0)
+
+    def project_id_map(self, id_map):
+        """Extrapolate the final size of the ID map from the node files read so far"""
+        if not self.node_input_size or not id_map:
+            return None
+        read = self.node_input_read()
+        if not read:
+            return None
+        return max(id_map, id_map * self.node_input_size / read)
+
+    def sample(self):
+        """Update the estimates and their peaks, and warn if the ID map is projected
+        to outgrow the available memory"""
+        self.sizes["id_map"] = self.id_map_size()
+        self.sizes["pending"] = self.pending_size()
+        self.sizes["in_flight"] = self.query_buffer.inflight_size
+        for component, size in self.sizes.items():
+            self.peaks[component] = max(self.peaks[component], size)
+
+        projected = self.project_id_map(self.sizes["id_map"])
+        if projected is None:
+            return
+        self.projected_id_map = projected
+        growth = projected - self.sizes["id_map"]
+        if not self.warned and self.available and growth > self.available:
+            self.warned = True
+            sys.stderr.write(
+                "Warning: the node identifier map is projected to grow to %.0f MB, "
+                "while only %.0f MB of memory is available\n"
+                % (megabytes(projected), megabytes(self.available))
+            )
+
+    def start_file(self, entity):
+        self.entity = entity
+
+    def end_file(self, entity):
+        if entity in self.node_files:
+            self.node_input_done += entity.file_size
+        # The file's entities are now held by the query buffer's token.
+        self.entity = None
+        self.sample()
+        if self.verbose:
+            self.print_sizes("Memory")
+
+    def print_sizes(self, title, sizes=None):
+        sizes = self.sizes if sizes is None else sizes
+        line = (
+            "%s: ID map %.1f MB (%d identifiers), pending %.1f MB, in flight %.1f MB"
+            % (
+                title,
+                megabytes(sizes["id_map"]),
+                len(self.query_buffer.nodes or ()),
+                megabytes(sizes["pending"]),
+                megabytes(sizes["in_flight"]),
+            )
+        )
+        rss = peak_rss()
+        if rss is not None:
+            line += f", RSS high-water {megabytes(rss):.1f} MB"
+        print(line)
+
+    def report_completion(self):
+        self.print_sizes("Peak memory", self.peaks)
+
+    def to_dict(self):
+        return {
+            "peaks": self.peaks,
+            "projected_id_map": self.projected_id_map,
+            "peak_rss": peak_rss(),
+            "available": self.available,
+        }
@@ -0,0 +1,43 @@
+def estimated_size(entity):
+    """Estimate the encoded size of an input file from its header and size on disk."""
+    return len(entity.packed_header) + entity.file_size
+
+
+def plannable(entity):
+    """Return True if the encoded size of an input file can be estimated from its size on
+    disk. Compressed files encode to several times their size, as do Parquet and Arrow
+    files, which are compressed and dictionary-encoded. Streams have no size."""
+    return not (
+        entity.compression or entity.streaming or entity.input_format == "arrow"
+    )
+
+
+def pack_entities(entities, config):
+    """Group entity files into batches that each fill a single GRAPH.BULK query.
+
+    Files are placed first-fit in decreasing order of estimated size, so many small
+    files share a query rather than each triggering a flush. A file larger than a query
+    is streamed over several queries as usual, and only its remainder counts towards
+    the batch it starts. Files whose size can't be estimated are left out of planning,
+    and each processed in a batch of its own."""
+    capacity = config.max_buffer_size
+    batches = []  # [remaining bytes, entity list] pairs
+    planned = [entity for entity in entities if plannable(entity)]
+    for entity in sorted(planned, key=estimated_size, reverse=True):
+        weight = estimated_size(entity) % capacity
+        for batch in batches:
+            if batch[0] >= weight and len(batch[1]) < config.max_token_count:
+                batch[0] -= weight
+                batch[1].append(entity)
+                break
+        else:
+            batches.append([capacity - weight, [entity]])
+    return [batch[1] for batch in batches] + [
+        [entity] for entity in entities if not plannable(entity)
+    ]
+
+
+def plan_batches(labels, reltypes, config):
+    """Return the batches in which input files should be processed.
+    All label batches precede relation batches, as relations refer to existing nodes."""
+    return pack_entities(labels, config) + pack_entities(reltypes, config)
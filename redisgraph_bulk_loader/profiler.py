@@ -0,0 +1,128 @@
+import contextlib
+import cProfile
+import json
+import os
+from timeit import default_timer as timer
+
+from .entity_file import STDIN
+
+# Columns listed in the summary of each profiled file
+SUMMARY_COLUMNS = 10
+
+
+class ColumnProfile:
+    """Time spent encoding each column of an input file, and the bytes encoded"""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.times = [0.0] * len(self.names)
+        self.sizes = [0] * len(self.names)
+        self.rows = 0
+
+    def encode(self, line, encoders, size=len):
+        """Encode the columns of a row with encoders, (column index, value encoder) pairs
+        aligned with the profiled columns, returning the encoded values. size returns
+        the size in bytes of an encoded value."""
+        self.rows += 1
+        times = self.times
+        sizes = self.sizes
+        values = []
+        for pos, (idx, encode) in enumerate(encoders):
+            start = timer()
+            value = encode(line[idx])
+            times[pos] += timer() - start
+            sizes[pos] += size(value)
+            values.append(value)
+        return values
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "columns": [
+                {"column": name, "encode_time": elapsed, "bytes": size}
+                for name, elapsed, size in zip(self.names, self.times, self.sizes)
+            ],
+        }
+
+    def print_summary(self):
+        total_time = sum(self.times) or 1.0
+        total_size = sum(self.sizes) or 1
+        columns = sorted(
+            zip(self.names, self.times, self.sizes), key=lambda c: c[1], reverse=True
+        )
+        print(
+            "%-32s %12s %7s %14s %7s"
+            % ("column", "encode (s)", "time", "bytes", "size")
+        )
+        for name, elapsed, size in columns[:SUMMARY_COLUMNS]:
+            print(
+                "%-32s %12.3f %6.1f%% %14d %6.1f%%"
+                % (
+                    name,
+                    elapsed,
+                    100 * elapsed / total_time,
+                    size,
+                    100 * size / total_size,
+                )
+            )
+
+
+def profile_columns(entity):
+    """Replace the entity's pack_props with one that attributes encoding time and bytes
+    to each property column, returning the ColumnProfile it records to"""
+    encoders = entity.column_encoders()
+    profile = ColumnProfile(entity.column_names[idx] for idx, _ in encoders)
+
+    def pack_props(line):
+        return b"".join(profile.encode(line, encoders))
+
+    entity.pack_props = pack_props
+    return profile
+
+
+class LoadProfiler:
+    """Runs the processing of each input file under cProfile, writing its stats to a
+    directory for inspection with pstats or a viewer such as snakeviz.
+
+    Profiling slows down every Python function call, and timing each column adds to the
+    cost of encoding, so profiled loads are much slower than unprofiled ones; the shares
+    of the time spent in each function and column are what matters."""
+
+    def __init__(self, output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.files = []  # Stats file and column profile of every profiled input file
+
+    @contextlib.contextmanager
+    def profile(self, filename, columns=None):
+        """Profile the block processing an input file, whose columns may be profiled by
+        the ColumnProfile columns"""
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            name = os.path.basename(filename) if filename != STDIN else "stdin"
+            path = os.path.join(self.output_dir, f"{len(self.files):03d}-{name}.pstats")
+            profiler.dump_stats(path)
+            self.files.append((filename, path, columns))
+            print(f"Profile of '{filename}' written to '{path}'")
+            if columns is not None and columns.rows:
+                columns.print_summary()
+
+    def write_columns(self):
+        """Write the column profiles of every input file to columns.json"""
+        path = os.path.join(self.output_dir, "columns.json")
+        with open(path, "w") as f:
+            json.dump(
+                [
+                    dict(file=filename, stats=stats, **columns.to_dict())
+                    for filename, stats, columns in self.files
+                    if columns is not None
+                ],
+                f,
+                indent=2,
+            )
+            f.write("\n")
+        return path
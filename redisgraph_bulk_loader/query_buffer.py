@@ -1,20 +1,92 @@
+import threading
+from timeit import default_timer as timer
+
 from pathos.pools import ThreadPool as Pool
 
+from .adaptive import BatchSizer
+from .events import EventDispatcher
+from .memory import ROW_OVERHEAD, MemoryMonitor
+from .report import LoadReport
+
 
-def run(client, graphname, args):
-    result = client.execute_command("GRAPH.BULK", graphname, *args)
+def run(client, graphname, args, failed=None):
+    """Send a GRAPH.BULK query and return its stats along with the time spent
+    writing the query to the socket and waiting for the server's reply.
+    If the optional failed event is set, by this or an earlier query, the query is not sent."""
+    if failed is not None and failed.is_set():
+        raise Exception("Query not sent, as an earlier query failed.")
+    pool = client.connection_pool
+    conn = pool.get_connection("GRAPH.BULK")
+    try:
+        start = timer()
+        conn.send_command("GRAPH.BULK", graphname, *args)
+        sent = timer()
+        result = conn.read_response()
+        received = timer()
+    except BaseException:
+        # Don't return a connection with a partial query or reply to the pool.
+        conn.disconnect()
+        if failed is not None:
+            failed.set()
+        raise
+    finally:
+        pool.release(conn)
     stats = result.split(", ".encode())
-    return stats
+    return stats, sent - start, received - sent
+
+
+class Batch:
+    """Bookkeeping for a GRAPH.BULK query that has been submitted to the pool"""
+
+    def __init__(self, task, size, rows, encode_time, query_buffer):
+        self.task = task
+        self.index = len(query_buffer.report.queries) + len(query_buffer.tasks)
+        self.size = size  # Size in bytes of all binary tokens
+        self.tokens = len(query_buffer.labels) + len(query_buffer.reltypes)
+        self.submitted = timer()
+        self.rows = rows  # Number of nodes and relations
+        self.encode_time = encode_time  # Time spent building the batch
+        # Position of the last entity in the batch, for checkpointing
+        self.position = query_buffer.position
+        self.filename = query_buffer.filename
+        self.top_node_id = query_buffer.top_node_id
+        self.file_report = query_buffer.report.current
 
 
 class QueryBuffer:
-    def __init__(self, graphname, client, config):
+    def __init__(
+        self, graphname, client, config, spool=None, cache=None, checkpoint=None
+    ):
         self.nodes = None
         self.top_node_id = 0
+        # Sorted integer identifiers by namespace, for resolving binary edge lists
+        self.node_indices = {}
 
         # Redis client and data for each query
         self.client = client
         self.graphname = graphname
+        # If a SpoolWriter is provided, queries are written to disk instead of Redis.
+        self.spool = spool
+
+        # Optional EncodingCache holding the encoded entities of previous loads,
+        # and the (cache key, first ID, node count) of every label file processed so far.
+        self.cache = cache
+        self.segments = []
+
+        # Optional LoadProfiler running the processing of each input file under cProfile
+        self.profiler = None
+        # Optional LoadSketches summarizing the values and degrees of the loaded entities
+        self.sketches = None
+
+        # Optional Checkpoint journaling acknowledged batches, and the position of the last
+        # entity added to the buffer: the processing index of its input file, and how many
+        # entities of that file were added (None once the whole file has been added).
+        self.checkpoint = checkpoint
+        # Set once a query fails, so that queries queued behind it are never sent.
+        self.failed = threading.Event()
+        self.entity_index = -1
+        self.filename = None
+        self.position = None
 
         # Create a node dictionary if we're building relations and as such require unique identifiers
         if config.store_node_identifiers:
@@ -22,8 +94,7 @@ class QueryBuffer:
         else:
             self.nodes = None
 
-        # Sizes for buffer currently being constructed
-        self.redis_token_count = 0
+        # Size of buffer currently being constructed
         self.buffer_size = 0
 
         # The first query should include a "BEGIN" token
@@ -39,8 +110,24 @@ class QueryBuffer:
         self.nodes_created = 0  # Total number of nodes created
         self.relations_created = 0  # Total number of relations created
 
+        # Memory accounting; a budget of 0 disables backpressure.
+        self.memory_budget = config.memory_budget
+        self.inflight_size = 0  # Bytes sent to Redis but not yet acknowledged
+
+        # Adapt buffer sizes to the observed latency of each query if requested.
+        self.batch_sizer = BatchSizer(config) if config.target_latency else None
+        self.batch_start = timer()
+
+        # Per-stage timings, which can be written as a JSON report
+        self.report = LoadReport(graphname)
+        # Estimates of the memory held by the ID map and pending queries
+        self.memory = MemoryMonitor(self)
+        self.report.memory = self.memory
+        # Observers of the load's progress
+        self.events = EventDispatcher()
+
         self.pool = Pool(nodes=1)
-        self.tasks = []
+        self.tasks = []  # Pending Batch objects in submission order
 
     def send_buffer(self):
         """Send all pending inserts to Redis"""
@@ -58,8 +145,36 @@ class QueryBuffer:
             args.insert(0, "BEGIN")
             self.initial_query = False
 
-        task = self.pool.apipe(run, self.client, self.graphname, args)
-        self.add_task(task)
+        batch_size = sum(len(token) for token in self.labels) + sum(
+            len(token) for token in self.reltypes
+        )
+        if self.checkpoint:
+            # Journaled before sending, as Redis may apply it even if its reply is lost.
+            self.checkpoint.sent(self)
+        if self.spool:
+            task = self.pool.apipe(self.spool.write_batch, args)
+        else:
+            task = self.pool.apipe(run, self.client, self.graphname, args, self.failed)
+        batch = Batch(
+            task,
+            batch_size,
+            self.node_count + self.relation_count,
+            timer() - self.batch_start,
+            self,
+        )
+        self.memory.sample()
+        self.events.emit(
+            "batch_sent",
+            {
+                "query": batch.index,
+                "file": batch.file_report.index if batch.file_report else None,
+                "rows": batch.rows,
+                "bytes": batch.size,
+                "tokens": batch.tokens,
+            },
+        )
+        self.add_task(batch)
+        self.batch_start = timer()
 
         self.clear_buffer()
 
@@ -68,23 +183,72 @@ class QueryBuffer:
         del self.labels[:]
         del self.reltypes[:]
 
-        self.redis_token_count = 0
         self.buffer_size = 0
         self.node_count = 0
         self.relation_count = 0
 
-    def add_task(self, task):
-        self.tasks.append(task)
-        if len(self.tasks) == 5:
-            task = self.tasks.pop(0)
-            stats = task.get()
-            self.update_stats(stats)
+    @property
+    def redis_token_count(self):
+        """Number of binary tokens in the buffer currently being constructed"""
+        return len(self.labels) + len(self.reltypes)
+
+    def memory_exhausted(self, pending_size, pending_rows):
+        """Return True if the entity currently being encoded should be flushed to
+        stay within the memory budget. pending_size is the size of its encoded rows
+        and pending_rows their count."""
+        if not self.memory_budget:
+            return False
+        # Flushing joins the pending rows into a single token, briefly doubling them.
+        encoder_size = self.buffer_size + 2 * pending_size + pending_rows * ROW_OVERHEAD
+        return self.inflight_size + encoder_size >= self.memory_budget
+
+    def add_task(self, batch):
+        self.tasks.append(batch)
+        self.inflight_size += batch.size
+        # Block until the oldest queries complete if too many are pending,
+        # or if in-flight batches leave less than half of the memory budget for encoding.
+        start = timer()
+        while len(self.tasks) >= 5 or (
+            self.memory_budget
+            and len(self.tasks) > 0
+            and self.inflight_size > self.memory_budget // 2
+        ):
+            self.wait_task()
+        self.report.add_queue_wait(timer() - start)
+
+    def wait_task(self):
+        batch = self.tasks.pop(0)
+        stats, transfer_time, server_time = batch.task.get()
+        self.inflight_size -= batch.size
+        self.update_stats(stats)
+        self.report.record_query(batch, stats, transfer_time, server_time)
+        self.events.emit("batch_acknowledged", self.report.queries[-1])
+        if self.checkpoint:
+            self.checkpoint.record(batch, self)
+        if self.batch_sizer:
+            self.batch_sizer.record(
+                batch.rows, batch.encode_time, transfer_time, server_time
+            )
 
     def wait_pool(self):
-        for task in self.tasks:
-            stats = task.get()
-            self.update_stats(stats)
-        self.tasks.clear()
+        start = timer()
+        while self.tasks:
+            self.wait_task()
+        self.report.drain_time += timer() - start
+
+    def start_entity(self, entity):
+        """Track the input file whose entities are being added to the buffer"""
+        self.entity_index += 1
+        self.filename = entity.filename
+        self.report.start_file(entity)
+        self.memory.start_file(entity)
+        self.events.emit("file_started", self.report.current)
+
+    def resume(self, checkpoint):
+        """Continue the graph built by an interrupted load"""
+        self.initial_query = False
+        self.nodes_created = checkpoint.nodes_created
+        self.relations_created = checkpoint.relations_created
 
     def update_stats(self, stats):
         self.nodes_created += int(stats[0].split(" ".encode())[0])
@@ -95,3 +259,7 @@ class QueryBuffer:
             "Construction of graph '%s' complete: %d nodes created, %d relations created in %f seconds"
             % (self.graphname, self.nodes_created, self.relations_created, runtime)
         )
+        if not self.spool:
+            self.report.print_latencies()
+        if self.batch_sizer:
+            self.batch_sizer.report()
@@ -1,23 +1,28 @@
 import re
 import struct
+from timeit import default_timer as timer
 
 import click
 
+from . import binary_input
 from .entity_file import EntityFile, Type
 from .exceptions import CSVError, SchemaError
 
 
 # Handler class for processing relation csv files.
 class RelationType(EntityFile):
-    def __init__(self, query_buffer, infile, type_str, config):
-        super(RelationType, self).__init__(infile, type_str, config)
+    def __init__(
+        self, query_buffer, infile, type_str, config, header=None, template=None
+    ):
+        super(RelationType, self).__init__(infile, type_str, config, header, template)
         self.query_buffer = query_buffer
+        self.first_edge = 0  # Binary edge lists only: position of the next edge to add
 
     def process_schemaless_header(self, header):
         if self.column_count < 2:
             raise CSVError(
                 "Relation file '%s' should have at least 2 elements in header line."
-                % (self.infile.name)
+                % (self.filename)
             )
         # The first column is the source ID and the second is the destination ID.
         self.start_id = 0
@@ -33,12 +38,12 @@ class RelationType(EntityFile):
         if self.types.count(Type.START_ID) != 1:
             raise SchemaError(
                 "Relation file '%s' should have exactly one START_ID column."
-                % (self.infile.name)
+                % (self.filename)
             )
         if self.types.count(Type.END_ID) != 1:
             raise SchemaError(
                 "Relation file '%s' should have exactly one END_ID column."
-                % (self.infile.name)
+                % (self.filename)
             )
 
         self.start_id = self.types.index(Type.START_ID)
@@ -53,31 +58,104 @@ class RelationType(EntityFile):
         if end_match:
             self.end_namespace = end_match.group(1)
 
+    def resolve_endpoints(self, row):
+        """Return the node IDs of a relation's source and destination"""
+        # IDs read from typed inputs are converted to match the same IDs in CSV files.
+        start_id = str(row[self.start_id])
+        if self.start_namespace:
+            start_id = self.start_namespace + "." + start_id
+        end_id = str(row[self.end_id])
+        if self.end_namespace:
+            end_id = self.end_namespace + "." + end_id
+
+        return self.query_buffer.nodes[start_id], self.query_buffer.nodes[end_id]
+
+    def restore(self, count=None):
+        """Skip the first count entities of this file, or all of them if count is None,
+        after they were sent by an interrupted load."""
+        if count is None:
+            return
+        self.open()
+        if self.input_format == "edges":
+            self.first_edge = count
+            if self.config.skip_invalid_edges:
+                self.first_edge = binary_input.edge_offset(
+                    self.reader.blocks(), *self.edge_indices(), count
+                )
+            self.entities_sent = count
+            return
+        skipped = 0
+        while skipped < count:
+            row = next(self.reader)
+            if self.config.skip_invalid_edges:
+                # Rows with invalid endpoints were not sent and don't count.
+                try:
+                    self.resolve_endpoints(row)
+                except KeyError:
+                    continue
+            skipped += 1
+        # The remaining entities will be processed from the current position.
+        self.entities_sent = count
+
     def process_entities(self):
+        # Files partially sent by an interrupted load and streams don't use the cache.
+        # Endpoints resolved with --skip-invalid-nodes may point to a different
+        # duplicate in later loads, so such relations are never cached.
+        # Binary edge lists are resolved faster than they could be rebased.
+        cache = self.query_buffer.cache
+        if (
+            self.config.skip_invalid_nodes
+            or self.entities_sent
+            or self.streaming
+            or self.input_format == "edges"
+        ):
+            cache = None
+        rows = None
+        if cache:
+            cache_key = cache.key(self)
+            cached = cache.load(cache_key)
+            if cached:
+                rows = cached.rebase(self.query_buffer.segments)
+        if rows is not None:
+            entities_created = self.process_cached_entities(cached, rows)
+        elif self.input_format == "edges":
+            entities_created = self.process_edge_blocks()
+        else:
+            writer = cache.writer(cache_key) if cache else None
+            try:
+                entities_created = self.process_input_entities(writer)
+            except BaseException:
+                if writer:
+                    writer.abort()
+                raise
+        self.query_buffer.reltypes.append(self.to_binary())
+        self.query_buffer.report.current.entities += entities_created
+        print(
+            "%d relations created for type '%s'" % (entities_created, self.entity_str)
+        )
+
+    def process_input_entities(self, writer):
         entities_created = 0
-        with click.progressbar(
-            self.reader,
-            length=self.entities_count,
-            label=self.entity_str,
-            update_min_steps=100,
-        ) as reader:
+        skipped = 0
+        report = self.query_buffer.report
+        timed = report.time_rows
+        # Encoding includes adding entities to the buffer, but not the send queue waits that may cause.
+        queue_wait = report.queue_wait()
+        read_time = encode_time = id_map_time = 0.0
+        start = timer()
+        self.open()
+        with self.progressbar() as reader:
             for row in reader:
+                if timed:
+                    read = timer()
                 self.validate_row(row)
                 try:
-                    start_id = row[self.start_id]
-                    if self.start_namespace:
-                        start_id = self.start_namespace + "." + str(start_id)
-                    end_id = row[self.end_id]
-                    if self.end_namespace:
-                        end_id = self.end_namespace + "." + str(end_id)
-
-                    src = self.query_buffer.nodes[start_id]
-                    dest = self.query_buffer.nodes[end_id]
+                    src, dest = self.resolve_endpoints(row)
                 except KeyError as e:
                     print(
                         "%s:%d Relationship specified a non-existent identifier. src: %s; dest: %s"
                         % (
-                            self.infile.name,
+                            self.filename,
                             self.reader.line_num - 1,
                             row[self.start_id],
                             row[self.end_id],
@@ -85,35 +163,149 @@ class RelationType(EntityFile):
                     )
                     if self.config.skip_invalid_edges is False:
                         raise e
+                    skipped += 1
+                    if timed:
+                        end = timer()
+                        read_time += read - start
+                        id_map_time += end - read
+                        start = end
                     continue
+                if timed:
+                    resolved = timer()
                 fmt = "=QQ"  # 8-byte unsigned ints for src and dest
                 try:
                     row_binary = struct.pack(fmt, src, dest) + self.pack_props(row)
                 except SchemaError as e:
                     raise SchemaError(
-                        "%s:%d %s" % (self.infile.name, self.reader.line_num, str(e))
+                        "%s:%d %s" % (self.filename, self.reader.line_num, str(e))
                     )
-                row_binary_len = len(row_binary)
-                # If the addition of this entity will make the binary token grow too large,
-                # send the buffer now.
-                added_size = self.binary_size + row_binary_len
-                if (
-                    added_size >= self.config.max_token_size
-                    or self.query_buffer.buffer_size + added_size
-                    >= self.config.max_buffer_size
-                ):
-                    self.query_buffer.reltypes.append(self.to_binary())
-                    self.query_buffer.send_buffer()
-                    self.reset_partial_binary()
-                    # Push the reltype onto the query buffer again, as there are more entities to process.
-                    self.query_buffer.reltypes.append(self.to_binary())
-
+                if writer:
+                    writer.add(row_binary)
+                self.append_entity(row_binary, self.query_buffer.reltypes)
                 self.query_buffer.relation_count += 1
                 entities_created += 1
-                self.binary_size += row_binary_len
-                self.binary_entities.append(row_binary)
-            self.query_buffer.reltypes.append(self.to_binary())
-        self.infile.close()
-        print(
-            "%d relations created for type '%s'" % (entities_created, self.entity_str)
-        )
+                if timed:
+                    end = timer()
+                    read_time += read - start
+                    id_map_time += resolved - read
+                    encode_time += end - resolved
+                    start = end
+        self.close()
+        if timed:
+            read_time += timer() - start
+            encode_time -= report.queue_wait() - queue_wait
+            report.add_times(read_time, encode_time, id_map_time)
+        report.current.skipped += skipped
+
+        if writer:
+            # Skipped relations might become valid once their endpoints are defined,
+            # so files with skipped rows must be encoded again in later loads.
+            if skipped:
+                writer.abort()
+            else:
+                writer.commit(self.query_buffer.segments)
+        return entities_created
+
+    def edge_indices(self):
+        """Return the node indices resolving the source and destination of binary edges"""
+        indices = self.query_buffer.node_indices
+        for namespace in (self.start_namespace, self.end_namespace):
+            if namespace not in indices:
+                indices[namespace] = binary_input.build_index(
+                    self.query_buffer.nodes, namespace
+                )
+        return indices[self.start_namespace], indices[self.end_namespace]
+
+    def process_edge_blocks(self):
+        """Add the relations of a binary edge list, resolving their endpoints a block at a time"""
+        entities_created = 0
+        report = self.query_buffer.report
+        queue_wait = report.queue_wait()
+        read_time = encode_time = id_map_time = 0.0
+        start = timer()
+        sources, destinations = self.edge_indices()
+        id_map_time += timer() - start
+        start = timer()
+        self.open()
+        with click.progressbar(
+            length=self.entities_count - self.first_edge, label=self.entity_str
+        ) as bar:
+            for first, edges in self.reader.blocks(self.first_edge):
+                read = timer()
+                endpoints, invalid = binary_input.resolve_edges(
+                    edges, sources, destinations
+                )
+                resolved = timer()
+                for idx in invalid:
+                    src, dest = edges[idx].tolist()
+                    print(
+                        "%s:%d Relationship specified a non-existent identifier. src: %s; dest: %s"
+                        % (self.filename, first + idx + 1, src, dest)
+                    )
+                    if self.config.skip_invalid_edges is False:
+                        raise KeyError((src, dest))
+                self.append_edges(endpoints)
+                entities_created += len(edges) - len(invalid)
+                report.current.skipped += len(invalid)
+                bar.update(len(edges))
+                end = timer()
+                read_time += read - start
+                id_map_time += resolved - read
+                encode_time += end - resolved
+                start = end
+        self.close()
+        read_time += timer() - start
+        encode_time -= report.queue_wait() - queue_wait
+        report.add_times(read_time, encode_time, id_map_time)
+        return entities_created
+
+    def append_edges(self, endpoints):
+        """Add the encoded endpoints of a block of relations without properties,
+        flushing the query buffer as append_entity would."""
+        row_size = binary_input.ENDPOINTS_SIZE
+        block = memoryview(endpoints)
+        while block:
+            # Number of relations that fit within the token and buffer sizes
+            room = min(
+                self.config.max_token_size - self.binary_size,
+                self.config.max_buffer_size
+                - self.query_buffer.buffer_size
+                - self.binary_size,
+            )
+            count = min(max(room - 1, 0) // row_size, len(block) // row_size)
+            while count and self.query_buffer.memory_exhausted(
+                self.binary_size + count * row_size, self.binary_count + count
+            ):
+                count //= 2
+            if count == 0:
+                if self.binary_count or self.query_buffer.buffer_size:
+                    self.flush_binary(self.query_buffer.reltypes)
+                    continue
+                # A relation that exceeds the limits on its own is sent by itself.
+                count = 1
+            end = count * row_size
+            self.binary_entities.append(bytes(block[:end]))
+            self.binary_size += end
+            self.binary_count += count
+            # Relations are counted as they are added, as a flush may follow.
+            self.query_buffer.relation_count += count
+            block = block[end:]
+
+    def process_cached_entities(self, cached, rows):
+        """Add the entities of a previous encoding of this file, skipping the input file.
+        rows iterates over the entities, with their endpoints rebased."""
+        report = self.query_buffer.report
+        queue_wait = report.queue_wait()
+        began = timer()
+        with click.progressbar(
+            rows,
+            length=len(cached.offsets),
+            label=self.entity_str + " (cached)",
+            update_min_steps=100,
+        ) as entities:
+            for row_binary in entities:
+                self.append_entity(row_binary, self.query_buffer.reltypes)
+                self.query_buffer.relation_count += 1
+        # Reading the cache stands in for reading and encoding the input file.
+        report.add_times(read=timer() - began - (report.queue_wait() - queue_wait))
+        return len(cached.offsets)
@@ -0,0 +1,184 @@
+import csv
+import json
+from timeit import default_timer as timer
+
+# Stages of a load:
+# read: reading and parsing rows of the input files
+# encode: encoding entities and adding them to the query buffer
+# id_map: storing and resolving node identifiers
+# queue_wait: waiting for pending queries while the send queue is full
+# transfer: writing queries to the socket (or to the spool)
+# server: waiting for Redis to process each query and reply
+# The transfer and server stages run on the sending thread, overlapping the others.
+STAGES = ("read", "encode", "id_map", "queue_wait", "transfer", "server")
+
+# Columns of the per-query timeline; times are in seconds since the load started
+TIMELINE_COLUMNS = (
+    "query",
+    "file",
+    "submitted",
+    "started",
+    "finished",
+    "rows",
+    "bytes",
+    "tokens",
+    "queued",
+    "transfer",
+    "server",
+    "round_trip",
+    "nodes_created",
+    "relations_created",
+)
+LATENCY_PERCENTILES = (50, 90, 99)
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of a sorted list"""
+    rank = max(0, -(-len(values) * pct // 100) - 1)
+    return values[min(rank, len(values) - 1)]
+
+
+class FileReport:
+    """Time spent on each stage of loading an input file"""
+
+    def __init__(self, entity, index):
+        self.index = index  # Position in processing order
+        self.filename = entity.filename
+        self.entity_type = type(entity).__name__
+        self.entity_str = entity.entity_str
+        self.entities = 0
+        self.skipped = 0  # Rows not loaded, such as relations with unknown endpoints
+        self.queries = 0  # Queries ending with entities of this file
+        self.times = dict.fromkeys(STAGES, 0.0)
+
+    def to_dict(self):
+        return {
+            "file": self.filename,
+            "type": self.entity_type,
+            "name": self.entity_str,
+            "entities": self.entities,
+            "skipped": self.skipped,
+            "queries": self.queries,
+            "stages": self.times,
+        }
+
+
+class LoadReport:
+    """Per-stage timings of a load, by input file and by GRAPH.BULK query, which can be
+    written as a JSON report. Row loops accumulate their timings in local variables and
+    add them once per file. Timing costs a few clock reads per row, so row loops only time
+    their stages if time_rows is set, when a report or an observer needs them."""
+
+    def __init__(self, graphname):
+        self.graphname = graphname
+        self.files = []
+        self.current = None  # FileReport of the file being processed
+        self.time_rows = False  # Time the read, encode and id_map stages of every row
+        # Size and timings of every query, in submission order
+        self.queries = []
+        self.drain_time = 0.0  # Time spent waiting for the last queries
+        self.start = timer()
+        self.last_finished = self.start  # When the previous query's reply was read
+        self.memory = None  # Optional MemoryMonitor whose estimates are reported
+        self.sketches = None  # Optional summary of the loaded values and degrees
+
+    def start_file(self, entity):
+        self.current = FileReport(entity, len(self.files))
+        self.files.append(self.current)
+
+    def add_times(self, read=0.0, encode=0.0, id_map=0.0):
+        times = self.current.times
+        times["read"] += read
+        times["encode"] += encode
+        times["id_map"] += id_map
+
+    def queue_wait(self):
+        """Time the current file has spent waiting for the send queue so far"""
+        if self.current is None:
+            return 0.0
+        return self.current.times["queue_wait"]
+
+    def add_queue_wait(self, elapsed):
+        if self.current is not None:
+            self.current.times["queue_wait"] += elapsed
+
+    def record_query(self, batch, stats, transfer_time, server_time):
+        """Record the timings and stats of an acknowledged query"""
+        file_report = batch.file_report
+        if file_report is not None:
+            file_report.queries += 1
+            file_report.times["transfer"] += transfer_time
+            file_report.times["server"] += server_time
+        # Queries are sent one at a time in submission order, so a query starts
+        # once it is submitted and the previous query has completed.
+        started = max(batch.submitted, self.last_finished)
+        self.last_finished = started + transfer_time + server_time
+        self.queries.append(
+            {
+                "query": len(self.queries),
+                "file": file_report.index if file_report else None,
+                "submitted": batch.submitted - self.start,
+                "started": started - self.start,
+                "finished": self.last_finished - self.start,
+                "rows": batch.rows,
+                "bytes": batch.size,
+                "tokens": batch.tokens,
+                "queued": started - batch.submitted,
+                "transfer": transfer_time,
+                "server": server_time,
+                "round_trip": transfer_time + server_time,
+                "nodes_created": int(stats[0].split(b" ")[0]),
+                "relations_created": int(stats[1].split(b" ")[0]),
+            }
+        )
+
+    def print_latencies(self):
+        """Print percentiles of the round trip times of queries"""
+        if not self.queries:
+            return
+        round_trips = sorted(query["round_trip"] for query in self.queries)
+        percentiles = ", ".join(
+            f"p{pct} {percentile(round_trips, pct) * 1000:.1f} ms"
+            for pct in LATENCY_PERCENTILES
+        )
+        print(
+            f"Query round trips: {percentiles}, max {round_trips[-1] * 1000:.1f} ms over {len(round_trips)} queries"
+        )
+
+    def write_timeline(self, path):
+        """Write the timings of every query as CSV, one row per query"""
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, TIMELINE_COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.queries)
+
+    def totals(self):
+        totals = dict.fromkeys(STAGES, 0.0)
+        for file_report in self.files:
+            for stage, elapsed in file_report.times.items():
+                totals[stage] += elapsed
+        return totals
+
+    def to_dict(self, runtime, nodes_created, relations_created):
+        report = {
+            "graph": self.graphname,
+            "runtime": runtime,
+            "nodes_created": nodes_created,
+            "relations_created": relations_created,
+            "stages": self.totals(),
+            "drain": self.drain_time,
+            "files": [file_report.to_dict() for file_report in self.files],
+            "queries": self.queries,
+        }
+        if self.memory is not None:
+            report["memory"] = self.memory.to_dict()
+        if self.sketches is not None:
+            report["sketches"] = self.sketches
+        return report
+
+    def write(self, path, runtime, nodes_created, relations_created):
+        with open(path, "w") as f:
+            json.dump(
+                self.to_dict(runtime, nodes_created, relations_created), f, indent=2
+            )
+            f.write("\n")
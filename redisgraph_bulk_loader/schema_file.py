@@ -0,0 +1,82 @@
+import glob
+import json
+import os
+
+from .exceptions import SchemaError
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+class SchemaEntry:
+    """A label or relation type declared in a schema file, along with its data files"""
+
+    def __init__(self, name, columns, files):
+        self.name = name
+        self.columns = columns  # Header row shared by every data file
+        self.files = files
+
+
+def expand_files(patterns, directory):
+    """Return the data files matching a path or glob pattern, or a list of them.
+    Relative paths are resolved from the schema file's directory."""
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    files = []
+    for pattern in patterns:
+        pattern = os.path.join(directory, pattern)
+        matches = sorted(glob.glob(pattern))
+        if not matches:
+            raise SchemaError(f"No data files match '{pattern}'.")
+        files.extend(matches)
+    return files
+
+
+def parse_entries(schema, key, name_key, directory):
+    entries = []
+    for declaration in schema.get(key, []):
+        try:
+            name = declaration[name_key]
+            columns = declaration["columns"]
+            files = expand_files(declaration["files"], directory)
+        except KeyError as e:
+            raise SchemaError(
+                f"Each entry of '{key}' in the schema file should declare {e}."
+            )
+        if not isinstance(columns, list) or not all(
+            isinstance(column, str) for column in columns
+        ):
+            raise SchemaError(
+                f"The columns of '{name}' should be a list of header fields."
+            )
+        entries.append(SchemaEntry(name, columns, files))
+    return entries
+
+
+def load_schema(path):
+    """Load a JSON or YAML schema file, returning its node and relation entries.
+
+    Each entry names a label or relation type, lists its columns in the format of a
+    CSV header row, and gives the path, glob pattern or list of either of its headerless
+    data files:
+
+        {"nodes": [{"label": "Person", "columns": ["id:ID", "name:STRING"],
+                    "files": "people/part-*.csv"}],
+         "relations": [{"type": "KNOWS", "columns": [":START_ID", ":END_ID"],
+                        "files": ["knows-1.csv", "knows-2.csv"]}]}
+    """
+    with open(path) as f:
+        if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+            if yaml is None:
+                raise ImportError(
+                    f"Reading '{path}' requires PyYAML, which can be installed with 'pip install pyyaml'."
+                )
+            schema = yaml.safe_load(f)
+        else:
+            schema = json.load(f)
+    directory = os.path.dirname(path)
+    nodes = parse_entries(schema, "nodes", "label", directory)
+    relations = parse_entries(schema, "relations", "type", directory)
+    return nodes, relations
@@ -0,0 +1,257 @@
+import array
+import heapq
+import math
+
+from .binary_input import ENDPOINTS_DTYPE
+from .relation_type import RelationType
+
+# Degrees of binary edge lists, which require numpy, are counted a block at a time.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+HLL_PRECISION = 12  # 4096 registers, for a standard error of about 1.6%
+TOP_NODES = 10  # Highest-degree nodes reported for each relationship type
+MASK64 = (1 << 64) - 1
+
+
+class HyperLogLog:
+    """Estimates the number of distinct values added to it in a fixed amount of memory"""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+        self.rank_bits = 64 - precision
+
+    def add(self, value):
+        # Mix the bits of Python's hash, which maps integers to themselves,
+        # with the SplitMix64 finalizer.
+        x = hash(value) & MASK64
+        x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+        x ^= x >> 31
+        idx = x >> self.rank_bits
+        rank = self.rank_bits - (x & ((1 << self.rank_bits) - 1)).bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0**-r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities.
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class ColumnSketch:
+    """Distinct count, null ratio and numeric range of a property column"""
+
+    def __init__(self):
+        self.rows = 0
+        self.nulls = 0
+        self.distinct = HyperLogLog()
+        # Range of the column's values, while all of them are numeric
+        self.numeric = True
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.rows += 1
+        if value is None or value == "":
+            self.nulls += 1
+            return
+        self.distinct.add(value)
+        if not self.numeric:
+            return
+        if isinstance(value, str):
+            try:
+                value = float(value)
+            except ValueError:
+                self.numeric = False
+                return
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            self.numeric = False
+            return
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def to_dict(self):
+        numeric = self.numeric and self.min is not None
+        return {
+            "distinct": self.distinct.count(),
+            "null_ratio": self.nulls / self.rows if self.rows else 0.0,
+            "min": self.min if numeric else None,
+            "max": self.max if numeric else None,
+        }
+
+
+def degree_histogram(degrees):
+    """Count the nodes of each degree in power-of-two buckets: 0, 1, 2-3, 4-7, ..."""
+    buckets = []
+    for degree in degrees:
+        bucket = degree.bit_length()
+        if bucket >= len(buckets):
+            buckets.extend([0] * (bucket + 1 - len(buckets)))
+        buckets[bucket] += 1
+    histogram = {}
+    for bucket, count in enumerate(buckets):
+        low = (1 << bucket) >> 1
+        high = (1 << bucket) - 1
+        histogram[str(low) if low == high else f"{low}-{high}"] = count
+    return histogram
+
+
+class DegreeSketch:
+    """Degrees of every node in the relations of one type. Node IDs are dense, so degrees
+    are counted exactly in arrays of 64-bit counters indexed by node ID."""
+
+    def __init__(self):
+        self.out_degree = array.array("Q")
+        self.in_degree = array.array("Q")
+
+    def reserve(self, node_count):
+        """Extend the counters with zeros to hold the degrees of node_count nodes"""
+        for degrees in (self.out_degree, self.in_degree):
+            if node_count > len(degrees):
+                degrees.frombytes(bytes(degrees.itemsize * (node_count - len(degrees))))
+
+    def add(self, src, dest):
+        if max(src, dest) >= len(self.out_degree):
+            self.reserve(max(src, dest) + 1)
+        self.out_degree[src] += 1
+        self.in_degree[dest] += 1
+
+    def add_block(self, endpoints):
+        """Count the degrees of a block of relations, given their encoded endpoints"""
+        ids = numpy.frombuffer(endpoints, ENDPOINTS_DTYPE).reshape(-1, 2)
+        for degrees, column in ((self.out_degree, 0), (self.in_degree, 1)):
+            counts = numpy.bincount(
+                ids[:, column].astype(numpy.intp), minlength=len(degrees)
+            )
+            self.reserve(len(counts))
+            view = numpy.frombuffer(degrees, numpy.uint64)
+            view += counts.astype(numpy.uint64)
+            # The counters can't be extended while they are viewed.
+            del view
+
+    def to_dict(self, node_count, identifiers):
+        self.reserve(node_count)
+        result = {}
+        for name, degrees in (("out", self.out_degree), ("in", self.in_degree)):
+            top = heapq.nlargest(TOP_NODES, range(len(degrees)), degrees.__getitem__)
+            result[f"{name}_degree"] = {
+                "histogram": degree_histogram(degrees),
+                "top": [
+                    {"id": identifiers.get(node, node), "degree": degrees[node]}
+                    for node in top
+                    if degrees[node]
+                ],
+            }
+        return result
+
+
+class EntitySketch:
+    """Sketches of the input files of one label or relationship type"""
+
+    def __init__(self):
+        self.columns = {}
+        self.degrees = None
+
+    def column(self, name):
+        if name not in self.columns:
+            self.columns[name] = ColumnSketch()
+        return self.columns[name]
+
+
+class LoadSketches:
+    """Sketches of the property values and relationship degrees of a load, which are
+    written to the load report.
+
+    Sketching is enabled per input file by wrapping its pack_props and, for relations,
+    resolve_endpoints, so that loads without sketches run the unmodified row loops."""
+
+    def __init__(self):
+        self.labels = {}
+        self.reltypes = {}
+
+    def attach(self, entity):
+        """Sketch the rows of an input file as they are processed"""
+        is_relation = isinstance(entity, RelationType)
+        entities = self.reltypes if is_relation else self.labels
+        if entity.entity_str not in entities:
+            entities[entity.entity_str] = EntitySketch()
+        sketch = entities[entity.entity_str]
+        columns = [
+            (idx, sketch.column(name))
+            for idx, name in enumerate(entity.column_names)
+            if name
+        ]
+        pack_props = entity.pack_props
+
+        def sketched_pack_props(line):
+            for idx, column in columns:
+                column.add(line[idx])
+            return pack_props(line)
+
+        entity.pack_props = sketched_pack_props
+        if not is_relation:
+            return
+
+        if sketch.degrees is None:
+            sketch.degrees = DegreeSketch()
+        degrees = sketch.degrees
+        # Relations are processed once every node is created, so the counters are
+        # allocated at once.
+        degrees.reserve(entity.query_buffer.top_node_id)
+        resolve_endpoints = entity.resolve_endpoints
+        append_edges = entity.append_edges
+
+        def sketched_resolve_endpoints(row):
+            src, dest = resolve_endpoints(row)
+            degrees.add(src, dest)
+            return src, dest
+
+        def sketched_append_edges(endpoints):
+            # Binary edge lists have no properties, and are resolved a block at a time.
+            degrees.add_block(endpoints)
+            append_edges(endpoints)
+
+        entity.resolve_endpoints = sketched_resolve_endpoints
+        entity.append_edges = sketched_append_edges
+
+    def to_dict(self, node_count, nodes):
+        # Only the identifiers of the highest-degree nodes are looked up.
+        wanted = set()
+        for sketch in self.reltypes.values():
+            for degrees in (sketch.degrees.out_degree, sketch.degrees.in_degree):
+                wanted.update(
+                    heapq.nlargest(TOP_NODES, range(len(degrees)), degrees.__getitem__)
+                )
+        identifiers = {
+            node_id: identifier
+            for identifier, node_id in (nodes or {}).items()
+            if node_id in wanted
+        }
+
+        def properties(sketch):
+            return {name: column.to_dict() for name, column in sketch.columns.items()}
+
+        return {
+            "labels": {
+                name: {"properties": properties(sketch)}
+                for name, sketch in self.labels.items()
+            },
+            "relation_types": {
+                name: dict(
+                    properties=properties(sketch),
+                    **sketch.degrees.to_dict(node_count, identifiers),
+                )
+                for name, sketch in self.reltypes.items()
+            },
+        }
@@ -0,0 +1,109 @@
+import json
+import os
+import struct
+from timeit import default_timer as timer
+
+# Spooled batches are stored back to back in a single data file. Each batch starts with
+# a header holding the node, relation, label token and relation token counts of its
+# GRAPH.BULK query, followed by every token as a length-prefixed binary string.
+BATCH_MAGIC = b"RGBK"
+BATCH_HEADER = struct.Struct("<4sQQII")
+TOKEN_LENGTH = struct.Struct("<Q")
+
+SPOOL_VERSION = 1
+DATA_FILENAME = "batches.spool"
+MANIFEST_FILENAME = "manifest.json"
+
+
+class SpoolWriter:
+    """Writes the GRAPH.BULK queries of a load to a spool directory instead of Redis"""
+
+    def __init__(self, directory, graphname):
+        self.directory = directory
+        self.graphname = graphname
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(os.path.join(directory, MANIFEST_FILENAME)):
+            raise Exception(f"Spool directory '{directory}' already contains a load.")
+        self.outfile = open(os.path.join(directory, DATA_FILENAME), "wb")
+        self.batches = []  # Manifest entry of every batch written
+
+    def write_batch(self, args):
+        """Append a GRAPH.BULK query's arguments to the spool.
+        Returns the same stats and timings as query_buffer.run."""
+        start = timer()
+        # The replaying loader is responsible for the BEGIN token.
+        if args[0] == "BEGIN":
+            args = args[1:]
+        node_count, relation_count, label_count, reltype_count = args[:4]
+        tokens = args[4:]
+
+        offset = self.outfile.tell()
+        self.outfile.write(
+            BATCH_HEADER.pack(
+                BATCH_MAGIC, node_count, relation_count, label_count, reltype_count
+            )
+        )
+        for token in tokens:
+            self.outfile.write(TOKEN_LENGTH.pack(len(token)))
+            self.outfile.write(token)
+
+        self.batches.append(
+            {
+                "offset": offset,
+                "size": self.outfile.tell() - offset,
+                "nodes": node_count,
+                "relations": relation_count,
+                "labels": label_count,
+                "reltypes": reltype_count,
+            }
+        )
+        stats = [
+            b"%d nodes created" % node_count,
+            b"%d relations created" % relation_count,
+        ]
+        return stats, timer() - start, 0.0
+
+    def close(self, index=(), full_text_index=()):
+        """Finish the data file and write the manifest describing it"""
+        self.outfile.close()
+        manifest = {
+            "version": SPOOL_VERSION,
+            "graph": self.graphname,
+            "data": DATA_FILENAME,
+            "nodes": sum(batch["nodes"] for batch in self.batches),
+            "relations": sum(batch["relations"] for batch in self.batches),
+            "index": list(index),
+            "full_text_index": list(full_text_index),
+            "batches": self.batches,
+        }
+        with open(os.path.join(self.directory, MANIFEST_FILENAME), "w") as f:
+            json.dump(manifest, f, indent=1)
+
+
+def load_manifest(directory):
+    with open(os.path.join(directory, MANIFEST_FILENAME)) as f:
+        manifest = json.load(f)
+    if manifest["version"] != SPOOL_VERSION:
+        raise Exception(
+            f"Unsupported spool version {manifest['version']} in '{directory}'."
+        )
+    return manifest
+
+
+def iter_batches(manifest, data):
+    """Yield each spooled batch's manifest entry along with its label and relation tokens.
+    Tokens are slices of data, a memoryview over the spool data file, and are not copied."""
+    for batch in manifest["batches"]:
+        offset = batch["offset"]
+        magic, _, _, label_count, reltype_count = BATCH_HEADER.unpack_from(data, offset)
+        if magic != BATCH_MAGIC:
+            raise Exception(f"Corrupt spool data at offset {offset}.")
+        offset += BATCH_HEADER.size
+        tokens = []
+        for _ in range(label_count + reltype_count):
+            (length,) = TOKEN_LENGTH.unpack_from(data, offset)
+            offset += TOKEN_LENGTH.size
+            end = offset + length
+            tokens.append(data[offset:end])
+            offset = end
+        yield batch, tokens[:label_count], tokens[label_count:]
@@ -0,0 +1,104 @@
+import os
+import socket
+
+import redis
+from redis.exceptions import ConnectionError, TimeoutError
+
+# Arguments smaller than this are copied into the surrounding RESP framing,
+# larger ones are sent directly from their own buffer (same cutoff as redis-py).
+BUFFER_CUTOFF = 6000
+
+# Maximum number of buffers accepted by a single sendmsg call.
+try:
+    IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 1024
+
+
+def pack_command(*args):
+    """Pack a command into a list of buffers holding its RESP encoding.
+    Large binary arguments are referenced by memoryviews rather than copied."""
+    buffers = []
+    framing = bytearray(b"*%d\r\n" % len(args))
+    for arg in args:
+        if isinstance(arg, (bytes, bytearray, memoryview)):
+            view = memoryview(arg).cast("B")
+        else:
+            view = memoryview(str(arg).encode())
+        framing += b"$%d\r\n" % view.nbytes
+        if view.nbytes < BUFFER_CUTOFF:
+            framing += view
+        else:
+            # Close the current framing chunk and reference the argument in place.
+            buffers.append(framing)
+            buffers.append(view)
+            framing = bytearray()
+        framing += b"\r\n"
+    buffers.append(framing)
+    return buffers
+
+
+def sendmsg_all(sock, buffers):
+    """Write all buffers to the socket using scatter/gather sends."""
+    if not hasattr(sock, "sendmsg"):
+        # Platforms without sendmsg fall back to one send per buffer.
+        for buf in buffers:
+            sock.sendall(buf)
+        return
+
+    views = [memoryview(buf) for buf in buffers]
+    start = 0
+    while start < len(views):
+        end = start + IOV_MAX
+        sent = sock.sendmsg(views[start:end])
+        # Skip all fully-written buffers and trim the partially-written one.
+        while start < len(views) and sent >= views[start].nbytes:
+            sent -= views[start].nbytes
+            start += 1
+        if sent:
+            views[start] = views[start][sent:]
+
+
+class ZeroCopyConnection(redis.Connection):
+    """Redis connection that writes each command with socket.sendmsg over the
+    RESP framing and argument buffers, without joining them into a single payload."""
+
+    def send_command(self, *args, **kwargs):
+        self.send_packed_command(
+            pack_command(*args), check_health=kwargs.get("check_health", True)
+        )
+
+    def send_packed_command(self, command, check_health=True):
+        if not self._sock:
+            self.connect()
+        # guard against health check recursion
+        if check_health:
+            self.check_health()
+        if isinstance(command, str):
+            command = [command.encode()]
+        try:
+            sendmsg_all(self._sock, command)
+        except socket.timeout:
+            self.disconnect()
+            raise TimeoutError("Timeout writing to socket")
+        except OSError as e:
+            self.disconnect()
+            if len(e.args) == 1:
+                errno, errmsg = "UNKNOWN", e.args[0]
+            else:
+                errno = e.args[0]
+                errmsg = e.args[1]
+            raise ConnectionError(f"Error {errno} while writing to socket. {errmsg}.")
+        except BaseException:
+            # A partially-written command leaves the connection unusable.
+            self.disconnect()
+            raise
+
+
+def from_url(redis_url):
+    """Build a Redis client whose connections use ZeroCopyConnection.
+    Only plain TCP (redis://) URLs are supported, as TLS sockets cannot use sendmsg."""
+    if not redis_url.startswith("redis://"):
+        raise Exception("Zero-copy sends require a 'redis://' connection URL.")
+    pool = redis.ConnectionPool.from_url(redis_url, connection_class=ZeroCopyConnection)
+    return redis.Redis(connection_pool=pool)
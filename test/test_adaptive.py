@@ -0,0 +1,45 @@
+from redisgraph_bulk_loader.adaptive import MIN_BUFFER_SIZE, MIN_TOKEN_COUNT, BatchSizer
+from redisgraph_bulk_loader.config import Config
+
+
+class TestBatchSizer:
+    def test_shrink_on_slow_queries(self):
+        """Verify that buffer sizes shrink when queries exceed the target latency."""
+        config = Config(max_buffer_size=64, max_token_size=64, target_latency=100)
+        sizer = BatchSizer(config)
+        sizer.record(1000, 0.1, 0.01, 0.4)
+        # The shrink factor is limited to one half per query.
+        assert config.max_buffer_size == 32_000_000
+        assert config.max_token_size == 32_000_000
+
+        for _ in range(20):
+            sizer.record(1000, 0.1, 0.01, 10)
+        assert config.max_buffer_size == MIN_BUFFER_SIZE
+
+    def test_grow_on_fast_queries(self):
+        """Verify that buffer sizes grow while queries are fast and throughput improves."""
+        config = Config(max_buffer_size=2, max_token_size=2, target_latency=100)
+        sizer = BatchSizer(config)
+        sizer.record(1000, 0.01, 0.001, 0.01)
+        assert config.max_buffer_size == 3_000_000
+
+        # Throughput dropped after growing, so the previous size is restored.
+        sizer.record(100, 0.01, 0.001, 0.01)
+        assert config.max_buffer_size == 2_000_000
+        # Growth is capped below the size that reduced throughput.
+        sizer.record(1000, 0.01, 0.001, 0.01)
+        assert config.max_buffer_size == 2_000_000
+
+    def test_small_token_count(self):
+        """Verify that a token count set below the usual minimum is not raised to it."""
+        config = Config(max_token_count=4, target_latency=100)
+        sizer = BatchSizer(config)
+        for _ in range(5):
+            sizer.record(1000, 0.1, 0.01, 10)
+        assert config.max_token_count == 4
+
+        config = Config(target_latency=100)
+        sizer = BatchSizer(config)
+        for _ in range(30):
+            sizer.record(1000, 0.1, 0.01, 10)
+        assert config.max_token_count == MIN_TOKEN_COUNT
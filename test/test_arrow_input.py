@@ -0,0 +1,116 @@
+import os
+import struct
+
+import pytest
+
+from redisgraph_bulk_loader.config import Config
+from redisgraph_bulk_loader.entity_file import Type
+from redisgraph_bulk_loader.exceptions import SchemaError
+from redisgraph_bulk_loader.label import Label
+from redisgraph_bulk_loader.relation_type import RelationType
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+class TestArrowInput:
+    @classmethod
+    def teardown_class(cls):
+        """Delete temporary files"""
+        os.remove("/tmp/Person.parquet")
+        os.remove("/tmp/KNOWS.arrow")
+        os.remove("/tmp/Address.parquet")
+        os.remove("/tmp/Address.csv")
+
+    def test_parquet_label(self):
+        """Verify that Parquet values are encoded according to their column types."""
+        table = pa.table(
+            {
+                "_id": pa.array([10, 11], pa.int32()),
+                "name": ["Alice", None],
+                "age": pa.array([33.5, 40.0]),
+                "active": [True, False],
+                "tags": pa.array([[1, 2], []], pa.list_(pa.int64())),
+            }
+        )
+        pq.write_table(table, "/tmp/Person.parquet")
+
+        label = Label(None, "/tmp/Person.parquet", None, Config())
+        assert label.entity_str == "Person"
+        assert label.column_names == [None, "name", "age", "active", "tags"]
+        # The row count is read from the file's metadata.
+        assert label.entities_count == 2
+
+        label.open()
+        row = next(label.reader)
+        assert label.node_identifier(row) == "10"
+        assert label.pack_props(row) == (
+            struct.pack("=B6s", Type.STRING.value, b"Alice")
+            + struct.pack("=Bd", Type.DOUBLE.value, 33.5)
+            + struct.pack("=B?", Type.BOOL.value, True)
+            + struct.pack("=Bq", Type.ARRAY.value, 2)
+            + struct.pack("=Bq", Type.LONG.value, 1)
+            + struct.pack("=Bq", Type.LONG.value, 2)
+        )
+        # Nulls are encoded as missing properties.
+        row = next(label.reader)
+        assert label.pack_props(row)[:1] == b"\x00"
+        label.close()
+
+    def test_arrow_ipc_relation_with_schema(self):
+        """Verify that typed columns of an Arrow IPC file take their types from its schema."""
+        table = pa.table(
+            {
+                ":START_ID(User)": ["a", "b"],
+                ":END_ID(User)": ["b", "a"],
+                "since": pa.array([2020, 2021], pa.int16()),
+            }
+        )
+        with pa.ipc.new_file("/tmp/KNOWS.arrow", table.schema) as writer:
+            writer.write_table(table)
+
+        config = Config(enforce_schema=True)
+        reltype = RelationType(None, "/tmp/KNOWS.arrow", None, config)
+        assert reltype.types == [Type.START_ID, Type.END_ID, Type.LONG]
+        assert reltype.start_namespace == "User"
+        assert reltype.column_names == [None, None, "since"]
+        assert reltype.entities_count == 2
+
+    def test_declared_types(self):
+        """Verify that columns declaring a type are encoded as the same CSV file would be."""
+        table = pa.table(
+            {
+                "id:ID": [1, 2],
+                "zip:STRING": [2100, 2200],
+                "street": ["Main", "High"],
+                "code:LONG": ["x", "7"],
+            }
+        )
+        pq.write_table(table, "/tmp/Address.parquet")
+        with open("/tmp/Address.csv", "w") as f:
+            f.write("id:ID,zip:STRING,street:STRING,code:LONG\n")
+            f.write("1,2100,Main,x\n")
+            f.write("2,2200,High,7\n")
+
+        config = Config(enforce_schema=True, store_node_identifiers=True)
+        parquet = Label(None, "/tmp/Address.parquet", None, config)
+        csv = Label(None, "/tmp/Address.csv", None, config)
+        assert parquet.types == csv.types
+        assert parquet.packed_header == csv.packed_header
+
+        parquet.open()
+        csv.open()
+        # Values that can't be converted to their declared type are rejected.
+        with pytest.raises(SchemaError):
+            parquet.pack_props(next(parquet.reader))
+        with pytest.raises(SchemaError):
+            csv.pack_props(next(csv.reader))
+        parquet_row = next(parquet.reader)
+        csv_row = next(csv.reader)
+        assert parquet.node_identifier(parquet_row) == csv.node_identifier(csv_row)
+        assert parquet.pack_props(parquet_row) == csv.pack_props(csv_row)
+        assert parquet.pack_props(parquet_row)[:9] == struct.pack(
+            "=B2s", Type.STRING.value, b"2"
+        ) + struct.pack("=B5s", Type.STRING.value, b"2200")
+        parquet.close()
+        csv.close()
@@ -0,0 +1,62 @@
+import json
+import os
+
+from click.testing import CliRunner
+
+from redisgraph_bulk_loader.benchmark import Benchmark, bulk_benchmark, compare
+
+RESULTS_PATH = "/tmp/benchmark.json"
+
+
+class TestBenchmark:
+    @classmethod
+    def teardown_class(cls):
+        """Delete temporary files"""
+        os.remove(RESULTS_PATH)
+
+    def test_cases(self):
+        """Verify that the selected cases are timed per operation."""
+        results = Benchmark(rows=50, repeat=2, seed=0, pattern="ARRAY4").run()
+        assert sorted(results) == [
+            "array_prop_to_binary/ARRAY4",
+            "inferred_prop_to_binary/ARRAY4",
+            "typed_prop_to_binary/ARRAY4",
+        ]
+        for result in results.values():
+            assert result["ops"] == 50
+            assert len(result["runs"]) == 2
+            assert result["ns_per_op"] == min(result["runs"]) / 50 * 1e9
+
+        # Full processing loops include relation files, whose nodes are not timed.
+        results = Benchmark(rows=50, repeat=1, seed=0, pattern="process").run()
+        assert sorted(results) == [
+            "process_entities/Label/inferred/4",
+            "process_entities/Label/typed/4",
+            "process_entities/RelationType/inferred/2",
+        ]
+
+    def test_compare(self):
+        """Verify that cases slower than the baseline beyond the tolerance are reported."""
+        baseline = {"a": {"ns_per_op": 100.0}, "b": {"ns_per_op": 100.0}}
+        results = {
+            "a": {"ns_per_op": 105.0},
+            "b": {"ns_per_op": 120.0},
+            "c": {"ns_per_op": 1000.0},
+        }
+        assert compare(results, baseline, 0.1) == ["b"]
+
+    def test_baseline(self):
+        """Verify that a run compared against its own results passes."""
+        runner = CliRunner()
+        args = ["--rows", 20, "--repeat", 1, "--filter", "typed_prop_to_binary/LONG"]
+        res = runner.invoke(bulk_benchmark, args + ["--output", RESULTS_PATH])
+        assert res.exit_code == 0, res.output
+        with open(RESULTS_PATH) as f:
+            assert list(json.load(f)["results"]) == ["typed_prop_to_binary/LONG"]
+
+        # Any slowdown is tolerated.
+        res = runner.invoke(
+            bulk_benchmark, args + ["--baseline", RESULTS_PATH, "--tolerance", 1e9]
+        )
+        assert res.exit_code == 0, res.output
+        assert "typed_prop_to_binary/LONG" in res.output
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from redisgraph_bulk_loader.config import Config
+from redisgraph_bulk_loader.exceptions import CSVError
+from redisgraph_bulk_loader.label import Label
+from redisgraph_bulk_loader.relation_type import RelationType
+
+numpy = pytest.importorskip("numpy")
+binary_input = pytest.importorskip("redisgraph_bulk_loader.binary_input")
+
+
+class TestBinaryInput:
+    @classmethod
+    def teardown_class(cls):
+        """Delete temporary files"""
+        os.remove("/tmp/KNOWS.npy")
+        os.remove("/tmp/KNOWS.bin")
+
+    def test_resolve_edges(self):
+        """Verify that edge endpoints are resolved through the node identifier map in blocks."""
+        nodes = {"10": 0, "NS.3": 1, "7": 2, "name": 3}
+        index = binary_input.build_index(nodes, None)
+        # Identifiers of other namespaces and non-integer identifiers are left out.
+        assert index[0].tolist() == [7, 10]
+        assert index[1].tolist() == [2, 0]
+
+        edges = numpy.array([[10, 7], [7, 3], [7, 10]], dtype="<i8")
+        endpoints, invalid = binary_input.resolve_edges(edges, index, index)
+        assert numpy.frombuffer(endpoints, "<u8").tolist() == [0, 2, 2, 0]
+        assert invalid == [1]
+
+        namespaced = binary_input.build_index(nodes, "NS")
+        endpoints, invalid = binary_input.resolve_edges(edges, index, namespaced)
+        assert numpy.frombuffer(endpoints, "<u8").tolist() == [2, 1]
+        assert invalid == [0, 2]
+
+    def test_edge_files(self):
+        """Verify that .npy arrays and raw int64 pairs are read as relation files."""
+        edges = numpy.array([[1, 2], [2, 3], [3, 1]], dtype=numpy.int32)
+        numpy.save("/tmp/KNOWS.npy", edges)
+        edges.astype("<i8").tofile("/tmp/KNOWS.bin")
+
+        for filename in ("/tmp/KNOWS.npy", "/tmp/KNOWS.bin"):
+            reltype = RelationType(None, filename, None, Config(enforce_schema=True))
+            assert reltype.entity_str == "KNOWS"
+            assert reltype.prop_count == 0
+            assert reltype.entities_count == 3
+            reltype.open()
+            blocks = list(reltype.reader.blocks(1))
+            reltype.close()
+            assert len(blocks) == 1
+            assert blocks[0][0] == 1
+            assert blocks[0][1].tolist() == [[2, 3], [3, 1]]
+
+        with pytest.raises(CSVError):
+            Label(None, "/tmp/KNOWS.npy", None, Config())
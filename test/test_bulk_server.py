@@ -0,0 +1,180 @@
+import os
+import struct
+
+import redis
+from click.testing import CliRunner
+
+from redisgraph_bulk_loader.bulk_insert import bulk_insert
+from redisgraph_bulk_loader.bulk_server import BulkServer, DecodedToken
+from redisgraph_bulk_loader.config import Config
+from redisgraph_bulk_loader.label import Label
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), "..", "example")
+
+
+class TestBulkServer:
+    @classmethod
+    def teardown_class(cls):
+        """Delete temporary files"""
+        os.remove("/tmp/Person.csv")
+
+    def test_decode_label(self):
+        """Verify that a label token is decoded as it was encoded by pack_props."""
+        with open("/tmp/Person.csv", "w") as f:
+            f.write("id,name,score,tags,active\n")
+            f.write("0,Alice,1.5,['a'],true\n")
+            f.write("1,Bob,,[],false\n")
+
+        label = Label(None, "/tmp/Person.csv", None, Config())
+        label.open()
+        for row in label.reader:
+            label.binary_entities.append(label.pack_props(row))
+        label.close()
+
+        token = DecodedToken(label.to_binary(), False, keep_entities=True)
+        assert token.name == "Person"
+        assert token.keys == ["id", "name", "score", "tags", "active"]
+        assert token.count == 2
+        assert token.entities == [
+            {"id": 0, "name": "Alice", "score": 1.5, "tags": ["a"], "active": True},
+            {"id": 1, "name": "Bob", "tags": [], "active": False},
+        ]
+
+    def test_validate_queries(self):
+        """Verify that queries RedisGraph would reject are replied to with errors."""
+        server = BulkServer()
+        relation = b"KNOWS\0" + b"\0\0\0\0" + (b"\1" + b"\0" * 7) * 2
+        node = b"Person\0" + b"\0\0\0\0"
+        people = b"Person\0\1\0\0\0age\0" + struct.pack("=Bq", 4, 30) * 2
+        # Graphs are created by a query with a BEGIN token.
+        reply = server.execute([b"GRAPH.BULK", b"g", b"0", b"1", b"0", b"1", relation])
+        assert reply.startswith(b"-ERR")
+        # Relations can't refer to nodes that haven't been created.
+        reply = server.execute(
+            [b"GRAPH.BULK", b"g", b"BEGIN", b"1", b"1", b"1", b"1", node, relation]
+        )
+        assert reply.startswith(b"-ERR")
+        # The declared counts must match the tokens.
+        reply = server.execute(
+            [b"GRAPH.BULK", b"g", b"BEGIN", b"1", b"0", b"1", b"0", people]
+        )
+        assert reply.startswith(b"-ERR")
+        reply = server.execute(
+            [b"GRAPH.BULK", b"g", b"BEGIN", b"2", b"0", b"1", b"0", people]
+        )
+        assert reply == b"$36\r\n2 nodes created, 0 relations created\r\n"
+        reply = server.execute([b"GRAPH.BULK", b"g", b"0", b"1", b"0", b"1", relation])
+        assert reply == b"$36\r\n0 nodes created, 1 relations created\r\n"
+        assert server.graphs[b"g"].labels == {"Person": 2}
+        assert server.graphs[b"g"].reltypes == {"KNOWS": 1}
+        assert server.execute([b"EXISTS", b"g", b"h"]) == b":1\r\n"
+
+    def test_load(self):
+        """Verify that the bulk loader can build a graph on the stand-in server."""
+        server = BulkServer(keep_entities=True)
+        url = server.start_thread()
+        runner = CliRunner()
+        res = runner.invoke(
+            bulk_insert,
+            [
+                "--redis-url",
+                url,
+                "--nodes",
+                os.path.join(EXAMPLE_DIR, "Person.csv"),
+                "--nodes",
+                os.path.join(EXAMPLE_DIR, "Country.csv"),
+                "--relations",
+                os.path.join(EXAMPLE_DIR, "KNOWS.csv"),
+                "--relations",
+                os.path.join(EXAMPLE_DIR, "VISITED.csv"),
+                "--max-token-count",
+                1,
+                "social",
+            ],
+        )
+        assert res.exit_code == 0, res.output
+        assert "27 nodes created" in res.output
+        graph = server.graphs[b"social"]
+        assert graph.node_count == 27
+        assert graph.labels == {"Person": 14, "Country": 13}
+        assert graph.relation_count == sum(graph.reltypes.values())
+        assert graph.nodes[0] == (
+            "Person",
+            {"name": "Roi Lipman", "age": 32, "gender": "male", "status": "married"},
+        )
+
+        # The graph now exists, so it can't be created again.
+        res = runner.invoke(
+            bulk_insert,
+            [
+                "--redis-url",
+                url,
+                "--nodes",
+                os.path.join(EXAMPLE_DIR, "Person.csv"),
+                "social",
+            ],
+        )
+        assert res.exit_code != 0
+
+    def test_inject_failure(self):
+        """Verify that selected queries are failed."""
+        server = BulkServer(fail_at=[2])
+        client = redis.from_url(server.start_thread())
+        node = b"Person\0" + b"\0\0\0\0"
+        client.execute_command("GRAPH.BULK", "g", "BEGIN", 1, 0, 1, 0, node)
+        try:
+            client.execute_command("GRAPH.BULK", "g", 1, 0, 1, 0, node)
+            assert False
+        except redis.exceptions.ResponseError as e:
+            assert "Injected failure" in str(e)
+        client.execute_command("GRAPH.BULK", "g", 1, 0, 1, 0, node)
+        assert server.graphs[b"g"].node_count == 2
+        assert server.failures == 1
+
+    def test_resume(self):
+        """Verify that a load is resumed without duplicating the queries that Redis applied."""
+        server = BulkServer(fail_at=[3])
+        url = server.start_thread()
+        checkpoint = "/tmp/resume_checkpoint.tmp"
+        args = [
+            "--redis-url",
+            url,
+            "--nodes",
+            os.path.join(EXAMPLE_DIR, "Person.csv"),
+            "--nodes",
+            os.path.join(EXAMPLE_DIR, "Country.csv"),
+            "--relations",
+            os.path.join(EXAMPLE_DIR, "KNOWS.csv"),
+            "--relations",
+            os.path.join(EXAMPLE_DIR, "VISITED.csv"),
+            "--max-token-count",
+            1,
+            "--checkpoint",
+            checkpoint,
+            "social",
+        ]
+        runner = CliRunner()
+        res = runner.invoke(bulk_insert, args)
+        assert res.exit_code != 0
+        graph = server.graphs[b"social"]
+        assert graph.labels == {"Person": 14, "Country": 13}
+
+        # Drop the last acknowledgement, as if the reply to an applied query was lost.
+        with open(checkpoint) as f:
+            lines = f.readlines()
+        last_ack = max(
+            i for i, line in enumerate(lines) if '"acknowledged": true' in line
+        )
+        with open(checkpoint, "w") as f:
+            f.writelines(lines[:last_ack])
+
+        res = runner.invoke(bulk_insert, args + ["--resume"])
+        os.remove(checkpoint)
+        assert res.exit_code == 0, res.output
+        assert "applied but not acknowledged" in res.output
+        # The resumed graph matches a load that was never interrupted.
+        res = runner.invoke(bulk_insert, args[:-3] + ["clean"])
+        assert res.exit_code == 0, res.output
+        clean = server.graphs[b"clean"]
+        assert graph.labels == clean.labels
+        assert graph.reltypes == clean.reltypes
@@ -0,0 +1,95 @@
+import csv
+import json
+import os
+import shutil
+from array import array
+
+import pytest
+
+from redisgraph_bulk_loader.cache import ENDPOINTS, CacheEntry, EncodingCache
+from redisgraph_bulk_loader.config import Config
+from redisgraph_bulk_loader.exceptions import CSVError
+from redisgraph_bulk_loader.label import Label
+from redisgraph_bulk_loader.query_buffer import QueryBuffer
+
+CACHE_DIR = "/tmp/cache.tmp"
+
+
+def relation_entry(endpoints, segments):
+    rows = b"".join(ENDPOINTS.pack(src, dest) + b"\x00" for src, dest in endpoints)
+    offsets = array("Q", range(17, 17 * len(endpoints) + 1, 17))
+    return CacheEntry(rows, offsets, [], segments)
+
+
+class TestEncodingCache:
+    @classmethod
+    def teardown_class(cls):
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        os.remove("/tmp/labels.tmp")
+
+    def test_rebase_relations(self):
+        """Verify that cached endpoint IDs follow their label files to new ID ranges."""
+        entry = relation_entry([(0, 3), (2, 4)], [("a", 0, 3), ("b", 3, 2)])
+
+        # Unchanged ID ranges reuse the cached rows as they are.
+        rows = list(entry.rebase([("a", 0, 3), ("b", 3, 2)]))
+        assert b"".join(rows) == entry.rows
+
+        # Label files processed in a different order shift the IDs of their nodes.
+        rows = list(entry.rebase([("b", 0, 2), ("c", 2, 10), ("a", 12, 3)]))
+        assert ENDPOINTS.unpack_from(rows[0]) == (12, 0)
+        assert ENDPOINTS.unpack_from(rows[1]) == (14, 1)
+        # Properties are left untouched.
+        assert rows[0][16:] == b"\x00"
+
+        # A referenced label file that changed invalidates the entry.
+        assert entry.rebase([("a", 0, 3), ("changed", 3, 2)]) is None
+
+    def test_store_and_load(self):
+        """Verify that cached entities are keyed by file and options, and read back intact."""
+        with open("/tmp/labels.tmp", mode="w") as csv_file:
+            out = csv.writer(csv_file)
+            out.writerow(["_ID", "prop"])
+            out.writerow([0, "prop1"])
+
+        config = Config(store_node_identifiers=True)
+        cache = EncodingCache(CACHE_DIR, config)
+        label = Label(None, "/tmp/labels.tmp", "LabelTest", config)
+        key = cache.key(label)
+        assert cache.load(key) is None
+
+        writer = cache.writer(key)
+        writer.identifiers.append("0")
+        writer.add(b"first")
+        writer.add(b"second")
+        writer.commit()
+
+        entry = cache.load(key)
+        assert list(entry.entities()) == [b"first", b"second"]
+        assert entry.identifiers == ["0"]
+        # Metadata is plain JSON, which can't run code when it is read.
+        with open(os.path.join(CACHE_DIR, key + ".meta")) as f:
+            assert json.load(f)["identifiers"] == ["0"]
+
+        # Options that affect encoding produce a different key.
+        other = EncodingCache(CACHE_DIR, Config(enforce_schema=True))
+        assert other.key(label) != key
+        # So do changes to the input file.
+        with open("/tmp/labels.tmp", mode="a") as csv_file:
+            csv_file.write("1,prop2\n")
+        assert cache.key(label) != key
+
+    def test_failed_file(self):
+        """Verify that a file that can't be processed leaves no partial entry behind."""
+        with open("/tmp/labels.tmp", mode="w") as csv_file:
+            csv_file.write("_ID,prop\n0,prop1\n1,prop2,extra\n")
+
+        config = Config(store_node_identifiers=True)
+        cache = EncodingCache(CACHE_DIR, config)
+        query_buf = QueryBuffer("graph", None, config, cache=cache)
+        label = Label(query_buf, "/tmp/labels.tmp", "LabelTest", config)
+        with pytest.raises(CSVError):
+            label.process_entities()
+        key = cache.key(label)
+        assert cache.load(key) is None
+        assert not [name for name in os.listdir(CACHE_DIR) if name.startswith(key)]
@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from redisgraph_bulk_loader.checkpoint import Checkpoint
+from redisgraph_bulk_loader.query_buffer import Batch
+from redisgraph_bulk_loader.report import LoadReport
+
+CHECKPOINT_PATH = "/tmp/checkpoint.tmp"
+
+
+class FakeQueryBuffer:
+    def __init__(self, position, nodes_created, relations_created):
+        self.position = position
+        self.filename = "input.csv"
+        self.top_node_id = nodes_created
+        self.labels = []
+        self.reltypes = []
+        self.tasks = []
+        self.nodes_created = nodes_created
+        self.relations_created = relations_created
+        self.report = LoadReport("graph")
+
+
+class TestCheckpoint:
+    @classmethod
+    def teardown_class(cls):
+        os.remove(CHECKPOINT_PATH)
+
+    def test_resume_position(self):
+        """Verify that a resumed checkpoint reports the entities sent by the interrupted load."""
+        inputs = [["Label", "Person", "person.csv", 100, 0]]
+        checkpoint = Checkpoint(CHECKPOINT_PATH, "graph", inputs)
+        for position, nodes in [((0, None), 10), ((1, 500), 510)]:
+            query_buffer = FakeQueryBuffer(position, nodes, 0)
+            checkpoint.record(Batch(None, 0, 0, 0, query_buffer), query_buffer)
+        checkpoint.close()
+        # A record cut short by the interruption is ignored.
+        with open(CHECKPOINT_PATH, "a") as f:
+            f.write('{"batch": 3, "entity"')
+
+        resumed = Checkpoint(CHECKPOINT_PATH, "graph", inputs, resume=True)
+        assert resumed.batch == 2
+        assert resumed.nodes_created == 510
+        assert resumed.top_node_id == 510
+        assert resumed.completed(0)
+        assert not resumed.completed(1)
+        assert resumed.sent_rows(1) == 500
+        assert not resumed.completed(2)
+        assert resumed.sent_rows(2) == 0
+        resumed.close()
+
+    def test_mismatched_inputs(self):
+        """Verify that a checkpoint is only resumed with the inputs that wrote it."""
+        inputs = [["Label", "Person", "person.csv", 100, 0]]
+        Checkpoint(CHECKPOINT_PATH, "graph", inputs).close()
+
+        with pytest.raises(Exception, match="same graph and input files"):
+            Checkpoint(CHECKPOINT_PATH, "other", inputs, resume=True)
+        changed = [["Label", "Person", "person.csv", 200, 0]]
+        with pytest.raises(Exception, match="same graph and input files"):
+            Checkpoint(CHECKPOINT_PATH, "graph", changed, resume=True)
+
+    def test_reconcile(self):
+        """Verify that a load resumes after the sent batch whose counts match the graph."""
+        inputs = [["Label", "Person", "person.csv", 100, 0]]
+        checkpoint = Checkpoint(CHECKPOINT_PATH, "graph", inputs)
+        query_buffer = FakeQueryBuffer((0, 10), 0, 0)
+        for position, nodes in [((0, 10), 10), ((0, 20), 20), ((0, None), 30)]:
+            query_buffer.position = position
+            query_buffer.top_node_id = nodes
+            query_buffer.node_count = query_buffer.relation_count = 10
+            checkpoint.sent(query_buffer)
+            query_buffer.tasks.append(None)
+        # Only the first batch was acknowledged.
+        query_buffer = FakeQueryBuffer((0, 10), 10, 10)
+        checkpoint.record(Batch(None, 0, 0, 0, query_buffer), query_buffer)
+        checkpoint.close()
+
+        resumed = Checkpoint(CHECKPOINT_PATH, "graph", inputs, resume=True)
+        resumed.reconcile(10, 10)
+        assert resumed.sent_rows(0) == 10
+        # The second batch was applied, but its reply was lost.
+        resumed.reconcile(20, 20)
+        assert resumed.batch == 2
+        assert resumed.sent_rows(0) == 20
+        assert resumed.top_node_id == 20
+        with pytest.raises(Exception, match="can't be resumed"):
+            resumed.reconcile(25, 20)
+        resumed.close()
@@ -0,0 +1,51 @@
+import bz2
+import gzip
+import os
+
+import pytest
+
+from redisgraph_bulk_loader.config import Config
+from redisgraph_bulk_loader.label import Label
+
+
+class TestCompressedInput:
+    @classmethod
+    def teardown_class(cls):
+        """Delete temporary files"""
+        os.remove("/tmp/Person.csv.gz")
+        os.remove("/tmp/Person.csv.bz2")
+
+    def test_gzip_label(self):
+        """Verify that a gzip-compressed CSV file is read as a stream."""
+        with gzip.open("/tmp/Person.csv.gz", "wt") as csv_file:
+            csv_file.write("_ID,name\n")
+            for idx in range(5000):
+                csv_file.write(f"{idx},name{idx}\n")
+
+        label = Label(None, "/tmp/Person.csv.gz", None, Config())
+        # The compression extension is not part of the label.
+        assert label.entity_str == "Person"
+        assert label.column_names == [None, "name"]
+        # Compressed files are not counted ahead of processing.
+        assert label.count_entities() is None
+
+        label.open()
+        with label.progressbar() as reader:
+            rows = list(reader)
+        label.close()
+        assert len(rows) == 5000
+        assert rows[-1] == ["4999", "name4999"]
+
+    def test_corrupt_file(self):
+        """Verify that decompression errors are raised to the reader."""
+        with bz2.open("/tmp/Person.csv.bz2", "wt") as csv_file:
+            csv_file.write("_ID,name\n")
+            for idx in range(100000):
+                csv_file.write(f"{idx},name{idx * 7919 % 10007}\n")
+        with open("/tmp/Person.csv.bz2", "r+b") as f:
+            f.seek(os.path.getsize("/tmp/Person.csv.bz2") // 2)
+            f.write(b"corrupt")
+
+        # The header row is read from the first decompressed block.
+        with pytest.raises(OSError):
+            Label(None, "/tmp/Person.csv.bz2", None, Config())
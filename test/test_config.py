@@ -1,6 +1,36 @@
+import os
 import unittest
 
+import redis
+
+from redisgraph_bulk_loader.bulk_insert import process_entities
+from redisgraph_bulk_loader.bulk_server import BulkServer
 from redisgraph_bulk_loader.config import Config
+from redisgraph_bulk_loader.label import Label
+from redisgraph_bulk_loader.query_buffer import QueryBuffer
+
+BUDGET_CSV = "/tmp/budget.csv"
+
+
+def load_with_budget(memory_budget, latency=0.0, max_buffer_size=64):
+    """Load the nodes of BUDGET_CSV into a stand-in server, returning it and the
+    query buffer, whose pending queries are sampled after every submission"""
+    server = BulkServer(latency=latency)
+    client = redis.from_url(server.start_thread())
+    config = Config(max_buffer_size=max_buffer_size, memory_budget=memory_budget)
+    query_buf = QueryBuffer("budget", client, config)
+    query_buf.pending = []
+    add_task = query_buf.add_task
+
+    def sampled_add_task(batch):
+        add_task(batch)
+        query_buf.pending.append((len(query_buf.tasks), query_buf.inflight_size))
+
+    query_buf.add_task = sampled_add_task
+    process_entities([Label(query_buf, BUDGET_CSV, None, config)])
+    query_buf.send_buffer()
+    query_buf.wait_pool()
+    return server, query_buf
 
 
 class TestBulkLoader:
@@ -17,6 +47,8 @@ class TestBulkLoader:
         assert not config.store_node_identifiers
         assert config.separator == ","
         assert config.quoting == 3
+        assert config.memory_budget == 0
+        assert config.target_latency == 0
 
     def test_modified_values(self):
         """Verify that Config_set updates Config class values accordingly."""
@@ -30,6 +62,8 @@ class TestBulkLoader:
             skip_invalid_edges=True,
             separator="|",
             quoting=0,
+            memory_budget=256,
+            target_latency=250,
         )
         assert config.max_token_count == 10
         assert config.max_token_size == 200_000_000
@@ -43,3 +77,55 @@ class TestBulkLoader:
         assert not config.store_node_identifiers
         assert config.separator == "|"
         assert config.quoting == 0
+        # Memory budget argument is converted to megabytes
+        assert config.memory_budget == 256_000_000
+        # Target latency argument is converted from milliseconds to seconds
+        assert config.target_latency == 0.25
+
+
+class TestMemoryBudget:
+    @classmethod
+    def setup_class(cls):
+        with open(BUDGET_CSV, "w") as f:
+            f.write("id,name\n")
+            for idx in range(5000):
+                f.write(f"{idx},name{idx:05d}\n")
+
+    @classmethod
+    def teardown_class(cls):
+        """Delete temporary files"""
+        os.remove(BUDGET_CSV)
+
+    def test_budget_forces_flushes(self):
+        """Verify that entities are flushed in smaller queries to stay within the memory budget."""
+        server, query_buf = load_with_budget(0)
+        assert server.calls == 1
+
+        # A 40 KB budget for about 120 KB of encoded nodes
+        server, query_buf = load_with_budget(0.04)
+        assert server.graphs[b"budget"].node_count == 5000
+        assert server.calls > 3
+        assert all(query["bytes"] < 40_000 for query in query_buf.report.queries)
+
+    def test_budget_below_one_row(self):
+        """Verify that a budget too small for a single row sends each row in its own query."""
+        server, query_buf = load_with_budget(0.000001)
+        assert server.graphs[b"budget"].node_count == 5000
+        assert server.calls == 5000
+        # Flushes leave the label's header as the next query's first token.
+        assert all(query["tokens"] <= 2 for query in query_buf.report.queries)
+
+    def test_budget_limits_inflight_queries(self):
+        """Verify that submitting a query blocks while in-flight queries exceed half of the budget."""
+        # Queries of up to 15 KB are otherwise kept in flight 4 at a time.
+        server, query_buf = load_with_budget(0, latency=0.01, max_buffer_size=0.015)
+        assert max(tasks for tasks, _ in query_buf.pending) == 4
+        assert max(inflight for _, inflight in query_buf.pending) > 20_000
+
+        server, query_buf = load_with_budget(0.04, latency=0.01, max_buffer_size=0.015)
+        assert server.graphs[b"budget"].node_count == 5000
+        assert all(
+            tasks == 0 or inflight <= 20_000 for tasks, inflight in query_buf.pending
+        )
+        # Submissions waited for earlier queries to be acknowledged.
+        assert query_buf.report.totals()["queue_wait"] > 0
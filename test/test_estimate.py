@@ -0,0 +1,115 @@
+import gzip
+import os
+
+from click.testing import CliRunner
+
+from redisgraph_bulk_loader.bulk_insert import bulk_insert
+from redisgraph_bulk_loader.bulk_server import BulkServer
+from redisgraph_bulk_loader.config import Config
+from redisgraph_bulk_loader.estimate import LoadEstimate, RoundTrip
+from redisgraph_bulk_loader.label import Label
+from redisgraph_bulk_loader.relation_type import RelationType
+
+
+class TestEstimate:
+    @classmethod
+    def setup_class(cls):
+        # Rows of the same width, so that row counts can be projected accurately.
+        with open("/tmp/Station.csv", "w") as f:
+            f.write("id,name,rank\n")
+            for idx in range(20000):
+                f.write(f"{idx:05d},station{idx:05d},{idx % 10}\n")
+        with open("/tmp/LINK.csv", "w") as f:
+            f.write("src,dest,minutes\n")
+            for idx in range(20000):
+                f.write(f"{idx:05d},{(idx + 1) % 20000:05d},{idx % 10}\n")
+        # Large enough to be decompressed over several chunks
+        with gzip.open("/tmp/Route.csv.gz", "wt") as f:
+            f.write("id,name,rank\n")
+            for idx in range(100000):
+                f.write(f"{idx:06d},route{idx:06d},{idx % 10}\n")
+
+    @classmethod
+    def teardown_class(cls):
+        """Delete temporary files"""
+        os.remove("/tmp/Station.csv")
+        os.remove("/tmp/LINK.csv")
+        os.remove("/tmp/Route.csv.gz")
+
+    def test_projection(self):
+        """Verify that row counts and payloads are projected from a sample."""
+        config = Config(store_node_identifiers=True)
+        labels = [Label(None, "/tmp/Station.csv", None, config)]
+        reltypes = [RelationType(None, "/tmp/LINK.csv", None, config)]
+        estimate = LoadEstimate(labels, reltypes, config, sample_rows=2000)
+        stations, links = estimate.samples
+        assert stations.rows == links.rows == 2000
+        assert abs(stations.total_rows - 20000) < 200
+        assert abs(links.total_rows - 20000) < 200
+        # Relations are prefixed by their endpoints.
+        assert links.row_size == 16 + links.encoded_size / 2000
+
+        totals = estimate.totals()
+        assert totals["payload"] == stations.payload + links.payload
+        assert totals["calls"] == 1
+        assert totals["id_map"] > totals["nodes"] * 50
+        assert totals["send_time"] is None
+
+        # Samples covering whole files count their rows exactly.
+        estimate = LoadEstimate(labels, reltypes, config, sample_rows=50000)
+        assert [s.total_rows for s in estimate.samples] == [20000, 20000]
+
+    def test_compressed_projection(self):
+        """Verify that the rows of compressed files are projected over their decompressed size."""
+        config = Config()
+        labels = [Label(None, "/tmp/Route.csv.gz", None, config)]
+        estimate = LoadEstimate(labels, [], config, sample_rows=2000)
+        assert abs(estimate.samples[0].total_rows - 100000) < 5000
+
+    def test_round_trip(self):
+        """Verify that the server is measured with a scratch graph that is then deleted."""
+        server = BulkServer(latency=0.01)
+        runner = CliRunner()
+        res = runner.invoke(
+            bulk_insert,
+            [
+                "--redis-url",
+                server.start_thread(),
+                "--nodes",
+                "/tmp/Station.csv",
+                "--relations",
+                "/tmp/LINK.csv",
+                "--estimate",
+                "--estimate-rows",
+                1000,
+                "graph",
+            ],
+        )
+        assert res.exit_code == 0, res.output
+        assert "Projected time:" in res.output
+        # Both sampled files were loaded into the scratch graph, which was deleted.
+        assert server.calls == 2
+        assert server.graphs == {}
+
+        trip = RoundTrip()
+        assert trip.throughput is None
+
+    def test_round_trip_rejected(self):
+        """Verify that only encoding is estimated if the server rejects the sampled entities."""
+        # As a server without the RedisGraph module would
+        server = BulkServer(fail_at=[1])
+        runner = CliRunner()
+        res = runner.invoke(
+            bulk_insert,
+            [
+                "--redis-url",
+                server.start_thread(),
+                "--nodes",
+                "/tmp/Station.csv",
+                "--estimate",
+                "graph",
+            ],
+        )
+        assert res.exit_code == 0, res.output
+        assert "only the encoding of the load is estimated" in res.output
+        assert "Projected encoding time:" in res.output
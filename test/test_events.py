@@ -0,0 +1,114 @@
+import os
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from redisgraph_bulk_loader.bulk_insert import bulk_insert
+from redisgraph_bulk_loader.bulk_server import BulkServer
+from redisgraph_bulk_loader.events import EventDispatcher, LoadObserver, load_observer
+
+# Events received by the most recently created RecordingObserver
+recorded = []
+
+
+class RecordingObserver(LoadObserver):
+    def __init__(self):
+        recorded.clear()
+
+    def file_started(self, file_report):
+        recorded.append(("file_started", file_report.filename))
+
+    def file_finished(self, file_report):
+        recorded.append(("file_finished", file_report.entities, file_report.skipped))
+
+    def batch_sent(self, batch):
+        recorded.append(("batch_sent", batch["query"], batch["rows"]))
+
+    def batch_acknowledged(self, query):
+        recorded.append(("batch_acknowledged", query["query"], query["rows"]))
+
+    def load_finished(self, report):
+        recorded.append(("load_finished", report["nodes_created"]))
+
+
+class FailingObserver:
+    def __init__(self):
+        self.calls = 0
+
+    def file_started(self, file_report):
+        self.calls += 1
+        raise ValueError("exporter unavailable")
+
+
+class TestEvents:
+    @classmethod
+    def teardown_class(cls):
+        """Delete temporary files"""
+        os.remove("/tmp/Person.csv")
+        os.remove("/tmp/KNOWS.csv")
+
+    def test_events(self):
+        """Verify that observers are notified of files and queries in order."""
+        with open("/tmp/Person.csv", "w") as f:
+            f.write("id,name\n")
+            for idx in range(10):
+                f.write(f"{idx},name{idx}\n")
+        with open("/tmp/KNOWS.csv", "w") as f:
+            f.write("src,dest\n")
+            for idx in range(10):
+                # The last relation refers to a node that doesn't exist.
+                f.write(f"{idx},{idx + 1}\n")
+
+        server = BulkServer()
+        runner = CliRunner()
+        res = runner.invoke(
+            bulk_insert,
+            [
+                "--redis-url",
+                server.start_thread(),
+                "--nodes",
+                "/tmp/Person.csv",
+                "--relations",
+                "/tmp/KNOWS.csv",
+                "--skip-invalid-edges",
+                "--max-token-count",
+                1,
+                "--observer",
+                "test.test_events:RecordingObserver",
+                "graph",
+            ],
+        )
+        assert res.exit_code == 0, res.output
+        assert recorded == [
+            ("file_started", "/tmp/Person.csv"),
+            ("batch_sent", 0, 10),
+            ("file_finished", 10, 0),
+            ("file_started", "/tmp/KNOWS.csv"),
+            ("batch_sent", 1, 9),
+            ("file_finished", 9, 1),
+            ("batch_acknowledged", 0, 10),
+            ("batch_acknowledged", 1, 9),
+            ("load_finished", 10),
+        ]
+
+    def test_failing_observer(self, capsys):
+        """Verify that an observer raising an exception is detached."""
+        failing = FailingObserver()
+        other = LoadObserver()
+        events = EventDispatcher([failing, other])
+        events.emit("file_started", None)
+        events.emit("file_started", None)
+        assert failing.calls == 1
+        assert events.observers == [other]
+        assert "exporter unavailable" in capsys.readouterr().err
+
+    def test_load_observer(self):
+        """Verify that observers are specified as module:name."""
+        assert isinstance(
+            load_observer("test.test_events:RecordingObserver"), RecordingObserver
+        )
+        with pytest.raises(click.BadParameter):
+            load_observer("test.test_events")
+        with pytest.raises(click.BadParameter):
+            load_observer("test.test_events:MissingObserver")
@@ -0,0 +1,142 @@
+import collections
+import csv
+import os
+import random
+import shutil
+
+import click
+import pytest
+import redis
+from click.testing import CliRunner
+
+from redisgraph_bulk_loader.bulk_insert import process_entities
+from redisgraph_bulk_loader.bulk_server import BulkServer
+from redisgraph_bulk_loader.config import Config
+from redisgraph_bulk_loader.entity_file import Type
+from redisgraph_bulk_loader.generate import (
+    PowerLaw,
+    bulk_generate,
+    parse_count,
+    parse_properties,
+)
+from redisgraph_bulk_loader.label import Label
+from redisgraph_bulk_loader.query_buffer import QueryBuffer
+from redisgraph_bulk_loader.relation_type import RelationType
+
+OUTPUT_DIR = "/tmp/generated"
+
+
+def read_file(filename):
+    with open(os.path.join(OUTPUT_DIR, filename)) as f:
+        return f.read()
+
+
+class TestGenerate:
+    @classmethod
+    def teardown_class(cls):
+        """Delete temporary files"""
+        shutil.rmtree(OUTPUT_DIR, ignore_errors=True)
+
+    def test_parse_arguments(self):
+        """Verify that entity counts and property schemas are parsed."""
+        assert parse_count("250") == 250
+        assert parse_count("1.5K") == 1500
+        assert parse_count("2b") == 2_000_000_000
+        assert parse_properties("name:STRING,n:INT,junk:IGNORE") == [
+            ("name", Type.STRING),
+            ("n", Type.LONG),
+            ("junk", Type.IGNORE),
+        ]
+        with pytest.raises(click.BadParameter):
+            parse_properties("id:ID")
+
+    def test_power_law(self):
+        """Verify that power-law sampling favours a few nodes and stays within range."""
+        sampler = PowerLaw(random.Random(0), 1000, 1.0, 3)
+        degrees = collections.Counter(sampler.sample() for _ in range(10000))
+        assert all(0 <= node < 1000 for node in degrees)
+        # The most connected 1% of nodes have a large share of the relations.
+        top = sum(count for _, count in degrees.most_common(10))
+        assert top > 3000
+
+    def test_generate(self):
+        """Verify that generated files are deterministic and can be read by the loader."""
+        args = [
+            OUTPUT_DIR,
+            "--labels",
+            2,
+            "--nodes",
+            "300",
+            "--types",
+            2,
+            "--edges",
+            "1K",
+            "--distribution",
+            "powerlaw",
+            "--enforce-schema",
+        ]
+        runner = CliRunner()
+        res = runner.invoke(bulk_generate, args)
+        assert res.exit_code == 0, res.output
+        assert sorted(os.listdir(OUTPUT_DIR)) == [
+            "Label0.csv",
+            "Label1.csv",
+            "TYPE0.csv",
+            "TYPE1.csv",
+        ]
+        first = read_file("TYPE1.csv")
+        res = runner.invoke(bulk_generate, args)
+        assert read_file("TYPE1.csv") == first
+        res = runner.invoke(bulk_generate, args + ["--seed", 1])
+        assert read_file("TYPE1.csv") != first
+
+        config = Config(enforce_schema=True, store_node_identifiers=True)
+        label = Label(None, os.path.join(OUTPUT_DIR, "Label1.csv"), None, config)
+        assert label.id_namespace == "Label1"
+        assert label.types[1:] == [
+            Type.STRING,
+            Type.LONG,
+            Type.DOUBLE,
+            Type.BOOL,
+            Type.ARRAY,
+        ]
+        assert label.entities_count == 300
+        reltype = RelationType(
+            None, os.path.join(OUTPUT_DIR, "TYPE1.csv"), None, config
+        )
+        assert (reltype.start_namespace, reltype.end_namespace) == ("Label1", "Label0")
+        assert reltype.entities_count == 1000
+
+        # Relations refer to the IDs of their source and destination labels.
+        with open(os.path.join(OUTPUT_DIR, "TYPE1.csv")) as f:
+            rows = list(csv.reader(f))[1:]
+        assert all(300 <= int(row[0]) < 600 for row in rows)
+        assert all(0 <= int(row[1]) < 300 for row in rows)
+
+    def test_load_default_output(self):
+        """Verify that files generated with the default properties are loaded with the default Config."""
+        output_dir = os.path.join(OUTPUT_DIR, "default")
+        runner = CliRunner()
+        res = runner.invoke(bulk_generate, [output_dir, "--nodes", 50, "--edges", 80])
+        assert res.exit_code == 0, res.output
+
+        server = BulkServer(keep_entities=True)
+        client = redis.from_url(server.start_thread())
+        config = Config(store_node_identifiers=True)
+        query_buf = QueryBuffer("generated", client, config)
+        label = Label(query_buf, os.path.join(output_dir, "Label0.csv"), None, config)
+        reltype = RelationType(
+            query_buf, os.path.join(output_dir, "TYPE0.csv"), None, config
+        )
+        process_entities([label])
+        process_entities([reltype])
+        query_buf.send_buffer()
+        query_buf.wait_pool()
+
+        graph = server.graphs[b"generated"]
+        assert graph.labels == {"Label0": 50}
+        assert graph.reltypes == {"TYPE0": 80}
+        # Arrays are read whole, despite the commas separating their elements.
+        tags = graph.nodes[0][1]["tags"]
+        assert len(tags) == 4
+        assert all(isinstance(tag, int) for tag in tags)
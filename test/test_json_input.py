@@ -0,0 +1,104 @@
+import os
+import struct
+
+import pytest
+
+from redisgraph_bulk_loader.config import Config
+from redisgraph_bulk_loader.entity_file import Type
+from redisgraph_bulk_loader.exceptions import CSVError, SchemaError
+from redisgraph_bulk_loader.json_input import encode_json_value
+from redisgraph_bulk_loader.label import Label
+from redisgraph_bulk_loader.relation_type import RelationType
+
+
+class TestJsonInput:
+    @classmethod
+    def teardown_class(cls):
+        """Delete temporary files"""
+        os.remove("/tmp/Person.jsonl")
+        os.remove("/tmp/KNOWS.jsonl")
+        os.remove("/tmp/Address.jsonl")
+        os.remove("/tmp/Address.csv")
+
+    def test_encode_json_value(self):
+        """Verify that JSON values are encoded according to their JSON type."""
+        assert encode_json_value(True) == struct.pack("=B?", Type.BOOL.value, True)
+        assert encode_json_value(7) == struct.pack("=Bq", Type.LONG.value, 7)
+        assert encode_json_value(0.5) == struct.pack("=Bd", Type.DOUBLE.value, 0.5)
+        assert encode_json_value(None) == b"\x00"
+        # Arrays are encoded directly, including nested arrays.
+        assert encode_json_value(["a", [1]]) == (
+            struct.pack("=Bq", Type.ARRAY.value, 2)
+            + struct.pack("=B2s", Type.STRING.value, b"a")
+            + struct.pack("=Bq", Type.ARRAY.value, 1)
+            + struct.pack("=Bq", Type.LONG.value, 1)
+        )
+
+    def test_label_without_header(self):
+        """Verify that the keys of the first object form the header of a JSON Lines file."""
+        with open("/tmp/Person.jsonl", mode="w") as json_file:
+            json_file.write('{"_id": 1, "name": "Alice"}\n')
+            json_file.write('{"_id": 2, "age": 30}\n')
+
+        label = Label(None, "/tmp/Person.jsonl", None, Config())
+        assert label.column_names == [None, "name"]
+        assert label.entities_count == 2
+
+        label.open()
+        assert list(label.reader) == [(1, "Alice"), (2, None)]
+        label.close()
+
+    def test_relation_with_header(self):
+        """Verify that a header line declares the ID keys of a JSON Lines file."""
+        with open("/tmp/KNOWS.jsonl", mode="w") as json_file:
+            json_file.write('["src:START_ID(User)", "dst:END_ID(User)", "since"]\n')
+            json_file.write('{"src": "a", "dst": "b", "since": 2020}\n')
+            json_file.write('{"src": "b", "dst": "a", "since": [2020\n')
+
+        config = Config(enforce_schema=True)
+        reltype = RelationType(None, "/tmp/KNOWS.jsonl", None, config)
+        assert reltype.types == [Type.START_ID, Type.END_ID, Type.UNKNOWN]
+        assert reltype.start_namespace == "User"
+        assert reltype.column_names == [None, None, "since"]
+        assert reltype.entities_count == 2
+
+        reltype.open()
+        assert next(reltype.reader) == ("a", "b", 2020)
+        with pytest.raises(CSVError, match="KNOWS.jsonl:3"):
+            next(reltype.reader)
+        reltype.close()
+
+    def test_declared_types(self):
+        """Verify that keys declaring a type are encoded as the same CSV file would be."""
+        with open("/tmp/Address.jsonl", mode="w") as json_file:
+            json_file.write('["id:ID", "zip:STRING", "n:BOOL"]\n')
+            json_file.write('{"id": 1, "zip": 2100, "n": "x"}\n')
+            json_file.write('{"id": 2, "zip": 2200, "n": true}\n')
+        with open("/tmp/Address.csv", mode="w") as csv_file:
+            csv_file.write("id:ID,zip:STRING,n:BOOL\n")
+            csv_file.write("1,2100,x\n")
+            csv_file.write("2,2200,true\n")
+
+        config = Config(enforce_schema=True, store_node_identifiers=True)
+        label = Label(None, "/tmp/Address.jsonl", None, config)
+        csv = Label(None, "/tmp/Address.csv", None, config)
+        assert label.types == [Type.ID_STRING, Type.STRING, Type.BOOL]
+
+        label.open()
+        csv.open()
+        # Values that can't be converted to their declared type are rejected.
+        with pytest.raises(SchemaError):
+            label.pack_props(next(label.reader))
+        with pytest.raises(SchemaError):
+            csv.pack_props(next(csv.reader))
+        row = next(label.reader)
+        csv_row = next(csv.reader)
+        assert label.node_identifier(row) == csv.node_identifier(csv_row)
+        assert label.pack_props(row) == csv.pack_props(csv_row)
+        assert label.pack_props(row) == (
+            struct.pack("=B2s", Type.STRING.value, b"2")
+            + struct.pack("=B5s", Type.STRING.value, b"2200")
+            + struct.pack("=B?", Type.BOOL.value, True)
+        )
+        label.close()
+        csv.close()
@@ -2,8 +2,13 @@ import csv
 import os
 import unittest
 
+import pytest
+
+from redisgraph_bulk_loader.bulk_insert import process_entities
 from redisgraph_bulk_loader.config import Config
+from redisgraph_bulk_loader.exceptions import CSVError
 from redisgraph_bulk_loader.label import Label
+from redisgraph_bulk_loader.query_buffer import QueryBuffer
 
 
 class TestBulkLoader:
@@ -49,3 +54,33 @@ class TestBulkLoader:
         assert label.entities_count == 2
         assert label.types[0].name == "ID_STRING"
         assert label.types[1].name == "STRING"
+
+    def test_file_opened_lazily(self):
+        """Verify that input files are only held open while they are processed."""
+        with open("/tmp/labels.tmp", mode="w") as csv_file:
+            out = csv.writer(csv_file)
+            out.writerow(["_ID", "prop"])
+            out.writerow([0, "prop1"])
+
+        label = Label(None, "/tmp/labels.tmp", "LabelTest", Config())
+        assert label.infile is None
+
+        label.prefetch()
+        assert label.entities_count == 1
+        # The reader is positioned after the header row.
+        assert next(label.reader) == ["0", "prop1"]
+        label.close()
+        assert label.infile is None
+
+    def test_failure_closes_prefetched_files(self):
+        """Verify that files opened ahead of a file that fails to process are closed."""
+        with open("/tmp/labels.tmp", mode="w") as csv_file:
+            csv_file.write("_ID,prop\n0,prop1,extra\n")
+        config = Config()
+        query_buf = QueryBuffer("graph", None, config)
+        labels = [
+            Label(query_buf, "/tmp/labels.tmp", f"L{idx}", config) for idx in range(4)
+        ]
+        with pytest.raises(CSVError):
+            process_entities(labels)
+        assert all(label.infile is None for label in labels)
@@ -0,0 +1,73 @@
+import os
+import shutil
+import sys
+
+from redisgraph_bulk_loader.bulk_insert import process_entity
+from redisgraph_bulk_loader.config import Config
+from redisgraph_bulk_loader.label import Label
+from redisgraph_bulk_loader.memory import peak_rss
+from redisgraph_bulk_loader.query_buffer import QueryBuffer
+from redisgraph_bulk_loader.spool import SpoolWriter
+
+SPOOL_DIR = "/tmp/memory_spool.tmp"
+
+
+def write_nodes(path, count, offset=0):
+    with open(path, "w") as f:
+        f.write("id,name\n")
+        for idx in range(offset, offset + count):
+            f.write(f"node{idx:04d},name{idx:04d}\n")
+
+
+class TestMemoryMonitor:
+    @classmethod
+    def teardown_class(cls):
+        """Delete temporary files"""
+        shutil.rmtree(SPOOL_DIR, ignore_errors=True)
+        os.remove("/tmp/First.csv")
+        os.remove("/tmp/Second.csv")
+
+    def test_estimates(self, capsys):
+        """Verify that the ID map and pending entities are estimated after each file."""
+        write_nodes("/tmp/First.csv", 1000)
+        write_nodes("/tmp/Second.csv", 1000, 1000)
+        config = Config(store_node_identifiers=True)
+        query_buffer = QueryBuffer("graph", None, config, SpoolWriter(SPOOL_DIR, "g"))
+        monitor = query_buffer.memory
+        monitor.verbose = True
+        first = Label(query_buffer, "/tmp/First.csv", None, config)
+        second = Label(query_buffer, "/tmp/Second.csv", None, config)
+        monitor.expect_nodes([first, second])
+
+        process_entity(first)
+        id_map = monitor.sizes["id_map"]
+        # Every identifier costs at least its string and its ID.
+        assert id_map > 1000 * (sys.getsizeof("node0999") + 8)
+        assert monitor.sizes["pending"] == query_buffer.buffer_size > 0
+        # Half of the node files have been read, so the ID map should double.
+        assert monitor.projected_id_map == id_map * 2
+
+        process_entity(second)
+        assert monitor.peaks["id_map"] > id_map
+        query_buffer.send_buffer()
+        query_buffer.wait_pool()
+        assert monitor.peaks["pending"] >= monitor.sizes["pending"]
+        assert "Memory: ID map" in capsys.readouterr().out
+        assert not monitor.warned
+
+    def test_projection_warning(self, capsys):
+        """Verify that a warning is printed once the projected ID map outgrows available memory."""
+        config = Config(store_node_identifiers=True, max_token_size=0)
+        query_buffer = QueryBuffer("graph", None, config, SpoolWriter(SPOOL_DIR, "g"))
+        monitor = query_buffer.memory
+        monitor.available = 1000
+        first = Label(query_buffer, "/tmp/First.csv", None, config)
+        second = Label(query_buffer, "/tmp/Second.csv", None, config)
+        monitor.expect_nodes([first, second])
+
+        # Every node is sent in a query of its own, so the ID map is sampled as it grows.
+        process_entity(first)
+        query_buffer.wait_pool()
+        assert monitor.warned
+        assert capsys.readouterr().err.count("projected to grow") == 1
+        assert monitor.to_dict()["peak_rss"] <= peak_rss()
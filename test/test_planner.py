@@ -0,0 +1,67 @@
+from redisgraph_bulk_loader.config import Config
+from redisgraph_bulk_loader.planner import pack_entities, plan_batches
+
+
+class Entity:
+    def __init__(
+        self, name, file_size, compression=None, streaming=False, input_format="csv"
+    ):
+        self.name = name
+        self.packed_header = b"header"
+        self.file_size = file_size
+        self.compression = compression
+        self.streaming = streaming
+        self.input_format = input_format
+
+
+def names(batches):
+    return [[entity.name for entity in batch] for batch in batches]
+
+
+class TestPlanner:
+    def test_pack_small_files(self):
+        """Verify that small files are packed first-fit in decreasing order of size."""
+        config = Config(max_buffer_size=1)
+        entities = [
+            Entity("a", 300_000),
+            Entity("b", 600_000),
+            Entity("c", 350_000),
+            Entity("d", 90_000),
+        ]
+        assert names(pack_entities(entities, config)) == [["b", "c"], ["a", "d"]]
+
+    def test_token_count_limit(self):
+        """Verify that no batch holds more files than the token count limit."""
+        config = Config(max_buffer_size=1, max_token_count=2)
+        entities = [Entity(str(i), 10) for i in range(5)]
+        assert [len(batch) for batch in pack_entities(entities, config)] == [2, 2, 1]
+
+    def test_large_files(self):
+        """Verify that only the remainder of a file larger than a query is packed."""
+        config = Config(max_buffer_size=1)
+        entities = [Entity("large", 2_500_000), Entity("small", 400_000)]
+        assert names(pack_entities(entities, config)) == [["large", "small"]]
+
+    def test_unplannable_files(self):
+        """Verify that compressed files, Parquet files and streams get batches of their own."""
+        config = Config(max_buffer_size=1)
+        entities = [
+            Entity("a", 300_000),
+            Entity("compressed", 100_000, compression=".gz"),
+            Entity("stream", 0, streaming=True),
+            Entity("parquet", 100_000, input_format="arrow"),
+            Entity("b", 200_000),
+        ]
+        assert names(pack_entities(entities, config)) == [
+            ["a", "b"],
+            ["compressed"],
+            ["stream"],
+            ["parquet"],
+        ]
+
+    def test_labels_before_relations(self):
+        """Verify that all label batches precede relation batches."""
+        config = Config(max_buffer_size=1)
+        labels = [Entity("label", 10)]
+        reltypes = [Entity("reltype", 10)]
+        assert names(plan_batches(labels, reltypes, config)) == [["label"], ["reltype"]]
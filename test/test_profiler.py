@@ -0,0 +1,73 @@
+import json
+import os
+import pstats
+import shutil
+
+import redis
+
+from redisgraph_bulk_loader.bulk_insert import process_entity
+from redisgraph_bulk_loader.bulk_update import BulkUpdate
+from redisgraph_bulk_loader.config import Config
+from redisgraph_bulk_loader.label import Label
+from redisgraph_bulk_loader.profiler import ColumnProfile, LoadProfiler, profile_columns
+from redisgraph_bulk_loader.query_buffer import QueryBuffer
+from redisgraph_bulk_loader.spool import SpoolWriter
+
+PROFILE_DIR = "/tmp/profile.tmp"
+SPOOL_DIR = "/tmp/profile_spool.tmp"
+
+
+class TestProfiler:
+    @classmethod
+    def teardown_class(cls):
+        """Delete temporary files"""
+        shutil.rmtree(PROFILE_DIR, ignore_errors=True)
+        shutil.rmtree(SPOOL_DIR, ignore_errors=True)
+        os.remove("/tmp/Profiled.csv")
+
+    def test_column_encoding(self):
+        """Verify that profiled entities are encoded as unprofiled ones are."""
+        with open("/tmp/Profiled.csv", "w") as f:
+            f.write("id:ID,name:STRING,_skipped:IGNORE,tags:ARRAY\n")
+            f.write("0,Alice,x,[1]\n")
+            f.write("1,Bob,y,[]\n")
+        for enforce_schema in (False, True):
+            config = Config(enforce_schema=enforce_schema)
+            label = Label(None, "/tmp/Profiled.csv", None, config)
+            label.open()
+            rows = list(label.reader)
+            label.close()
+            expected = [label.pack_props(row) for row in rows]
+            profile = profile_columns(label)
+            assert [label.pack_props(row) for row in rows] == expected
+            assert profile.rows == 2
+            assert sum(profile.sizes) == sum(len(entity) for entity in expected)
+        assert profile.names == ["id", "name", "tags"]
+
+    def test_update_row_bytes(self):
+        """Verify that the formatted columns of bulk updates are measured in UTF-8 bytes."""
+        # No connection is made until a query is sent.
+        updater = BulkUpdate(
+            "graph", 1, ",", True, "/tmp/Profiled.csv", "RETURN 1", "row", redis.Redis()
+        )
+        updater.columns = ColumnProfile(["id", "name"])
+        updater.column_encoders = [(0, updater.quote_string), (1, updater.quote_string)]
+        assert updater.format_profiled_row(["1", "Zoë"]) == '[1,"Zoë"]'
+        assert updater.columns.sizes == [1, 6]
+
+    def test_profile_files(self):
+        """Verify that a stats file and column breakdown are written for each input file."""
+        config = Config(enforce_schema=True)
+        query_buffer = QueryBuffer("graph", None, config, SpoolWriter(SPOOL_DIR, "g"))
+        query_buffer.profiler = LoadProfiler(PROFILE_DIR)
+        process_entity(Label(query_buffer, "/tmp/Profiled.csv", None, config))
+        query_buffer.send_buffer()
+        query_buffer.wait_pool()
+
+        with open(query_buffer.profiler.write_columns()) as f:
+            (profiled,) = json.load(f)
+        assert profiled["rows"] == 2
+        assert [c["column"] for c in profiled["columns"]] == ["id", "name", "tags"]
+        assert all(c["encode_time"] > 0 for c in profiled["columns"])
+        stats = pstats.Stats(profiled["stats"])
+        assert any(func[2] == "process_entities" for func in stats.stats)
@@ -0,0 +1,125 @@
+import csv
+import json
+import os
+import shutil
+
+from click.testing import CliRunner
+
+from redisgraph_bulk_loader.bulk_insert import bulk_insert, process_entity
+from redisgraph_bulk_loader.bulk_server import BulkServer
+from redisgraph_bulk_loader.config import Config
+from redisgraph_bulk_loader.label import Label
+from redisgraph_bulk_loader.query_buffer import QueryBuffer
+from redisgraph_bulk_loader.relation_type import RelationType
+from redisgraph_bulk_loader.report import STAGES, percentile
+from redisgraph_bulk_loader.spool import SpoolWriter
+
+SPOOL_DIR = "/tmp/report_spool.tmp"
+REPORT_PATH = "/tmp/report.json"
+TIMELINE_PATH = "/tmp/timeline.csv"
+
+
+class TestLoadReport:
+    @classmethod
+    def teardown_class(cls):
+        """Delete temporary files"""
+        shutil.rmtree(SPOOL_DIR, ignore_errors=True)
+        os.remove("/tmp/Person.csv")
+        os.remove("/tmp/KNOWS.csv")
+        os.remove(REPORT_PATH)
+        os.remove(TIMELINE_PATH)
+
+    def test_stage_times(self):
+        """Verify that stage timings are attributed to input files and queries."""
+        with open("/tmp/Person.csv", "w") as f:
+            f.write("id,name\n")
+            for idx in range(100):
+                f.write(f"{idx},name{idx}\n")
+        with open("/tmp/KNOWS.csv", "w") as f:
+            f.write("src,dest\n")
+            for idx in range(99):
+                f.write(f"{idx},{idx + 1}\n")
+
+        # Send every entity in a query of its own.
+        config = Config(max_token_size=0, store_node_identifiers=True)
+        spool = SpoolWriter(SPOOL_DIR, "graph")
+        query_buffer = QueryBuffer("graph", None, config, spool)
+        # As when --report-json is given
+        query_buffer.report.time_rows = True
+        process_entity(Label(query_buffer, "/tmp/Person.csv", None, config))
+        process_entity(RelationType(query_buffer, "/tmp/KNOWS.csv", None, config))
+        query_buffer.send_buffer()
+        query_buffer.wait_pool()
+
+        report = query_buffer.report
+        report.write(REPORT_PATH, 1.0, 100, 99)
+        with open(REPORT_PATH) as f:
+            contents = json.load(f)
+        assert contents["nodes_created"] == 100
+        assert [f["entities"] for f in contents["files"]] == [100, 99]
+
+        person, knows = report.files
+        assert person.times["read"] > 0
+        assert person.times["encode"] > 0
+        assert person.times["id_map"] > 0
+        assert knows.times["id_map"] > 0
+        assert set(contents["stages"]) == set(STAGES)
+
+        # Every query is recorded once, and attributed to the file of its last entity.
+        assert len(contents["queries"]) > 2
+        assert sum(q["rows"] for q in contents["queries"]) == 199
+        assert person.queries + knows.queries == len(contents["queries"])
+        assert contents["queries"][-1]["file"] == 1
+
+        # Rows are not timed unless a report or an observer needs their stages.
+        shutil.rmtree(SPOOL_DIR)
+        query_buffer = QueryBuffer(
+            "graph", None, config, SpoolWriter(SPOOL_DIR, "graph")
+        )
+        process_entity(Label(query_buffer, "/tmp/Person.csv", None, config))
+        query_buffer.wait_pool()
+        assert query_buffer.report.files[0].times["encode"] == 0
+
+    def test_percentile(self):
+        """Verify that percentiles are picked by nearest rank."""
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([7], 90) == 7
+
+    def test_timeline(self):
+        """Verify that the latency of every query is written to the timeline."""
+        server = BulkServer(latency=0.01)
+        url = server.start_thread()
+        runner = CliRunner()
+        res = runner.invoke(
+            bulk_insert,
+            [
+                "--redis-url",
+                url,
+                "--nodes",
+                "/tmp/Person.csv",
+                "--relations",
+                "/tmp/KNOWS.csv",
+                "--max-token-count",
+                1,
+                "--timeline",
+                TIMELINE_PATH,
+                "graph",
+            ],
+        )
+        assert res.exit_code == 0, res.output
+        assert "Query round trips: p50" in res.output
+
+        with open(TIMELINE_PATH) as f:
+            queries = list(csv.DictReader(f))
+        assert len(queries) == 2
+        assert [int(q["nodes_created"]) for q in queries] == [100, 0]
+        assert [int(q["relations_created"]) for q in queries] == [0, 99]
+        assert [q["file"] for q in queries] == ["0", "1"]
+        for query in queries:
+            assert int(query["tokens"]) == 1
+            assert float(query["round_trip"]) >= 0.01
+            assert float(query["started"]) >= float(query["submitted"])
+        # A query is only sent once the previous one has completed.
+        assert float(queries[1]["started"]) >= float(queries[0]["finished"])
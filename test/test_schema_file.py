@@ -0,0 +1,111 @@
+import json
+import os
+import shutil
+
+import pytest
+from click.testing import CliRunner
+
+from redisgraph_bulk_loader.bulk_insert import bulk_insert, parse_schemas
+from redisgraph_bulk_loader.bulk_server import BulkServer
+from redisgraph_bulk_loader.config import Config
+from redisgraph_bulk_loader.entity_file import Type
+from redisgraph_bulk_loader.exceptions import SchemaError
+from redisgraph_bulk_loader.label import Label
+from redisgraph_bulk_loader.schema_file import load_schema
+
+SCHEMA_DIR = "/tmp/schema_file"
+
+
+class TestSchemaFile:
+    @classmethod
+    def setup_class(cls):
+        """Write two headerless partitions of a node file"""
+        os.makedirs(os.path.join(SCHEMA_DIR, "people"), exist_ok=True)
+        with open(os.path.join(SCHEMA_DIR, "people", "part-1.csv"), "w") as f:
+            f.write("0,Alice\n1,Bob\n")
+        with open(os.path.join(SCHEMA_DIR, "people", "part-2.csv"), "w") as f:
+            f.write("2,Carol\n")
+
+    @classmethod
+    def teardown_class(cls):
+        """Delete temporary files"""
+        shutil.rmtree(SCHEMA_DIR)
+
+    def write_schema(self, schema):
+        path = os.path.join(SCHEMA_DIR, "schema.json")
+        with open(path, "w") as f:
+            json.dump(schema, f)
+        return path
+
+    def test_partitioned_label(self):
+        """Verify that the partitions of a label share the header declared in the schema file."""
+        path = self.write_schema(
+            {
+                "nodes": [
+                    {
+                        "label": "Person",
+                        "columns": ["id:ID(Person)", "name:STRING"],
+                        "files": "people/part-*.csv",
+                    }
+                ]
+            }
+        )
+        nodes, relations = load_schema(path)
+        assert relations == []
+        assert len(nodes) == 1
+        assert [os.path.basename(f) for f in nodes[0].files] == [
+            "part-1.csv",
+            "part-2.csv",
+        ]
+
+        config = Config(enforce_schema=True, store_node_identifiers=True)
+        labels = parse_schemas(Label, None, [], [], config, nodes)
+        assert len(labels) == 2
+        first, second = labels
+        assert first.entity_str == second.entity_str == "Person"
+        assert first.types == [Type.ID_STRING, Type.STRING]
+        assert first.id_namespace == "Person"
+        # The header is parsed and packed once for all partitions.
+        assert second.packed_header is first.packed_header
+        assert [label.count_entities() for label in labels] == [2, 1]
+
+        # The first line of a headerless partition is a data row.
+        second.open()
+        assert list(second.reader) == [["2", "Carol"]]
+        second.close()
+
+    def test_unmatched_files(self):
+        """Verify that a schema entry without data files is rejected."""
+        path = self.write_schema(
+            {"relations": [{"type": "KNOWS", "columns": [], "files": "knows-*.csv"}]}
+        )
+        with pytest.raises(SchemaError):
+            load_schema(path)
+
+    def test_typed_columns(self):
+        """Verify that a schema file declaring column types requires --enforce-schema."""
+        path = self.write_schema(
+            {
+                "nodes": [
+                    {
+                        "label": "Person",
+                        "columns": ["id:ID(Person)", "name:STRING"],
+                        "files": "people/part-*.csv",
+                    }
+                ]
+            }
+        )
+        runner = CliRunner()
+        url = BulkServer().start_thread()
+        res = runner.invoke(
+            bulk_insert, ["--redis-url", url, "--schema", path, "graph"]
+        )
+        assert res.exit_code != 0
+        assert "requires --enforce-schema" in str(res.exception)
+
+        res = runner.invoke(
+            bulk_insert,
+            ["--redis-url", url, "--schema", path, "--enforce-schema", "graph"],
+        )
+        assert res.exit_code == 0, res.output
+        assert "3 nodes created" in res.output
@@ -0,0 +1,151 @@
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from redisgraph_bulk_loader.bulk_insert import bulk_insert
+from redisgraph_bulk_loader.bulk_server import BulkServer
+from redisgraph_bulk_loader.sketches import (
+    ColumnSketch,
+    DegreeSketch,
+    HyperLogLog,
+    degree_histogram,
+)
+
+REPORT_PATH = "/tmp/sketches.json"
+
+
+class TestSketches:
+    @classmethod
+    def teardown_class(cls):
+        """Delete temporary files"""
+        os.remove("/tmp/City.csv")
+        os.remove("/tmp/ROAD.csv")
+        os.remove(REPORT_PATH)
+
+    def test_distinct_count(self):
+        """Verify that distinct counts are estimated within a few percent."""
+        for count in (100, 50000):
+            hll = HyperLogLog()
+            for idx in range(count):
+                # Every value is added several times, as strings and integers.
+                hll.add(f"value{idx}")
+                hll.add(f"value{idx}")
+                hll.add(idx)
+            assert abs(hll.count() - 2 * count) < 0.08 * 2 * count
+
+    def test_column_sketch(self):
+        """Verify that null ratios are counted and ranges kept for numeric columns."""
+        numbers = ColumnSketch()
+        for value in ["3", "", "-1.5", "10", None]:
+            numbers.add(value)
+        assert numbers.to_dict() == {
+            "distinct": 3,
+            "null_ratio": 0.4,
+            "min": -1.5,
+            "max": 10.0,
+        }
+        strings = ColumnSketch()
+        for value in ["3", "abc", True]:
+            strings.add(value)
+        assert strings.to_dict()["min"] is None
+
+        assert degree_histogram([0, 1, 2, 3, 4, 9]) == {
+            "0": 1,
+            "1": 1,
+            "2-3": 2,
+            "4-7": 1,
+            "8-15": 1,
+        }
+
+    def test_degree_sketch(self):
+        """Verify that blocks of binary edges are counted as relations added one at a time."""
+        numpy = pytest.importorskip("numpy")
+        edges = [(0, 1), (0, 2), (2, 1), (5, 0), (0, 1)]
+        rows = DegreeSketch()
+        rows.reserve(4)
+        for src, dest in edges:
+            rows.add(src, dest)
+        blocks = DegreeSketch()
+        blocks.reserve(4)
+        blocks.add_block(numpy.array(edges[:2], "<u8").tobytes())
+        blocks.add_block(numpy.array(edges[2:], "<u8").tobytes())
+
+        # Counters grow to hold node IDs beyond the reserved ones.
+        assert list(rows.out_degree) == list(blocks.out_degree) == [3, 0, 1, 0, 0, 1]
+        assert list(rows.in_degree) == list(blocks.in_degree) == [1, 3, 1, 0, 0, 0]
+        assert rows.to_dict(6, {0: "a"}) == blocks.to_dict(6, {0: "a"})
+        assert rows.to_dict(6, {0: "a"})["out_degree"]["top"][0] == {
+            "id": "a",
+            "degree": 3,
+        }
+
+    def test_load_report(self):
+        """Verify that sketches of a load are written to its report."""
+        with open("/tmp/City.csv", "w") as f:
+            f.write("name,population,country\n")
+            for idx in range(100):
+                country = "" if idx % 4 == 0 else f"country{idx % 3}"
+                f.write(f"city{idx},{idx * 1000},{country}\n")
+        with open("/tmp/ROAD.csv", "w") as f:
+            f.write("src,dest,length\n")
+            # city0 is connected to every other city, and city1 to city2.
+            for idx in range(1, 100):
+                f.write(f"city0,city{idx},{idx}\n")
+            f.write("city1,city2,5\n")
+
+        server = BulkServer()
+        runner = CliRunner()
+        res = runner.invoke(
+            bulk_insert,
+            [
+                "--redis-url",
+                server.start_thread(),
+                "--nodes",
+                "/tmp/City.csv",
+                "--relations",
+                "/tmp/ROAD.csv",
+                "--sketches",
+                "--report-json",
+                REPORT_PATH,
+                "graph",
+            ],
+        )
+        assert res.exit_code == 0, res.output
+        with open(REPORT_PATH) as f:
+            sketches = json.load(f)["sketches"]
+
+        city = sketches["labels"]["City"]["properties"]
+        assert abs(city["name"]["distinct"] - 100) <= 3
+        assert city["population"]["min"] == 0
+        assert city["population"]["max"] == 99000
+        assert city["country"] == {
+            "distinct": 3,
+            "null_ratio": 0.25,
+            "min": None,
+            "max": None,
+        }
+
+        road = sketches["relation_types"]["ROAD"]
+        assert road["properties"]["length"]["max"] == 99
+        assert road["out_degree"]["top"][0] == {"id": "city0", "degree": 99}
+        assert road["out_degree"]["top"][1] == {"id": "city1", "degree": 1}
+        assert road["out_degree"]["histogram"] == {
+            "0": 98,
+            "1": 1,
+            "2-3": 0,
+            "4-7": 0,
+            "8-15": 0,
+            "16-31": 0,
+            "32-63": 0,
+            "64-127": 1,
+        }
+        assert road["in_degree"]["top"][0] == {"id": "city2", "degree": 2}
+        assert sum(road["in_degree"]["histogram"].values()) == 100
+
+        # Sketches can only be written to a report.
+        res = runner.invoke(
+            bulk_insert, ["--nodes", "/tmp/City.csv", "--sketches", "graph"]
+        )
+        assert res.exit_code != 0
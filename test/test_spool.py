@@ -0,0 +1,123 @@
+import json
+import os
+import shutil
+
+import pytest
+from click.testing import CliRunner
+
+from redisgraph_bulk_loader.bulk_insert import bulk_insert
+from redisgraph_bulk_loader.bulk_replay import bulk_replay
+from redisgraph_bulk_loader.bulk_server import BulkServer
+from redisgraph_bulk_loader.spool import (
+    BATCH_HEADER,
+    BATCH_MAGIC,
+    DATA_FILENAME,
+    MANIFEST_FILENAME,
+    TOKEN_LENGTH,
+    SpoolWriter,
+    iter_batches,
+    load_manifest,
+)
+
+SPOOL_DIR = "/tmp/spool.tmp"
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), "..", "example")
+
+
+class TestSpoolWriter:
+    @classmethod
+    def setup_class(cls):
+        shutil.rmtree(SPOOL_DIR, ignore_errors=True)
+
+    @classmethod
+    def teardown_class(cls):
+        shutil.rmtree(SPOOL_DIR, ignore_errors=True)
+
+    def test_write_batches(self):
+        """Verify that spooled queries are framed and described in the manifest."""
+        spool = SpoolWriter(SPOOL_DIR, "graph")
+        stats, _, server_time = spool.write_batch(["BEGIN", 2, 0, 1, 0, b"label token"])
+        assert stats == [b"2 nodes created", b"0 relations created"]
+        assert server_time == 0
+        spool.write_batch([0, 3, 0, 2, b"first", b"second"])
+        spool.close(["Person:name"])
+
+        with open(os.path.join(SPOOL_DIR, MANIFEST_FILENAME)) as f:
+            manifest = json.load(f)
+        assert manifest["graph"] == "graph"
+        assert manifest["nodes"] == 2
+        assert manifest["relations"] == 3
+        assert manifest["index"] == ["Person:name"]
+        assert [batch["reltypes"] for batch in manifest["batches"]] == [0, 2]
+
+        with open(os.path.join(SPOOL_DIR, DATA_FILENAME), "rb") as f:
+            data = f.read()
+        second = manifest["batches"][1]
+        assert second["offset"] + second["size"] == len(data)
+        # The BEGIN token is not spooled.
+        assert BATCH_HEADER.unpack_from(data, 0) == (BATCH_MAGIC, 2, 0, 1, 0)
+        offset = second["offset"] + BATCH_HEADER.size
+        assert TOKEN_LENGTH.unpack_from(data, offset) == (len(b"first"),)
+
+        # A spool directory holding a complete load is not overwritten.
+        with pytest.raises(Exception):
+            SpoolWriter(SPOOL_DIR, "graph")
+
+    def test_iter_batches(self):
+        """Verify that spooled queries are read back as slices of the data file."""
+        shutil.rmtree(SPOOL_DIR, ignore_errors=True)
+        spool = SpoolWriter(SPOOL_DIR, "graph")
+        spool.write_batch(["BEGIN", 2, 0, 1, 0, b"label token"])
+        spool.write_batch([1, 3, 1, 2, b"label", b"first", b"second"])
+        spool.close()
+
+        manifest = load_manifest(SPOOL_DIR)
+        with open(os.path.join(SPOOL_DIR, DATA_FILENAME), "rb") as f:
+            data = memoryview(f.read())
+        batches = list(iter_batches(manifest, data))
+        assert len(batches) == 2
+        batch, labels, reltypes = batches[1]
+        assert (batch["nodes"], batch["relations"]) == (1, 3)
+        assert [bytes(token) for token in labels] == [b"label"]
+        assert [bytes(token) for token in reltypes] == [b"first", b"second"]
+        assert all(token.obj is data.obj for token in labels + reltypes)
+
+    def test_replay(self):
+        """Verify that a replayed spool builds the same graph as a direct load."""
+        shutil.rmtree(SPOOL_DIR, ignore_errors=True)
+        inputs = [
+            "--nodes",
+            os.path.join(EXAMPLE_DIR, "Person.csv"),
+            "--nodes",
+            os.path.join(EXAMPLE_DIR, "Country.csv"),
+            "--relations",
+            os.path.join(EXAMPLE_DIR, "KNOWS.csv"),
+            "--relations",
+            os.path.join(EXAMPLE_DIR, "VISITED.csv"),
+            "--max-token-count",
+            1,
+        ]
+        runner = CliRunner()
+        res = runner.invoke(bulk_insert, inputs + ["--spool-dir", SPOOL_DIR, "social"])
+        assert res.exit_code == 0, res.output
+        manifest = load_manifest(SPOOL_DIR)
+        assert len(manifest["batches"]) > 1
+
+        server = BulkServer()
+        url = server.start_thread()
+        res = runner.invoke(bulk_insert, inputs + ["--redis-url", url, "direct"])
+        assert res.exit_code == 0, res.output
+        # The stand-in server rejects a first query without BEGIN, and any later one with it.
+        res = runner.invoke(bulk_replay, [SPOOL_DIR, "--redis-url", url])
+        assert res.exit_code == 0, res.output
+        assert server.calls == 2 * len(manifest["batches"])
+        replayed = server.graphs[b"social"]
+        direct = server.graphs[b"direct"]
+        assert replayed.node_count == manifest["nodes"] == 27
+        assert replayed.relation_count == manifest["relations"]
+        assert replayed.labels == direct.labels
+        assert replayed.reltypes == direct.reltypes
+
+        # A spool is replayed as a new graph, so the graph can't be replayed again.
+        res = runner.invoke(bulk_replay, [SPOOL_DIR, "--redis-url", url])
+        assert res.exit_code != 0
+        assert server.calls == 2 * len(manifest["batches"])
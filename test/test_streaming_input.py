@@ -0,0 +1,49 @@
+import os
+import threading
+
+import pytest
+
+from redisgraph_bulk_loader.config import Config
+from redisgraph_bulk_loader.exceptions import CSVError
+from redisgraph_bulk_loader.label import Label
+
+FIFO_PATH = "/tmp/labels.fifo"
+
+
+class TestStreamingInput:
+    @classmethod
+    def teardown_class(cls):
+        """Delete temporary files"""
+        os.remove(FIFO_PATH)
+
+    def test_named_pipe(self):
+        """Verify that a named pipe is read in a single pass."""
+        os.mkfifo(FIFO_PATH)
+
+        def produce():
+            with open(FIFO_PATH, "w") as fifo:
+                fifo.write("_ID,name\n")
+                for idx in range(1000):
+                    fifo.write(f"{idx},name{idx}\n")
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        label = Label(None, FIFO_PATH, "Person", Config())
+        assert label.streaming
+        assert label.column_names == [None, "name"]
+        # Streams are not counted ahead of processing.
+        assert label.count_entities() is None
+
+        # The stream remains open after its header row.
+        label.open()
+        with label.progressbar() as reader:
+            rows = list(reader)
+        label.close()
+        producer.join()
+        assert len(rows) == 1000
+        assert rows[0] == ["0", "name0"]
+
+    def test_stdin_requires_label(self):
+        """Verify that standard input must be given an explicit label."""
+        with pytest.raises(CSVError):
+            Label(None, "-", None, Config())
@@ -0,0 +1,49 @@
+import socket
+import threading
+
+from redisgraph_bulk_loader import zero_copy
+from redisgraph_bulk_loader.zero_copy import pack_command, sendmsg_all
+
+
+def read_all(sock):
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+class TestZeroCopy:
+    def test_pack_command(self):
+        """Verify that packed commands match the RESP encoding of their arguments."""
+        large = b"x" * (zero_copy.BUFFER_CUTOFF + 1)
+        args = ("GRAPH.BULK", "graph", "BEGIN", 3, 0, b"small", large)
+        buffers = pack_command(*args)
+        expected = b"*7\r\n" + b"".join(
+            b"$%d\r\n%s\r\n" % (len(arg), arg)
+            for arg in [b"GRAPH.BULK", b"graph", b"BEGIN", b"3", b"0", b"small", large]
+        )
+        assert b"".join(bytes(buf) for buf in buffers) == expected
+        # The large token is referenced rather than copied into the framing.
+        assert any(isinstance(buf, memoryview) and buf.obj is large for buf in buffers)
+
+    def test_sendmsg_all_partial_writes(self, monkeypatch):
+        """Verify that all buffers are written when sendmsg is limited to a few buffers per call."""
+        monkeypatch.setattr(zero_copy, "IOV_MAX", 3)
+        tokens = [bytes([i % 256]) * (i * 997) for i in range(1, 50)]
+        buffers = pack_command("GRAPH.BULK", "graph", *tokens)
+
+        sender, receiver = socket.socketpair()
+        sender.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        received = []
+        reader = threading.Thread(target=lambda: received.append(read_all(receiver)))
+        reader.start()
+        sendmsg_all(sender, buffers)
+        sender.close()
+        reader.join()
+        receiver.close()
+
+        assert received[0] == b"".join(bytes(buf) for buf in buffers)
+        # The payload is a valid RESP array holding every token.
+        assert received[0].startswith(b"*%d\r\n" % (len(tokens) + 2))